@@ -1,12 +1,102 @@
-from sqlalchemy import create_engine, MetaData
+from time import perf_counter
+from sqlalchemy import create_engine, make_url, MetaData
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import sessionmaker, declarative_base
-from environment.variables import get_db_url, get_db_schema
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from environment.variables import Settings, get_settings
+from utils.metrics import get_metrics
 
-print(get_db_url())
-engine = create_engine(get_db_url())
+
+class InstrumentedQueuePool(QueuePool):
+
+    '''
+        QueuePool que mede o tempo de espera por uma conexão livre (checkout) e os checkouts
+        que excederam o pool_timeout ("QueuePool limit ... reached")
+    '''
+
+    espera_checkout = get_metrics().histogram("db_pool_checkout_espera_segundos", "Espera por uma conexão do pool")
+    timeouts_checkout = get_metrics().counter("db_pool_checkout_timeouts_total", "Checkouts que excederam o pool_timeout")
+
+    def _do_get(self):
+
+        inicio = perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts_checkout.inc()
+            raise
+        finally:
+            self.espera_checkout.observe(perf_counter() - inicio)
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+def build_engine(settings: Settings, url: str | None = None):
+
+    connect_args = {"connect_timeout": settings.db_connect_timeout}
+
+    if settings.db_statement_timeout_ms > 0:
+        connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+
+    return create_engine(
+        url or settings.db_url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_pool_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args
+    )
+
+
+def build_async_engine(settings: Settings) -> AsyncEngine:
+    # Mesma URL e parâmetros de pool, com o driver asyncpg (dependência necessária apenas com DB_ASYNC=1)
+
+    connect_args = {"timeout": settings.db_connect_timeout}
+
+    if settings.db_statement_timeout_ms > 0:
+        connect_args["server_settings"] = {"statement_timeout": str(settings.db_statement_timeout_ms)}
+
+    # Os statements (e os hot lookups, compilados uma única vez) são preparados no servidor na primeira execução
+    # em cada conexão; as execuções seguintes enviam apenas os parâmetros
+    url = make_url(settings.db_url).set(drivername="postgresql+asyncpg").update_query_dict({"prepared_statement_cache_size": str(settings.db_prepared_statements)})
+
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_pool_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args=connect_args
+    )
+
+
+settings = get_settings()
+
+engine = build_engine(settings=settings)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base(metadata=MetaData(schema=get_db_schema()))
+get_metrics().gauge("db_pool_conexoes_em_uso", "Conexões do pool em uso", lambda: engine.pool.checkedout())
+get_metrics().gauge("db_pool_conexoes_livres", "Conexões abertas disponíveis no pool", lambda: engine.pool.checkedin())
+get_metrics().gauge("db_pool_tamanho", "Tamanho configurado do pool (pool_size + max_overflow)", lambda: settings.db_pool_size + settings.db_pool_max_overflow)
+
+async_engine: AsyncEngine | None = None
+AsyncSessionLocal: async_sessionmaker | None = None
+
+if settings.db_async:
+    async_engine = build_async_engine(settings=settings)
+    # expire_on_commit=False: atributos lidos após o commit não podem disparar I/O implícito
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+    get_metrics().gauge("db_async_pool_conexoes_em_uso", "Conexões do pool assíncrono em uso", lambda: async_engine.pool.checkedout())
+
+Base = declarative_base(metadata=MetaData(schema=settings.db_schema))
 
 def get_db():
 
@@ -14,4 +104,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+
+    async with AsyncSessionLocal() as db:
+        yield db
\ No newline at end of file
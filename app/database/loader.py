@@ -0,0 +1,77 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Set, Type, TypeVar
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import Session
+
+
+Model = TypeVar("Model")
+
+
+class RequestLoader:
+
+    '''
+        Carregador de entidades por id com escopo da requisição (uma instância por Session), no estilo DataLoader.
+
+        - get(): memoizado por (modelo, id); uma linha já carregada não gera nova consulta
+        - load_many(): carrega os ids ainda não presentes em uma única consulta IN (...)
+        - ids inexistentes também são memorizados, evitando repetir a consulta de um id ausente
+        - Após o commit as instâncias expiram (expire_on_commit) e são lidas novamente no próximo acesso
+    '''
+
+    def __init__(self, db: Session) -> None:
+        self.db: Session = db
+        # O identity map da Session guarda referências fracas: o loader mantém as instâncias carregadas até o fim da requisição
+        self._instancias: Dict[type, Dict] = defaultdict(dict)
+        self._ausentes: Dict[type, Set] = defaultdict(set)
+
+
+    def _carregado(self, model: Type[Model], id) -> Model | None:
+
+        instancia = self._instancias[model].get(id)
+
+        if instancia is None or inspect(instancia).expired or inspect(instancia).session is not self.db:
+            return None
+
+        return instancia
+
+
+    def get(self, model: Type[Model], id) -> Model | None:
+
+        if id in self._ausentes[model]:
+            return None
+
+        instancia = self._carregado(model, id) or self.db.get(model, id)
+
+        if instancia is None:
+            self._ausentes[model].add(id)
+        else:
+            self._instancias[model][id] = instancia
+
+        return instancia
+
+
+    def load_many(self, model: Type[Model], ids: Iterable) -> Dict[object, Model]:
+        # Retorna {id: instância} apenas dos ids existentes
+
+        ids = set(ids) - self._ausentes[model]
+        pendentes = {id for id in ids if self._carregado(model, id) is None}
+
+        if pendentes:
+            chave = inspect(model).primary_key[0]
+            for instancia in self.db.scalars(select(model).filter(chave.in_(pendentes))).all():
+                self._instancias[model][getattr(instancia, chave.key)] = instancia
+
+            self._ausentes[model].update(pendentes - self._instancias[model].keys())
+
+        return {id: instancia for id in ids if (instancia := self._carregado(model, id)) is not None}
+
+
+def get_loader(db: Session) -> RequestLoader:
+    # Compartilhado por todas as classes de lógica que utilizam a mesma Session
+
+    loader = db.info.get("request_loader")
+
+    if loader is None:
+        loader = db.info["request_loader"] = RequestLoader(db=db)
+
+    return loader
@@ -0,0 +1,152 @@
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.metrics import get_metrics
+
+
+logger = logging.getLogger(__name__)
+
+_PARAMETROS = re.compile(r"%\(\w+\)s|\$\d+|%s")
+_LISTAS = re.compile(r"\?(?:\s*,\s*\?)+")
+_ESPACOS = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    # Forma do statement: parâmetros substituídos por ? e listas IN (...) colapsadas, independente do tamanho
+
+    return _ESPACOS.sub(" ", _LISTAS.sub("?, ...", _PARAMETROS.sub("?", statement))).strip()
+
+
+class PerfilSQL:
+
+    '''
+        Statements executados durante uma requisição: quantidade, tempo total no banco,
+        o statement mais lento e quantas vezes cada forma de statement se repetiu
+    '''
+
+    def __init__(self) -> None:
+        self.ativo: bool = True
+        self.statements: int = 0
+        self.tempo_total: float = 0.0
+        self.mais_lento: float = 0.0
+        self.mais_lento_statement: str | None = None
+        self.formas: Counter = Counter()
+
+
+    def record(self, statement: str, duracao: float) -> None:
+
+        self.statements += 1
+        self.tempo_total += duracao
+        self.formas[statement_shape(statement)] += 1
+
+        if duracao > self.mais_lento:
+            self.mais_lento = duracao
+            self.mais_lento_statement = statement
+
+
+    def repeticao_maxima(self) -> tuple[str | None, int]:
+
+        if not self.formas:
+            return None, 0
+
+        return self.formas.most_common(1)[0]
+
+
+# Perfil da requisição corrente; copiado para o threadpool junto com o contexto da rota
+_perfil: ContextVar[PerfilSQL | None] = ContextVar("perfil_sql", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+
+    if _perfil.get() is not None:
+        conn.info.setdefault("perfil_sql_inicio", []).append(perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+
+    perfil = _perfil.get()
+    inicios = conn.info.get("perfil_sql_inicio")
+
+    if perfil is None or not inicios:
+        return
+
+    duracao = perf_counter() - inicios.pop()
+
+    # Tasks criadas durante uma requisição (ex.: ingestão de lances) herdam o perfil: após a resposta ele é ignorado
+    if perfil.ativo:
+        perfil.record(statement=statement, duracao=duracao)
+
+
+class SQLProfilerMiddleware:
+
+    '''
+        Mede os statements SQL de cada requisição HTTP.
+
+        - Métricas por rota: http_sql_statements[METODO /rota] e http_sql_tempo_segundos[METODO /rota]
+        - debug_headers: X-SQL-Statements, X-SQL-Tempo-Ms, X-SQL-Mais-Lento-Ms e X-SQL-Repeticao-Maxima na resposta
+          (statements executados após o início da resposta não entram nos cabeçalhos)
+        - limite_repeticoes: registra um warning quando a mesma forma de statement é executada mais vezes
+          na requisição (N+1); 0 desabilita
+    '''
+
+    STATEMENTS_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200, 500)
+
+    def __init__(self, app: ASGIApp, debug_headers: bool = False, limite_repeticoes: int = 10) -> None:
+        self.app: ASGIApp = app
+        self.debug_headers: bool = debug_headers
+        self.limite_repeticoes: int = limite_repeticoes
+        self.repeticoes = get_metrics().counter("http_sql_repeticoes_total", "Requisições em que uma forma de statement excedeu o limite de repetições")
+
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        perfil = PerfilSQL()
+        token = _perfil.set(perfil)
+
+        async def send_com_perfil(message: Message) -> None:
+
+            if self.debug_headers and message["type"] == "http.response.start":
+                _, repeticao_maxima = perfil.repeticao_maxima()
+                headers = MutableHeaders(scope=message)
+                headers["X-SQL-Statements"] = str(perfil.statements)
+                headers["X-SQL-Tempo-Ms"] = f"{perfil.tempo_total * 1000:.2f}"
+                headers["X-SQL-Mais-Lento-Ms"] = f"{perfil.mais_lento * 1000:.2f}"
+                headers["X-SQL-Repeticao-Maxima"] = str(repeticao_maxima)
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_com_perfil)
+        finally:
+            perfil.ativo = False
+            _perfil.reset(token)
+            self.report(scope=scope, perfil=perfil)
+
+
+    def report(self, scope: Scope, perfil: PerfilSQL) -> None:
+
+        # Rota com os parâmetros do caminho (/pregoes/{pregao_id}), evitando uma métrica por id
+        rota = f"{scope['method']} {getattr(scope.get('route'), 'path', 'sem rota')}"
+
+        get_metrics().histogram(f"http_sql_statements[{rota}]", "Statements SQL por requisição", buckets=self.STATEMENTS_BUCKETS).observe(perfil.statements)
+        get_metrics().histogram(f"http_sql_tempo_segundos[{rota}]", "Tempo no banco por requisição").observe(perfil.tempo_total)
+
+        forma, repeticao_maxima = perfil.repeticao_maxima()
+
+        logger.debug("%s: %d statements, %.1f ms no banco; mais lento (%.1f ms): %s", rota, perfil.statements, perfil.tempo_total * 1000, perfil.mais_lento * 1000, perfil.mais_lento_statement)
+
+        if self.limite_repeticoes > 0 and repeticao_maxima > self.limite_repeticoes:
+            self.repeticoes.inc()
+            logger.warning("%s: statement executado %d vezes na mesma requisição (%d statements, %.1f ms no banco): %s", rota, repeticao_maxima, perfil.statements, perfil.tempo_total * 1000, forma)
@@ -0,0 +1,76 @@
+from itertools import count
+from math import ceil
+from time import time
+from fastapi import Request
+from sqlalchemy.orm import sessionmaker
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from utils.metrics import get_metrics
+from .instance import SessionLocal, build_engine, settings
+
+
+# Cookie com o instante (epoch) até o qual as leituras do cliente são atendidas pelo primário
+PRIMARIO_ATE_COOKIE = "pregao_primario_ate"
+
+METODOS_LEITURA = ("GET", "HEAD", "OPTIONS")
+
+replica_engines = [build_engine(settings=settings, url=url) for url in settings.db_replica_urls]
+ReplicaSessionLocal = [sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) for replica_engine in replica_engines]
+
+_proxima_replica = count()
+
+if replica_engines:
+    get_metrics().gauge("db_replicas_conexoes_em_uso", "Conexões em uso nos pools das réplicas", lambda: sum(replica_engine.pool.checkedout() for replica_engine in replica_engines))
+
+
+def read_from_primary(request: Request) -> bool:
+
+    try:
+        return float(request.cookies.get(PRIMARIO_ATE_COOKIE, 0)) > time()
+    except ValueError:
+        return False
+
+
+def get_read_db(request: Request):
+    # Sessão de leitura: réplicas em rodízio, ou o primário quando não há réplicas ou o cliente escreveu há pouco
+
+    if not ReplicaSessionLocal or read_from_primary(request):
+        session_factory = SessionLocal
+    else:
+        session_factory = ReplicaSessionLocal[next(_proxima_replica) % len(ReplicaSessionLocal)]
+
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+
+    '''
+        Após uma escrita bem-sucedida (métodos diferentes de GET/HEAD/OPTIONS com status < 400),
+        marca o cliente com um cookie para que as leituras seguintes, durante a janela, sejam atendidas pelo primário
+        e não por uma réplica ainda atrasada
+    '''
+
+    def __init__(self, app: ASGIApp, janela: float) -> None:
+        self.app: ASGIApp = app
+        self.janela: float = janela
+
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+
+        if scope["type"] != "http" or scope["method"] in METODOS_LEITURA:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_com_cookie(message: Message) -> None:
+
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append("set-cookie", f"{PRIMARIO_ATE_COOKIE}={time() + self.janela:.3f}; Max-Age={ceil(self.janela)}; Path=/; HttpOnly; SameSite=lax")
+
+            await send(message)
+
+        await self.app(scope, receive, send_com_cookie)
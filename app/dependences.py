@@ -0,0 +1,103 @@
+import inspect
+from typing import Callable, Dict, List, Tuple, Type, TypeVar
+from fastapi import Depends, params
+from sqlalchemy.orm import Session
+from database.instance import get_db
+from database.replicas import get_read_db
+
+
+Servico = TypeVar("Servico")
+
+
+class ServiceContainer:
+
+    '''
+        Monta as classes de lógica (XxxLogic) de uma requisição sem resolver um Depends do FastAPI por classe.
+
+        - O plano de construção de cada classe (parâmetros do __init__ e suas dependências) é calculado uma única vez
+        - Por requisição o FastAPI resolve apenas a Session (get_db); as classes são instanciadas diretamente,
+          uma instância por classe, compartilhada por todas as classes que dependem dela
+        - Dependências que não são classes (get_lances_book, get_rate_limiter, ...) são funções sem parâmetros
+          que retornam os singletons do processo
+        - provide(cls, leitura=True) monta as classes sobre uma sessão de leitura (réplica), para rotas que apenas consultam
+    '''
+
+    def __init__(self) -> None:
+        self._planos: Dict[type, List[Tuple[str, Callable]]] = {}
+        self._dependencias: Dict[Tuple[type, bool], Callable] = {}
+
+
+    def plano(self, cls: Type[Servico]) -> List[Tuple[str, Callable]]:
+
+        plano = self._planos.get(cls)
+
+        if plano is None:
+            plano = []
+
+            for nome, parametro in inspect.signature(cls.__init__).parameters.items():
+                if nome == "self":
+                    continue
+
+                if not isinstance(parametro.default, params.Depends):
+                    raise TypeError(f"{cls.__name__}: o parâmetro '{nome}' não possui Depends")
+
+                dependencia = parametro.default.dependency or parametro.annotation
+
+                if inspect.isclass(dependencia):
+                    self.plano(dependencia)
+                elif dependencia is not get_db and (inspect.isgeneratorfunction(dependencia) or inspect.iscoroutinefunction(dependencia) or inspect.signature(dependencia).parameters):
+                    raise TypeError(f"{cls.__name__}: a dependência '{nome}' deve ser uma função sem parâmetros")
+
+                plano.append((nome, dependencia))
+
+            self._planos[cls] = plano
+
+        return plano
+
+
+    def build(self, cls: Type[Servico], db: Session) -> Servico:
+        # As instâncias da requisição ficam na Session, assim como o RequestLoader
+
+        instancias: Dict[type, object] = db.info.setdefault("servicos", {})
+        instancia = instancias.get(cls)
+
+        if instancia is None:
+            argumentos = {}
+
+            for nome, dependencia in self.plano(cls):
+                if dependencia is get_db:
+                    argumentos[nome] = db
+                elif inspect.isclass(dependencia):
+                    argumentos[nome] = self.build(dependencia, db)
+                else:
+                    argumentos[nome] = dependencia()
+
+            instancia = instancias[cls] = cls(**argumentos)
+
+        return instancia
+
+
+    def provide(self, cls: Type[Servico], leitura: bool = False) -> Callable[..., Servico]:
+        # Dependência para as rotas: logic: PregaoLogic = Depends(provide(PregaoLogic))
+
+        dependencia = self._dependencias.get((cls, leitura))
+
+        if dependencia is None:
+            self.plano(cls)
+
+            # async: a montagem não realiza I/O e não precisa ocupar uma thread do threadpool
+            async def dependencia(db: Session = Depends(get_read_db if leitura else get_db)) -> Servico:
+                return self.build(cls, db)
+
+            self._dependencias[(cls, leitura)] = dependencia
+
+        return dependencia
+
+
+container = ServiceContainer()
+
+def get_container() -> ServiceContainer:
+    return container
+
+def provide(cls: Type[Servico], leitura: bool = False) -> Callable[..., Servico]:
+    return container.provide(cls, leitura=leitura)
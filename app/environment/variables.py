@@ -1,31 +1,142 @@
 import os
+from dataclasses import dataclass
+from functools import lru_cache
 from dotenv import load_dotenv
 from urllib.parse import quote_plus
 
 def get_db_url():
 
-    if load_dotenv():
-        # Getting Credentials
-        host = os.getenv("POSTGRES_HOST")
-        port = os.getenv("POSTGRES_PORT")
-        password = os.getenv("POSTGRES_PASS")
-        user = os.getenv("POSTGRES_USER")
-        database = os.getenv("POSTGRES_DATABASE")
+    # URL completa, quando informada, prevalece sobre as credenciais separadas
+    url_connection = os.getenv("DATABASE_URL")
+    if url_connection:
+        return url_connection
 
-        # Coding the password to URL-Safe
-        password = quote_plus(password)
+    if os.getenv("POSTGRES_HOST") is None:
+        return ""
 
-        # Build Postgres URL Connection
-        url_connection = f"postgresql://{user}:{password}@{host}:{port}/{database}"
+    # Getting Credentials
+    host = os.getenv("POSTGRES_HOST")
+    port = os.getenv("POSTGRES_PORT")
+    password = os.getenv("POSTGRES_PASS")
+    user = os.getenv("POSTGRES_USER")
+    database = os.getenv("POSTGRES_DATABASE")
+
+    # Coding the password to URL-Safe
+    password = quote_plus(password)
+
+    # Build Postgres URL Connection
+    url_connection = f"postgresql://{user}:{password}@{host}:{port}/{database}"
+
+    return url_connection
+
+def get_db_schema() -> str | None:
+    return os.getenv("POSTGRES_SCHEMA")
+
+def get_bool(nome: str, padrao: bool) -> bool:
+    return os.getenv(nome, "1" if padrao else "0").lower() in ("1", "true")
+
+def get_list(nome: str) -> tuple[str, ...]:
+    return tuple(valor.strip() for valor in os.getenv(nome, "").split(",") if valor.strip())
+
+
+@dataclass(frozen=True)
+class Settings:
+
+    '''
+        Configurações da aplicação, lidas uma única vez do ambiente (e do .env, quando existir).
+
+        Pool de conexões (por processo: o total de conexões é workers x (pool_size + max_overflow)):
+        - DB_POOL_SIZE, DB_POOL_MAX_OVERFLOW, DB_POOL_TIMEOUT (segundos de espera por uma conexão livre)
+        - DB_POOL_RECYCLE (segundos até a conexão ser reaberta), DB_POOL_PRE_PING (testa a conexão a cada checkout)
+        - DB_CONNECT_TIMEOUT (segundos), DB_STATEMENT_TIMEOUT_MS (0 desabilita)
+
+        Réplicas de leitura:
+        - DATABASE_REPLICA_URLS (separadas por vírgula), utilizadas pelas rotas GET com o mesmo pool das configurações acima
+        - DB_READ_YOUR_WRITES_SEGUNDOS: após uma escrita, o cliente é atendido pelo primário durante a janela (0 desabilita)
+    '''
+
+    db_url: str
+    db_schema: str | None
+
+    db_pool_size: int
+    db_pool_max_overflow: int
+    db_pool_timeout: float
+    db_pool_recycle: int
+    db_pool_pre_ping: bool
+    db_connect_timeout: int
+    db_statement_timeout_ms: int
+
+    db_replica_urls: tuple[str, ...]
+    db_read_your_writes_segundos: float
+
+    # Perfil SQL por requisição (SQL_PERFIL=1): cabeçalhos X-SQL-* com SQL_DEBUG_HEADERS=1
+    # e warning quando a mesma forma de statement se repete mais de SQL_REPETICOES_LIMITE vezes (0 desabilita)
+    sql_perfil: bool
+    sql_debug_headers: bool
+    sql_repeticoes_limite: int
+
+    # Engine assíncrono (asyncpg) para as rotas de lances (DB_ASYNC=1)
+    # DB_PREPARED_STATEMENTS: statements preparados no servidor mantidos por conexão asyncpg (0 desabilita, ex.: PgBouncer em modo transaction)
+    db_async: bool
+    db_prepared_statements: int
+
+    # Ingestão de lances por fila única por Pregão (PREGAO_LANCES_INGESTAO_FILA=1)
+    lances_ingestao_fila: bool
+
+    # Group commit dos lances (PREGAO_LANCES_GROUP_COMMIT=1)
+    lances_group_commit: bool
+    lances_group_commit_janela_ms: float
+    lances_group_commit_lote_maximo: int
+    lances_group_commit_timeout_segundos: float
+
+    # Cache do catálogo (categorias, subcategorias, marcas e unidades) por processo (CATALOGO_CACHE=1):
+    # tabelas recarregadas após CATALOGO_CACHE_TTL_SEGUNDOS e versões do banco verificadas a cada CATALOGO_CACHE_VERIFICACAO_SEGUNDOS
+    catalogo_cache: bool
+    catalogo_cache_ttl_segundos: float
+    catalogo_cache_verificacao_segundos: float
+    # Cache-Control max-age das listagens do catálogo (ETag / If-None-Match); 0 revalida a cada requisição
+    catalogo_max_age_segundos: int
+
+    # Backend de publicação de eventos entre workers: "memoria" (um único worker) ou "postgres" (LISTEN/NOTIFY).
+    # Padrão "postgres" com o banco configurado: o livro de lances, os limites de lances e o feed mantêm estado
+    # por processo e, com "memoria", ficam desatualizados entre os workers do uvicorn (--workers > 1)
+    pubsub_backend: str
 
-        return url_connection
 
-    return ""
+def load_settings() -> Settings:
 
-def get_db_schema() -> str:
+    # O .env é opcional: as variáveis podem vir do ambiente (docker run -e, benchmarks)
+    load_dotenv()
 
-    if load_dotenv():
-        schema = os.getenv("POSTGRES_SCHEMA")
-        return schema
+    return Settings(
+        db_url=get_db_url(),
+        db_schema=get_db_schema(),
+        db_pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+        db_pool_max_overflow=int(os.getenv("DB_POOL_MAX_OVERFLOW", "10")),
+        db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        db_pool_pre_ping=get_bool("DB_POOL_PRE_PING", False),
+        db_connect_timeout=int(os.getenv("DB_CONNECT_TIMEOUT", "5")),
+        db_statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000")),
+        db_replica_urls=get_list("DATABASE_REPLICA_URLS"),
+        db_read_your_writes_segundos=float(os.getenv("DB_READ_YOUR_WRITES_SEGUNDOS", "5")),
+        sql_perfil=get_bool("SQL_PERFIL", True),
+        sql_debug_headers=get_bool("SQL_DEBUG_HEADERS", False),
+        sql_repeticoes_limite=int(os.getenv("SQL_REPETICOES_LIMITE", "10")),
+        db_async=get_bool("DB_ASYNC", False),
+        db_prepared_statements=int(os.getenv("DB_PREPARED_STATEMENTS", "100")),
+        lances_ingestao_fila=get_bool("PREGAO_LANCES_INGESTAO_FILA", False),
+        lances_group_commit=get_bool("PREGAO_LANCES_GROUP_COMMIT", False),
+        lances_group_commit_janela_ms=float(os.getenv("PREGAO_LANCES_GROUP_COMMIT_JANELA_MS", "5")),
+        lances_group_commit_lote_maximo=int(os.getenv("PREGAO_LANCES_GROUP_COMMIT_LOTE_MAXIMO", "100")),
+        lances_group_commit_timeout_segundos=float(os.getenv("PREGAO_LANCES_GROUP_COMMIT_TIMEOUT_SEGUNDOS", "10")),
+        catalogo_cache=get_bool("CATALOGO_CACHE", True),
+        catalogo_cache_ttl_segundos=float(os.getenv("CATALOGO_CACHE_TTL_SEGUNDOS", "300")),
+        catalogo_cache_verificacao_segundos=float(os.getenv("CATALOGO_CACHE_VERIFICACAO_SEGUNDOS", "1")),
+        catalogo_max_age_segundos=int(os.getenv("CATALOGO_MAX_AGE_SEGUNDOS", "0")),
+        pubsub_backend=os.getenv("PUBSUB_BACKEND", "postgres" if get_db_url() else "memoria").lower()
+    )
 
-    return ""
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return load_settings()
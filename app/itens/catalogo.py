@@ -0,0 +1,239 @@
+from threading import Lock
+from time import monotonic
+from types import SimpleNamespace
+from typing import Dict
+from sqlalchemy import func, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from database.instance import Base
+from database.loader import get_loader
+from environment.variables import get_settings
+from utils.metrics import MetricsRegistry, get_metrics
+from . import models
+
+
+class RegistroCatalogo(SimpleNamespace):
+
+    '''
+        Cópia imutável das colunas de um registro do catálogo, compartilhada entre as requisições do processo
+    '''
+
+    def __setattr__(self, nome: str, valor) -> None:
+        raise AttributeError(f"Registro do catálogo é somente leitura: utilize o model da sessão para alterar '{nome}'")
+
+    @classmethod
+    def from_model(cls, instancia: Base) -> "RegistroCatalogo":
+        return cls(**{atributo.key: getattr(instancia, atributo.key) for atributo in inspect(instancia).mapper.column_attrs})
+
+
+class CatalogoSnapshot:
+
+    '''
+        Registros de uma tabela do catálogo (inclusive os deletados) na versão em que foram carregados
+    '''
+
+    def __init__(self, versao: int, registros: Dict[int, RegistroCatalogo], carregado_em: float) -> None:
+        self.versao: int = versao
+        self.registros: Dict[int, RegistroCatalogo] = registros
+        self.carregado_em: float = carregado_em
+
+
+def increment_versao(db: Session, tabela: str) -> int:
+    # Na transação da escrita: a nova versão fica visível aos demais workers junto com o registro alterado
+
+    versoes = models.ItensCatalogoVersoesModel
+
+    return db.execute(
+        pg_insert(versoes).values(tabela=tabela, versao=1)
+        .on_conflict_do_update(index_elements=[versoes.tabela], set_={"versao": versoes.versao + 1, "atualizadoEm": func.now()})
+        .returning(versoes.versao)
+    ).scalar_one()
+
+
+def get_versao(db: Session, tabela: str) -> int:
+    # Tabelas ainda sem escritas registradas estão na versão 0
+
+    return db.scalar(select(models.ItensCatalogoVersoesModel.versao).filter(models.ItensCatalogoVersoesModel.tabela==tabela)) or 0
+
+
+class ItensCatalogoCache:
+
+    '''
+        Cache em memória do processo para as tabelas do catálogo (categorias, subcategorias, marcas e unidades).
+
+        - Cada tabela é carregada inteira na primeira consulta e recarregada após ttl segundos
+        - As escritas (commit) incrementam a versão da tabela em ITENS_CATALOGO_VERSOES na mesma transação
+          e atualizam o cache do processo (write-through)
+        - As versões do banco são comparadas no máximo a cada 'verificacao' segundos: tabelas alteradas por outros
+          workers são descartadas e recarregadas, e até lá podem ser respondidas com o registro anterior
+        - Ids ausentes do cache são buscados no banco (miss)
+        - Escritas fora da aplicação (SQL direto) devem incrementar a versão da tabela, ou aparecem apenas após o ttl
+        - Contadores de hits, misses, carregamentos e descartes (ttl e versão) em /metricas
+    '''
+
+    def __init__(self, metrics: MetricsRegistry, habilitado: bool = True, ttl: float = 300, verificacao: float = 1) -> None:
+        self.habilitado: bool = habilitado
+        self.ttl: float = ttl
+        self.verificacao: float = verificacao
+
+        self._snapshots: Dict[str, CatalogoSnapshot] = {}
+        self._lock: Lock = Lock()
+        self._verificacao_lock: Lock = Lock()
+        self._verificado_em: float = monotonic()
+
+        self.hits = metrics.counter("itens_catalogo_cache_hits_total", "Consultas por id atendidas pelo cache do catálogo")
+        self.misses = metrics.counter("itens_catalogo_cache_misses_total", "Consultas por id ausentes do cache do catálogo")
+        self.carregamentos = metrics.counter("itens_catalogo_cache_carregamentos_total", "Tabelas do catálogo carregadas do banco")
+        self.descartes_ttl = metrics.counter("itens_catalogo_cache_descartes_ttl_total", "Tabelas do catálogo descartadas por ttl")
+        self.descartes_versao = metrics.counter("itens_catalogo_cache_descartes_versao_total", "Tabelas do catálogo descartadas por alteração de versão")
+        metrics.gauge("itens_catalogo_cache_registros", "Registros do catálogo em memória", lambda: sum(len(snapshot.registros) for snapshot in self._snapshots.values()))
+
+
+    def get(self, db: Session, model: type, registro_id: int) -> RegistroCatalogo | None:
+
+        if not self.habilitado:
+            return get_loader(db).get(model, registro_id)
+
+        snapshot = self.snapshot(db=db, model=model)
+        registro = snapshot.registros.get(registro_id)
+
+        if registro is not None:
+            self.hits.inc()
+            return registro
+
+        # Registro criado após o carregamento (ex.: por outro worker, antes da verificação de versões)
+        self.misses.inc()
+        instancia = get_loader(db).get(model, registro_id)
+
+        if instancia is None:
+            return None
+
+        registro = RegistroCatalogo.from_model(instancia)
+        self.store(tabela=model.__tablename__, registro=registro, snapshot=snapshot)
+
+        return registro
+
+
+    def registros(self, db: Session, model: type) -> Dict[int, RegistroCatalogo]:
+        # Todos os registros da tabela (inclusive os deletados); com o cache desabilitado, lidos do banco
+
+        if not self.habilitado:
+            return {instancia.id: RegistroCatalogo.from_model(instancia) for instancia in db.scalars(select(model))}
+
+        return self.snapshot(db=db, model=model).registros
+
+
+    def snapshot(self, db: Session, model: type) -> CatalogoSnapshot:
+
+        self.sync(db=db)
+
+        tabela = model.__tablename__
+        snapshot = self._snapshots.get(tabela)
+
+        if snapshot is not None and monotonic() - snapshot.carregado_em > self.ttl:
+            self.discard(tabela=tabela, snapshot=snapshot, contador=self.descartes_ttl)
+            snapshot = None
+
+        if snapshot is None:
+            snapshot = self.load(db=db, model=model)
+
+        return snapshot
+
+
+    def load(self, db: Session, model: type) -> CatalogoSnapshot:
+        # A versão é lida antes dos registros: uma escrita concorrente resulta no máximo em um recarregamento extra
+
+        tabela = model.__tablename__
+        versao = get_versao(db=db, tabela=tabela)
+        registros = {instancia.id: RegistroCatalogo.from_model(instancia) for instancia in db.scalars(select(model))}
+
+        snapshot = CatalogoSnapshot(versao=versao, registros=registros, carregado_em=monotonic())
+        self.carregamentos.inc()
+
+        with self._lock:
+            atual = self._snapshots.get(tabela)
+
+            # Não substitui um snapshot mais recente (ex.: carregado de uma réplica atrasada)
+            if atual is not None and atual.versao > versao:
+                return atual
+
+            self._snapshots[tabela] = snapshot
+
+        return snapshot
+
+
+    def sync(self, db: Session) -> None:
+        # Descarta as tabelas cuja versão no banco é maior que a do cache; uma única requisição verifica por vez
+
+        if monotonic() - self._verificado_em < self.verificacao or not self._verificacao_lock.acquire(blocking=False):
+            return
+
+        try:
+            self._verificado_em = monotonic()
+            versoes = dict(db.execute(select(models.ItensCatalogoVersoesModel.tabela, models.ItensCatalogoVersoesModel.versao)).all())
+
+            for tabela, snapshot in list(self._snapshots.items()):
+                if versoes.get(tabela, 0) > snapshot.versao:
+                    self.discard(tabela=tabela, snapshot=snapshot, contador=self.descartes_versao)
+        finally:
+            self._verificacao_lock.release()
+
+
+    def discard(self, tabela: str, snapshot: CatalogoSnapshot, contador) -> None:
+
+        with self._lock:
+            if self._snapshots.get(tabela) is snapshot:
+                del self._snapshots[tabela]
+                contador.inc()
+
+
+    def store(self, tabela: str, registro: RegistroCatalogo, snapshot: CatalogoSnapshot, versao: int | None = None) -> None:
+        # Copy-on-write: as requisições em andamento continuam lendo o dicionário anterior
+
+        with self._lock:
+            if self._snapshots.get(tabela) is not snapshot:
+                return
+
+            registros = dict(snapshot.registros)
+            registros[registro.id] = registro
+            self._snapshots[tabela] = CatalogoSnapshot(versao=snapshot.versao if versao is None else versao, registros=registros, carregado_em=snapshot.carregado_em)
+
+
+    def commit(self, db: Session, instancia: Base) -> None:
+        # Grava a escrita do catálogo com a nova versão da tabela e atualiza o cache do processo
+
+        tabela = instancia.__tablename__
+
+        db.add(instancia)
+        versao = increment_versao(db=db, tabela=tabela)
+        db.commit()
+        db.refresh(instancia)
+
+        snapshot = self._snapshots.get(tabela)
+
+        if snapshot is None:
+            return
+
+        # Outra escrita (deste ou de outro worker) ainda não refletida no cache: a tabela é recarregada
+        if versao != snapshot.versao + 1:
+            self.discard(tabela=tabela, snapshot=snapshot, contador=self.descartes_versao)
+            return
+
+        self.store(tabela=tabela, registro=RegistroCatalogo.from_model(instancia), snapshot=snapshot, versao=versao)
+
+
+    def clear(self) -> None:
+
+        with self._lock:
+            self._snapshots.clear()
+
+
+catalogo_cache = ItensCatalogoCache(
+    metrics=get_metrics(),
+    habilitado=get_settings().catalogo_cache,
+    ttl=get_settings().catalogo_cache_ttl_segundos,
+    verificacao=get_settings().catalogo_cache_verificacao_segundos
+)
+
+def get_catalogo_cache() -> ItensCatalogoCache:
+    return catalogo_cache
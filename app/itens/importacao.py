@@ -0,0 +1,193 @@
+import argparse
+import codecs
+import csv
+import io
+import json
+import sys
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List
+from sqlalchemy import BigInteger, Column, Integer, MetaData, Table, Text
+from sqlalchemy.orm import Session
+from .catalogo import RegistroCatalogo
+
+
+FORMATOS = ("csv", "jsonl")
+
+# Tabela temporária da importação (pg_temp da conexão), removida no commit ou rollback da transação
+ITENS_IMPORTACAO = Table(
+    "itens_importacao", MetaData(),
+    Column("linha", Integer),
+    Column("nome", Text),
+    Column("descricao", Text),
+    Column("categoriaID", BigInteger),
+    Column("subcategoriaID", BigInteger),
+    Column("marcaID", BigInteger),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP"
+)
+
+
+class LinhaInvalida(Exception):
+    '''
+        Linha rejeitada pela importação: registrada nos erros, sem interromper o lote
+    '''
+
+
+def normalizar_nome(nome) -> str:
+    return " ".join(str(nome).split()).casefold()
+
+
+class CatalogoIndice:
+
+    '''
+        Ids e nomes (normalizados) dos registros não deletados de uma tabela do catálogo, para resolver
+        em memória as referências das linhas importadas. Nomes repetidos no mesmo escopo são ambíguos.
+    '''
+
+    def __init__(self, rotulo: str, campo_id: str, campo_nome: str, registros: Iterable[RegistroCatalogo], escopo: Callable[[RegistroCatalogo], int] | None = None) -> None:
+        self.rotulo: str = rotulo
+        self.campo_id: str = campo_id
+        self.campo_nome: str = campo_nome
+
+        self.ids: set[int] = set()
+        self.nomes: Dict[tuple, int | None] = {}
+
+        for registro in registros:
+            if registro.deleted or registro.nome is None:
+                continue
+
+            self.ids.add(registro.id)
+            chave = (escopo(registro) if escopo else None, normalizar_nome(registro.nome))
+            # None: nome ambíguo, deve ser informado o id
+            self.nomes[chave] = None if chave in self.nomes else registro.id
+
+
+    def resolve(self, linha: dict, escopo: int | None = None) -> int:
+
+        registro_id = linha.get(self.campo_id)
+        nome = linha.get(self.campo_nome)
+
+        if registro_id is not None:
+            try:
+                registro_id = int(registro_id)
+            except (TypeError, ValueError):
+                raise LinhaInvalida(f"{self.campo_id} '{registro_id}' inválido")
+
+            if registro_id not in self.ids:
+                raise LinhaInvalida(f"{self.rotulo} {registro_id} não existe")
+
+            return registro_id
+
+        if nome is None:
+            raise LinhaInvalida(f"Informe {self.campo_id} ou {self.campo_nome}")
+
+        chave = (escopo, normalizar_nome(nome))
+
+        if chave not in self.nomes:
+            raise LinhaInvalida(f"{self.rotulo} '{nome}' não existe")
+
+        if self.nomes[chave] is None:
+            raise LinhaInvalida(f"{self.rotulo} '{nome}' ambígua, informe {self.campo_id}")
+
+        return self.nomes[chave]
+
+
+def decodificar_linhas(arquivo: BinaryIO) -> Iterator[str]:
+    # Sem io.TextIOWrapper: o arquivo do UploadFile (SpooledTemporaryFile) não implementa readable() no Python 3.10,
+    # e o wrapper fecharia o arquivo da requisição ao ser descartado. As linhas mantêm o fim de linha (csv)
+
+    decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+
+    for linha in arquivo:
+        yield decodificador.decode(linha)
+
+    restante = decodificador.decode(b"", final=True)
+
+    if restante:
+        yield restante
+
+
+def ler_linhas(arquivo: BinaryIO, formato: str, delimitador: str = ",") -> Iterator[tuple[int, dict | None, str | None]]:
+    '''
+        Lê o arquivo linha a linha (UTF-8), retornando (número da linha, campos, erro). Campos vazios são None.
+        Erros do arquivo inteiro (cabeçalho, codificação) interrompem a leitura com ValueError.
+    '''
+
+    texto = decodificar_linhas(arquivo)
+
+    if formato == "csv":
+        leitor = csv.DictReader(texto, delimiter=delimitador)
+
+        if leitor.fieldnames is None or "nome" not in leitor.fieldnames:
+            raise ValueError("cabeçalho do CSV deve conter a coluna nome")
+
+        for campos in leitor:
+            yield leitor.line_num, {chave: (valor.strip() or None) if isinstance(valor, str) else valor for chave, valor in campos.items() if chave}, None
+
+        return
+
+    for numero, conteudo in enumerate(texto, start=1):
+
+        if not conteudo.strip():
+            continue
+
+        try:
+            campos = json.loads(conteudo)
+        except json.JSONDecodeError as erro:
+            yield numero, None, f"JSON inválido: {erro.msg}"
+            continue
+
+        if not isinstance(campos, dict):
+            yield numero, None, "Linha deve conter um objeto JSON"
+            continue
+
+        yield numero, {chave: (valor.strip() or None) if isinstance(valor, str) else valor for chave, valor in campos.items()}, None
+
+
+def copy_registros(db: Session, registros: List[tuple]) -> None:
+    # COPY na conexão (e transação) da sessão, pelo driver psycopg2
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(registros)
+    buffer.seek(0)
+
+    colunas = ", ".join(f'"{coluna.name}"' for coluna in ITENS_IMPORTACAO.columns)
+
+    with db.connection().connection.driver_connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY {ITENS_IMPORTACAO.name} ({colunas}) FROM STDIN WITH (FORMAT csv, FORCE_NOT_NULL (descricao))', buffer)
+
+
+def main() -> int:
+    # Importação pela linha de comando, com as variáveis de banco da aplicação (ex.: make importar-itens)
+
+    from fastapi import HTTPException
+    from database.instance import SessionLocal
+    from .catalogo import get_catalogo_cache
+    from .logic import ItensImportacaoLogic
+
+    parser = argparse.ArgumentParser(description="Importa Itens em lote de um arquivo CSV ou JSONL")
+    parser.add_argument("arquivo", help="caminho do arquivo, ou - para a entrada padrão")
+    parser.add_argument("--formato", choices=FORMATOS, help="padrão: pela extensão do arquivo")
+    parser.add_argument("--delimitador", default=",", help="delimitador do CSV (padrão: ,)")
+    args = parser.parse_args()
+
+    formato = args.formato or ("jsonl" if args.arquivo.endswith((".jsonl", ".ndjson")) else "csv")
+
+    db = SessionLocal()
+    try:
+        arquivo = sys.stdin.buffer if args.arquivo == "-" else open(args.arquivo, "rb")
+
+        with arquivo:
+            resultado = ItensImportacaoLogic(db=db, catalogo=get_catalogo_cache()).import_itens(arquivo=arquivo, formato=formato, delimitador=args.delimitador)
+    except HTTPException as erro:
+        print(erro.detail, file=sys.stderr)
+        return 2
+    finally:
+        db.close()
+
+    print(resultado.model_dump_json(indent=2))
+
+    return 1 if resultado.rejeitados else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
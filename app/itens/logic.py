@@ -1,40 +1,83 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import Double, Row, Select, and_, cast, exists, func, insert, literal, or_, select, text, tuple_, update
 from fastapi import Depends, HTTPException
-from database.instance import get_db
-from typing import List
+from database.instance import Base, get_db
+from database.loader import get_loader
+from typing import BinaryIO, Dict, List
 from utils.http_exceptions import NoContentException, ResourceNotFoundException, ResourceExpectationFailedException
+from utils.http_cache import weak_etag
+from .catalogo import ItensCatalogoCache, RegistroCatalogo, get_catalogo_cache, get_versao, increment_versao
+from .importacao import FORMATOS, ITENS_IMPORTACAO, CatalogoIndice, LinhaInvalida, copy_registros, ler_linhas
 from . import models, schemas
 
+
+# Paginação por cursor (keyset) das listagens de Itens, Categorias, Subcategorias e Marcas
+CATALOGO_PAGINA_LIMITE_PADRAO = 100
+CATALOGO_PAGINA_LIMITE_MAXIMO = 1000
+
+
+def get_pagina(db: Session, model: type, after_id: int | None = None, limit: int | None = None, filtros: List | None = None) -> tuple[List[Base], bool] | HTTPException:
+    # Registros não deletados com id maior que after_id (ordenados por id) e se há mais registros após a página
+
+    limit = min(limit or CATALOGO_PAGINA_LIMITE_PADRAO, CATALOGO_PAGINA_LIMITE_MAXIMO)
+
+    registros: List[Base] = db.scalars(
+        select(model).filter(
+            model.id > (after_id or 0),
+            model.deleted==False,
+            *(filtros or [])
+        ).order_by(model.id).limit(limit + 1)
+    ).all()
+
+    if registros == []:
+        raise NoContentException()
+
+    return registros[:limit], len(registros) > limit
+
+
 class ItensCategoriaLogic:
     '''
         Realiza ações que tem como contexto a tabela ITENS_CATEGORIAS
     '''
 
-    def __init__(self, db: Session = Depends(get_db)) -> None:
+    def __init__(self, 
+                 db: Session = Depends(get_db),
+                 catalogo: ItensCatalogoCache = Depends(get_catalogo_cache)
+            ) -> None:
+        
         self.db: Session = db
+        self.catalogo: ItensCatalogoCache = catalogo
 
 
-    def get_categoria_by_id(self, categoria_id: int) -> models.ItensCategoriasModel | HTTPException:
+    def get_categoria_model_by_id(self, categoria_id: int) -> models.ItensCategoriasModel | HTTPException:
+        # Registro da sessão, para as alterações: get_categoria_by_id retorna a cópia do cache do catálogo
 
-        categoria: models.ItensCategoriasModel = self.db.query(models.ItensCategoriasModel).filter(
-            models.ItensCategoriasModel.id == categoria_id
-        ).first()
+        categoria: models.ItensCategoriasModel = get_loader(self.db).get(models.ItensCategoriasModel, categoria_id)
+
+        if categoria is None:
+            raise ResourceNotFoundException()
+
+        return categoria
+
+    def get_categoria_by_id(self, categoria_id: int) -> RegistroCatalogo | HTTPException:
+
+        categoria: RegistroCatalogo = self.catalogo.get(db=self.db, model=models.ItensCategoriasModel, registro_id=categoria_id)
 
         if categoria is None:
             raise ResourceNotFoundException()
         
         return categoria
 
-    def get_all_categorias(self) -> List[models.ItensCategoriasModel] | HTTPException:
+    def get_categorias_etag(self) -> str:
+        # Versão da tabela (ITENS_CATALOGO_VERSOES), lida na mesma sessão da listagem
 
-        categorias: List[models.ItensCategoriasModel] = self.db.query(models.ItensCategoriasModel).filter(
-            models.ItensCategoriasModel.deleted==False
-        ).order_by(models.ItensCategoriasModel.id).all()
+        tabela = models.ItensCategoriasModel.__tablename__
 
-        if categorias == []:
-            raise NoContentException()
+        return weak_etag(tabela.lower(), get_versao(db=self.db, tabela=tabela))
+
+    def get_categorias_page(self, after_id: int | None = None, limit: int | None = None) -> tuple[List[models.ItensCategoriasModel], bool] | HTTPException:
 
-        return categorias
+        return get_pagina(db=self.db, model=models.ItensCategoriasModel, after_id=after_id, limit=limit)
     
     def create_categoria(self, body: schemas.ItensCategoriasBodySchema) -> models.ItensCategoriasModel:
 
@@ -42,36 +85,30 @@ class ItensCategoriaLogic:
             nome=body.nome
         )
 
-        self.db.add(new_categoria)
-        self.db.commit()
-        self.db.refresh(new_categoria)
+        self.catalogo.commit(db=self.db, instancia=new_categoria)
 
         return new_categoria
 
     def update_categoria(self, categoria_id: int, body: schemas.ItensCategoriasBodySchema) -> models.ItensCategoriasModel:
 
-        categoria: models.ItensCategoriasModel = self.get_categoria_by_id(categoria_id=categoria_id)
+        categoria: models.ItensCategoriasModel = self.get_categoria_model_by_id(categoria_id=categoria_id)
 
         categoria.nome = body.nome
         
-        self.db.add(categoria)
-        self.db.commit()
-        self.db.refresh(categoria)
+        self.catalogo.commit(db=self.db, instancia=categoria)
 
         return categoria
 
     def delete_categoria(self, categoria_id: int) -> models.ItensCategoriasModel | HTTPException:
 
-        categoria: models.ItensCategoriasModel = self.get_categoria_by_id(categoria_id=categoria_id)
+        categoria: models.ItensCategoriasModel = self.get_categoria_model_by_id(categoria_id=categoria_id)
 
         if categoria.deleted:
             return categoria
 
         categoria.deleted = True
 
-        self.db.add(categoria)
-        self.db.commit()
-        self.db.refresh(categoria)
+        self.catalogo.commit(db=self.db, instancia=categoria)
         
         return categoria
     
@@ -83,18 +120,28 @@ class ItensSubCategoriaLogic:
 
     def __init__(self, 
                  db: Session = Depends(get_db),
-                 categoria_logic: ItensCategoriaLogic = Depends(ItensCategoriaLogic)
+                 categoria_logic: ItensCategoriaLogic = Depends(ItensCategoriaLogic),
+                 catalogo: ItensCatalogoCache = Depends(get_catalogo_cache)
             ) -> None:
         
         self.db: Session = db
         self.categoria_logic = categoria_logic
+        self.catalogo: ItensCatalogoCache = catalogo
+
+
+    def get_sub_categoria_model_by_id(self, subcategoria_id: int) -> models.ItensSubCategoriasModel | HTTPException:
+        # Registro da sessão, para as alterações: get_sub_categoria_by_id retorna a cópia do cache do catálogo
 
+        subcategoria: models.ItensSubCategoriasModel = get_loader(self.db).get(models.ItensSubCategoriasModel, subcategoria_id)
 
-    def get_sub_categoria_by_id(self, subcategoria_id: int) -> models.ItensSubCategoriasModel | HTTPException:
+        if subcategoria is None:
+            raise ResourceNotFoundException()
+
+        return subcategoria
+
+    def get_sub_categoria_by_id(self, subcategoria_id: int) -> RegistroCatalogo | HTTPException:
 
-        subcategoria: models.ItensSubCategoriasModel = self.db.query(models.ItensSubCategoriasModel).filter(
-            models.ItensSubCategoriasModel.id == subcategoria_id
-        ).first()
+        subcategoria: RegistroCatalogo = self.catalogo.get(db=self.db, model=models.ItensSubCategoriasModel, registro_id=subcategoria_id)
 
         if subcategoria is None:
             raise ResourceNotFoundException()
@@ -102,16 +149,16 @@ class ItensSubCategoriaLogic:
         return subcategoria
 
 
-    def get_all_subcategorias(self) -> List[models.ItensSubCategoriasModel] | HTTPException:
+    def get_subcategorias_etag(self) -> str:
+        # Versão da tabela (ITENS_CATALOGO_VERSOES), lida na mesma sessão da listagem
 
-        subcategorias: List[models.ItensSubCategoriasModel] = self.db.query(models.ItensSubCategoriasModel).filter(
-            models.ItensSubCategoriasModel.deleted==False
-        ).order_by(models.ItensSubCategoriasModel.id).all()
+        tabela = models.ItensSubCategoriasModel.__tablename__
 
-        if subcategorias == []:
-            raise NoContentException()
+        return weak_etag(tabela.lower(), get_versao(db=self.db, tabela=tabela))
 
-        return subcategorias
+    def get_subcategorias_page(self, after_id: int | None = None, limit: int | None = None) -> tuple[List[models.ItensSubCategoriasModel], bool] | HTTPException:
+
+        return get_pagina(db=self.db, model=models.ItensSubCategoriasModel, after_id=after_id, limit=limit)
     
 
     def get_subcategorias_by_categoria(self, categoria_id: int) -> List[models.ItensSubCategoriasModel] | HTTPException:
@@ -139,9 +186,7 @@ class ItensSubCategoriaLogic:
             nome=body.nome
         )
 
-        self.db.add(new_subcategoria)
-        self.db.commit()
-        self.db.refresh(new_subcategoria)
+        self.catalogo.commit(db=self.db, instancia=new_subcategoria)
 
         return new_subcategoria
     
@@ -149,30 +194,26 @@ class ItensSubCategoriaLogic:
     def update_subcategoria(self, subcategoria_id: int, body: schemas.ItensSubCategoriasBodySchema) -> models.ItensSubCategoriasModel | HTTPException:
 
         categoria: models.ItensCategoriasModel = self.categoria_logic.get_categoria_by_id(categoria_id=body.categoriaID)
-        subcategoria: models.ItensSubCategoriasModel = self.get_sub_categoria_by_id(subcategoria_id=subcategoria_id)
+        subcategoria: models.ItensSubCategoriasModel = self.get_sub_categoria_model_by_id(subcategoria_id=subcategoria_id)
 
         subcategoria.nome = body.nome
         subcategoria.categoriaID = categoria.id
 
-        self.db.add(subcategoria)
-        self.db.commit()
-        self.db.refresh(subcategoria)
+        self.catalogo.commit(db=self.db, instancia=subcategoria)
 
         return subcategoria
     
 
     def delete_subcategoria(self, subcategoria_id: int) -> models.ItensSubCategoriasModel | HTTPException:
 
-        subcategoria: models.ItensSubCategoriasModel = self.get_sub_categoria_by_id(subcategoria_id=subcategoria_id)
+        subcategoria: models.ItensSubCategoriasModel = self.get_sub_categoria_model_by_id(subcategoria_id=subcategoria_id)
 
         if subcategoria.deleted:
             return subcategoria
         
         subcategoria.deleted = True
 
-        self.db.add(subcategoria)
-        self.db.commit()
-        self.db.refresh(subcategoria)
+        self.catalogo.commit(db=self.db, instancia=subcategoria)
 
         return subcategoria
 
@@ -185,90 +226,114 @@ class ItensMarcasLogic:
     def __init__(self, 
                  db: Session = Depends(get_db),
                  categoria_logic: ItensCategoriaLogic = Depends(ItensCategoriaLogic),
-                 subcategoria_logic: ItensSubCategoriaLogic = Depends(ItensSubCategoriaLogic)
+                 subcategoria_logic: ItensSubCategoriaLogic = Depends(ItensSubCategoriaLogic),
+                 catalogo: ItensCatalogoCache = Depends(get_catalogo_cache)
             ) -> None:
         
         self.db: Session = db
         self.categoria_logic = categoria_logic
         self.subcategoria_logic = subcategoria_logic
+        self.catalogo: ItensCatalogoCache = catalogo
 
 
-    def get_marca_by_id(self, marca_id: int) -> models.ItensMarcasModel | HTTPException:
+    def get_marca_model_by_id(self, marca_id: int) -> models.ItensMarcasModel | HTTPException:
+        # Registro da sessão, para as alterações: get_marca_by_id retorna a cópia do cache do catálogo
 
-        marca: models.ItensMarcasModel = self.db.query(models.ItensMarcasModel).filter(
-            models.ItensMarcasModel.id == marca_id
-        ).first()
+        marca: models.ItensMarcasModel = get_loader(self.db).get(models.ItensMarcasModel, marca_id)
+
+        if marca is None:
+            raise ResourceNotFoundException()
+
+        return marca
+
+    def get_marca_by_id(self, marca_id: int) -> RegistroCatalogo | HTTPException:
+
+        marca: RegistroCatalogo = self.catalogo.get(db=self.db, model=models.ItensMarcasModel, registro_id=marca_id)
 
         if marca is None:
             raise ResourceNotFoundException()
 
         return marca
     
-    def get_all_marcas(self) -> List[models.ItensMarcasModel] | HTTPException:
+    def get_marcas_etag(self) -> str:
+        # Versão da tabela (ITENS_CATALOGO_VERSOES), lida na mesma sessão da listagem
 
-        marcas: List[models.ItensMarcasModel] = self.db.query(models.ItensMarcasModel).filter(
-            models.ItensMarcasModel.deleted==False
-        ).order_by(models.ItensMarcasModel.id).all()
+        tabela = models.ItensMarcasModel.__tablename__
 
-        if marcas == []:
-            raise NoContentException()
+        return weak_etag(tabela.lower(), get_versao(db=self.db, tabela=tabela))
+
+    def get_marcas_page(self, after_id: int | None = None, limit: int | None = None) -> tuple[List[models.ItensMarcasModel], bool] | HTTPException:
 
-        return marcas
+        return get_pagina(db=self.db, model=models.ItensMarcasModel, after_id=after_id, limit=limit)
     
     def create_marca(self, body: schemas.ItensMarcasBodySchema) -> models.ItensMarcasModel:
 
         new_marca = models.ItensMarcasModel(nome=body.nome)
 
-        self.db.add(new_marca)
-        self.db.commit()
-        self.db.refresh(new_marca)
+        self.catalogo.commit(db=self.db, instancia=new_marca)
 
         return new_marca
     
     def update_marca(self, marca_id: int, body: schemas.ItensMarcasBodySchema) -> models.ItensMarcasModel:
 
-        marca: models.ItensMarcasModel = self.get_marca_by_id(marca_id=marca_id)
+        marca: models.ItensMarcasModel = self.get_marca_model_by_id(marca_id=marca_id)
 
         marca.nome = body.nome
 
-        self.db.add(marca)
-        self.db.commit()
-        self.db.refresh(marca)
+        self.catalogo.commit(db=self.db, instancia=marca)
 
         return marca    
     
     def delete_marca(self, marca_id: int) -> models.ItensMarcasModel | HTTPException:
         
-        marca: models.ItensMarcasModel = self.get_marca_by_id(marca_id=marca_id)
+        marca: models.ItensMarcasModel = self.get_marca_model_by_id(marca_id=marca_id)
 
         if marca.deleted:
             return marca
         
         marca.deleted = True
 
-        self.db.add(marca)
-        self.db.commit()
-        self.db.refresh(marca)
+        self.catalogo.commit(db=self.db, instancia=marca)
 
         return marca
 
 
 class ItensUnidadesLogic: 
 
-    def __init__(self, db: Session = Depends(get_db)) -> None:
+    def __init__(self, 
+                 db: Session = Depends(get_db),
+                 catalogo: ItensCatalogoCache = Depends(get_catalogo_cache)
+            ) -> None:
+        
         self.db: Session = db
+        self.catalogo: ItensCatalogoCache = catalogo
+
+    def get_unidade_model_by_id(self, unidade_id: int) -> models.ItensUnidadesModel | HTTPException:
+        # Registro da sessão, para as alterações: get_unidade_by_id retorna a cópia do cache do catálogo
+
+        unidade: models.ItensUnidadesModel = get_loader(self.db).get(models.ItensUnidadesModel, unidade_id)
+
+        if unidade is None:
+            raise ResourceNotFoundException()
 
-    def get_unidade_by_id(self, unidade_id: int) -> models.ItensUnidadesModel | HTTPException:
+        return unidade
+
+    def get_unidade_by_id(self, unidade_id: int) -> RegistroCatalogo | HTTPException:
         
-        unidade = self.db.query(models.ItensUnidadesModel).filter(
-            models.ItensUnidadesModel.id==unidade_id
-        ).first()
+        unidade: RegistroCatalogo = self.catalogo.get(db=self.db, model=models.ItensUnidadesModel, registro_id=unidade_id)
 
         if unidade == None:
             raise ResourceNotFoundException()
 
         return unidade
     
+    def get_unidades_etag(self) -> str:
+        # Versão da tabela (ITENS_CATALOGO_VERSOES), lida na mesma sessão da listagem
+
+        tabela = models.ItensUnidadesModel.__tablename__
+
+        return weak_etag(tabela.lower(), get_versao(db=self.db, tabela=tabela))
+
     def get_all_unidades(self) -> List[models.ItensUnidadesModel] | HTTPException:
 
         unidades = self.db.query(models.ItensUnidadesModel).filter(
@@ -290,9 +355,7 @@ class ItensUnidadesLogic:
             descricao=body.descricao
         )
 
-        self.db.add(new_unidade)
-        self.db.commit()
-        self.db.refresh(new_unidade)
+        self.catalogo.commit(db=self.db, instancia=new_unidade)
 
         return new_unidade
     
@@ -301,29 +364,25 @@ class ItensUnidadesLogic:
         if len(body.unidade) > 3:
             raise ResourceExpectationFailedException()
         
-        unidade: models.ItensUnidadesModel = self.get_unidade_by_id(unidade_id=unidade_id)
+        unidade: models.ItensUnidadesModel = self.get_unidade_model_by_id(unidade_id=unidade_id)
 
         unidade.unidade = body.unidade
         unidade.descricao = body.descricao
 
-        self.db.add(unidade)
-        self.db.commit()
-        self.db.refresh(unidade)
+        self.catalogo.commit(db=self.db, instancia=unidade)
 
         return unidade    
 
     def delete_unidade(self, unidade_id: int) -> models.ItensUnidadesModel | HTTPException:
 
-        unidade: models.ItensUnidadesModel = self.get_unidade_by_id(unidade_id=unidade_id)
+        unidade: models.ItensUnidadesModel = self.get_unidade_model_by_id(unidade_id=unidade_id)
 
         if unidade.deleted:
             return unidade
         
         unidade.deleted = True
 
-        self.db.add(unidade)
-        self.db.commit()
-        self.db.refresh(unidade)
+        self.catalogo.commit(db=self.db, instancia=unidade)
 
         return unidade
 
@@ -333,6 +392,9 @@ class ItensLogic:
         Realiza ações que tem como contexto a tabela ITENS
     '''
 
+    BUSCA_LIMITE_PADRAO = 20
+    BUSCA_LIMITE_MAXIMO = 100
+
     def __init__(self, 
                  db: Session = Depends(get_db),
                  categorias_logic: ItensCategoriaLogic = Depends(ItensCategoriaLogic),
@@ -346,25 +408,106 @@ class ItensLogic:
 
     def get_item_by_id(self, item_id: int) -> models.ItensModel | HTTPException:
 
-        item: models.ItensModel = self.db.query(models.ItensModel).filter(
-            models.ItensModel.id == item_id
-        ).first()
+        item: models.ItensModel = get_loader(self.db).get(models.ItensModel, item_id)
 
         if item is None:
             raise ResourceNotFoundException()
         
         return item
     
-    def get_all_itens(self) -> List[models.ItensModel] | HTTPException:
+    @staticmethod
+    def busca_statement(q: str, categoria_id: int | None, subcategoria_id: int | None, marca_id: int | None, posicao: tuple[float, int] | None, limit: int) -> Select:
+        # Texto completo (@@) ou trigramas no nome (%) e na descrição (<%), atendidos pelos índices GIN;
+        # ordenação por relevância com paginação por cursor (relevância, id)
 
-        itens: List[models.ItensModel] = self.db.query(models.ItensModel).filter(
+        consulta = func.websearch_to_tsquery(models.ITENS_BUSCA_CONFIGURACAO, q)
+
+        relevancia = cast(
+            func.ts_rank(models.ITENS_BUSCA_DOCUMENTO, consulta) + func.coalesce(func.greatest(func.similarity(models.ItensModel.nome, q), func.word_similarity(q, models.ItensModel.descricao)), 0),
+            Double
+        )
+
+        statement = select(models.ItensModel, relevancia.label("relevancia")).filter(
+            or_(
+                models.ITENS_BUSCA_DOCUMENTO.op("@@")(consulta),
+                models.ItensModel.nome.op("%")(q),
+                literal(q).op("<%")(models.ItensModel.descricao)
+            ),
             models.ItensModel.deleted==False
-        ).order_by(models.ItensModel.id).all()
+        )
 
-        if itens == []:
+        if categoria_id is not None:
+            statement = statement.filter(models.ItensModel.categoriaID==categoria_id)
+
+        if subcategoria_id is not None:
+            statement = statement.filter(models.ItensModel.subcategoriaID==subcategoria_id)
+
+        if marca_id is not None:
+            statement = statement.filter(models.ItensModel.marcaID==marca_id)
+
+        if posicao is not None:
+            statement = statement.filter(tuple_(relevancia, models.ItensModel.id) < tuple_(*posicao))
+
+        return statement.order_by(relevancia.desc(), models.ItensModel.id.desc()).limit(limit)
+
+
+    @staticmethod
+    def busca_cursor(resultado: Row) -> str:
+        # repr preserva o valor exato da relevância, comparado novamente na página seguinte
+
+        item, relevancia = resultado
+        return f"{relevancia!r}:{item.id}"
+
+
+    def search_itens(self, q: str, categoria_id: int | None = None, subcategoria_id: int | None = None, marca_id: int | None = None, cursor: str | None = None, limit: int | None = None) -> tuple[List[Row], bool] | HTTPException:
+
+        posicao = None
+
+        if cursor:
+            try:
+                relevancia, item_id = cursor.split(":")
+                posicao = (float(relevancia), int(item_id))
+            except ValueError:
+                raise ResourceExpectationFailedException(detail=f"Cursor de busca inválido: {cursor}")
+
+        limit = min(limit or self.BUSCA_LIMITE_PADRAO, self.BUSCA_LIMITE_MAXIMO)
+
+        resultados: List[Row] = self.db.execute(self.busca_statement(
+            q=q,
+            categoria_id=categoria_id,
+            subcategoria_id=subcategoria_id,
+            marca_id=marca_id,
+            posicao=posicao,
+            limit=limit + 1
+        )).all()
+
+        if resultados == []:
             raise NoContentException()
-        
-        return itens
+
+        return resultados[:limit], len(resultados) > limit
+
+    def get_itens_etag(self) -> str:
+        # Versão da tabela (ITENS_CATALOGO_VERSOES), lida na mesma sessão da listagem
+
+        tabela = models.ItensModel.__tablename__
+
+        return weak_etag(tabela.lower(), get_versao(db=self.db, tabela=tabela))
+
+    def get_itens_page(self, after_id: int | None = None, limit: int | None = None, categoria_id: int | None = None, subcategoria_id: int | None = None, marca_id: int | None = None) -> tuple[List[models.ItensModel], bool] | HTTPException:
+        # Cada filtro é atendido pelo índice (filtro, id): a página é lida em ordem de id a partir de after_id
+
+        filtros = []
+
+        if categoria_id is not None:
+            filtros.append(models.ItensModel.categoriaID==categoria_id)
+
+        if subcategoria_id is not None:
+            filtros.append(models.ItensModel.subcategoriaID==subcategoria_id)
+
+        if marca_id is not None:
+            filtros.append(models.ItensModel.marcaID==marca_id)
+
+        return get_pagina(db=self.db, model=models.ItensModel, after_id=after_id, limit=limit, filtros=filtros)
     
     def create_item(self, body: schemas.ItensBodySchema) -> models.ItensModel | HTTPException:
 
@@ -381,6 +524,7 @@ class ItensLogic:
         )
 
         self.db.add(new_item)
+        increment_versao(db=self.db, tabela=models.ItensModel.__tablename__)
         self.db.commit()
         self.db.refresh(new_item)
 
@@ -402,6 +546,7 @@ class ItensLogic:
         item.marcaID = marca.id
  
         self.db.add(item)
+        increment_versao(db=self.db, tabela=models.ItensModel.__tablename__)
         self.db.commit()
         self.db.refresh(item)
 
@@ -417,7 +562,153 @@ class ItensLogic:
         item.deleted = True
 
         self.db.add(item)
+        increment_versao(db=self.db, tabela=models.ItensModel.__tablename__)
         self.db.commit()
         self.db.refresh(item)
 
-        return item
\ No newline at end of file
+        return item
+
+
+class ItensImportacaoLogic:
+    '''
+        Importação em lote de Itens a partir de CSV ou JSONL.
+
+        - Categoria, Subcategoria (no escopo da Categoria) e Marca são resolvidas por id ou nome em memória,
+          a partir do cache do catálogo
+        - As linhas válidas são carregadas com COPY, em lotes, em uma tabela temporária e mescladas em ITENS:
+          Itens não deletados com o mesmo nome e Marca são atualizados, os demais inseridos
+        - Linhas inválidas são rejeitadas individualmente, sem interromper a importação
+        - Uma única transação e um único incremento da versão de ITENS (ETag das listagens)
+    '''
+
+    IMPORTACAO_LOTE = 5000
+    IMPORTACAO_ERROS_LIMITE = 1000
+
+    def __init__(self,
+                 db: Session = Depends(get_db),
+                 catalogo: ItensCatalogoCache = Depends(get_catalogo_cache)
+            ) -> None:
+
+        self.db: Session = db
+        self.catalogo: ItensCatalogoCache = catalogo
+
+
+    def resolve_linha(self, numero: int, linha: dict, chaves: Dict[tuple, int], categorias: CatalogoIndice, subcategorias: CatalogoIndice, marcas: CatalogoIndice) -> tuple:
+        # Registro da tabela temporária (linha, nome, descricao, categoriaID, subcategoriaID, marcaID)
+
+        nome = linha.get("nome")
+
+        if nome is None:
+            raise LinhaInvalida("nome é obrigatório")
+
+        nome = str(nome)
+        descricao = linha.get("descricao")
+
+        categoria_id = categorias.resolve(linha=linha)
+        subcategoria_id = subcategorias.resolve(linha=linha, escopo=categoria_id)
+        marca_id = marcas.resolve(linha=linha)
+
+        # Mesma chave da mescla: a primeira ocorrência no arquivo é importada
+        anterior = chaves.setdefault((nome, marca_id), numero)
+
+        if anterior != numero:
+            raise LinhaInvalida(f"Item '{nome}' da Marca {marca_id} repetido no arquivo (linha {anterior})")
+
+        return numero, nome, "" if descricao is None else str(descricao), categoria_id, subcategoria_id, marca_id
+
+
+    def merge_itens(self) -> tuple[int, int]:
+        # Atualiza os Itens existentes (nome, marcaID) e insere os demais, a partir da tabela temporária
+
+        itens = models.ItensModel.__table__
+        importacao = ITENS_IMPORTACAO
+
+        mesmo_item = and_(
+            itens.c.nome==importacao.c.nome,
+            itens.c.marcaID==importacao.c.marcaID,
+            itens.c.deleted==False
+        )
+
+        atualizados = self.db.execute(
+            update(itens).where(mesmo_item).values(
+                descricao=importacao.c.descricao,
+                categoriaID=importacao.c.categoriaID,
+                subcategoriaID=importacao.c.subcategoriaID
+            )
+        ).rowcount
+
+        inseridos = self.db.execute(
+            insert(itens).from_select(
+                ["nome", "descricao", "categoriaID", "subcategoriaID", "marcaID"],
+                select(
+                    importacao.c.nome, importacao.c.descricao, importacao.c.categoriaID, importacao.c.subcategoriaID, importacao.c.marcaID
+                ).filter(~exists().where(mesmo_item)).order_by(importacao.c.linha)
+            )
+        ).rowcount
+
+        return inseridos, atualizados
+
+
+    def import_itens(self, arquivo: BinaryIO, formato: str, delimitador: str = ",") -> schemas.ItensImportacaoResponseSchema | HTTPException:
+
+        if formato not in FORMATOS:
+            raise ResourceExpectationFailedException(detail=f"Formato {formato} inválido, utilize {' ou '.join(FORMATOS)}")
+
+        categorias = CatalogoIndice("Categoria", "categoriaID", "categoria", self.catalogo.registros(db=self.db, model=models.ItensCategoriasModel).values())
+        subcategorias = CatalogoIndice("Subcategoria", "subcategoriaID", "subcategoria", self.catalogo.registros(db=self.db, model=models.ItensSubCategoriasModel).values(), escopo=lambda subcategoria: subcategoria.categoriaID)
+        marcas = CatalogoIndice("Marca", "marcaID", "marca", self.catalogo.registros(db=self.db, model=models.ItensMarcasModel).values())
+
+        ITENS_IMPORTACAO.create(bind=self.db.connection())
+
+        linhas = 0
+        rejeitados = 0
+        erros: List[schemas.ItensImportacaoErroSchema] = []
+        chaves: Dict[tuple, int] = {}
+        lote: List[tuple] = []
+
+        try:
+            for numero, linha, erro in ler_linhas(arquivo=arquivo, formato=formato, delimitador=delimitador):
+
+                linhas += 1
+
+                if erro is None:
+                    try:
+                        lote.append(self.resolve_linha(numero=numero, linha=linha, chaves=chaves, categorias=categorias, subcategorias=subcategorias, marcas=marcas))
+                    except LinhaInvalida as invalida:
+                        erro = str(invalida)
+
+                if erro is not None:
+                    rejeitados += 1
+
+                    if len(erros) < self.IMPORTACAO_ERROS_LIMITE:
+                        erros.append(schemas.ItensImportacaoErroSchema(linha=numero, detalhe=erro))
+
+                if len(lote) >= self.IMPORTACAO_LOTE:
+                    copy_registros(db=self.db, registros=lote)
+                    lote = []
+
+        except ValueError as erro:
+            # Cabeçalho ausente ou arquivo fora do UTF-8: nada é importado
+            raise ResourceExpectationFailedException(detail=f"Arquivo inválido: {erro}")
+
+        if lote:
+            copy_registros(db=self.db, registros=lote)
+
+        inseridos, atualizados = 0, 0
+
+        if linhas > rejeitados:
+            # Tabelas temporárias não são analisadas pelo autovacuum
+            self.db.execute(text(f"ANALYZE {ITENS_IMPORTACAO.name}"))
+
+            inseridos, atualizados = self.merge_itens()
+            increment_versao(db=self.db, tabela=models.ItensModel.__tablename__)
+
+        self.db.commit()
+
+        return schemas.ItensImportacaoResponseSchema(
+            linhas=linhas,
+            inseridos=inseridos,
+            atualizados=atualizados,
+            rejeitados=rejeitados,
+            erros=erros
+        )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, Double, Boolean, func
+from sqlalchemy import Column, BigInteger, String, DateTime, Double, Boolean, Index, func, text
 from database.instance import Base
 
 class ItensCategoriasModel(Base):
@@ -15,6 +15,9 @@ class ItensCategoriasModel(Base):
 class ItensSubCategoriasModel(Base):
 
     __tablename__ = "ITENS_SUBCATEGORIAS"
+    __table_args__ = (
+        Index("ix_itens_subcategorias_categoria", "categoriaID"),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     nome = Column(String)
@@ -50,6 +53,12 @@ class ItensUnidadesModel(Base):
 class ItensModel(Base):
 
     __tablename__ = "ITENS"
+    __table_args__ = (
+        # Listagem paginada por id com os filtros de categoria, subcategoria e marca
+        Index("ix_itens_categoria_id", "categoriaID", "id"),
+        Index("ix_itens_subcategoria_id", "subcategoriaID", "id"),
+        Index("ix_itens_marca_id", "marcaID", "id"),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     nome = Column(String)
@@ -62,3 +71,27 @@ class ItensModel(Base):
     deleted = Column(Boolean, default=False)
 
 
+# Documento da busca textual (configuração portuguese) sobre nome e descrição: a mesma expressão
+# é utilizada no índice e nas consultas, para que o índice seja escolhido pelo planejador
+ITENS_BUSCA_CONFIGURACAO = text("'portuguese'::regconfig")
+ITENS_BUSCA_DOCUMENTO = func.to_tsvector(
+    ITENS_BUSCA_CONFIGURACAO,
+    func.coalesce(ItensModel.nome, text("''")) + text("' '") + func.coalesce(ItensModel.descricao, text("''"))
+)
+
+# Busca de Itens: texto completo (@@)
+Index("ix_itens_busca_documento", ITENS_BUSCA_DOCUMENTO, postgresql_using="gin")
+
+# Índices de trigramas (%, <%) da busca: gin_trgm_ops requer a extensão pg_trgm, criada junto com eles apenas
+# pela migration 0005; fora do metadata, o create_all não depende da extensão
+ITENS_BUSCA_INDICES_TRIGRAMAS = ("ix_itens_nome_trgm", "ix_itens_descricao_trgm")
+
+
+class ItensCatalogoVersoesModel(Base):
+
+    # Versão de cada tabela do catálogo, incrementada a cada escrita: sincroniza os caches dos workers
+    __tablename__ = "ITENS_CATALOGO_VERSOES"
+
+    tabela = Column(String, primary_key=True)
+    versao = Column(BigInteger, nullable=False, default=0)
+    atualizadoEm = Column(DateTime, default=func.now(), onupdate=func.now())
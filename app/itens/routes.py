@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, Query, Request, Response, UploadFile
 from typing import List
+from dependences import provide
+from environment.variables import get_settings
+from utils.http_cache import conditional_get
 from . import logic
 from . import schemas
 
@@ -8,132 +11,189 @@ router = APIRouter(
     tags=["Itens"]
 )
 
+# Listagens do catálogo: ETag pela versão da tabela, 304 quando o cliente já possui a versão atual.
+# Itens, Categorias, Subcategorias e Marcas são paginados por cursor (after_id, limit): o próximo
+# cursor é retornado em X-Proximo-Cursor e X-Possui-Mais indica se há registros após a página
+CATALOGO_MAX_AGE = get_settings().catalogo_max_age_segundos
+
 @router.post("/categorias/nova", response_model=schemas.ItensCategoriasSchema)
-def create_categoria(body: schemas.ItensCategoriasBodySchema, logic: logic.ItensCategoriaLogic = Depends()):
+def create_categoria(body: schemas.ItensCategoriasBodySchema, logic: logic.ItensCategoriaLogic = Depends(provide(logic.ItensCategoriaLogic))):
     categoria = logic.create_categoria(body=body)
     return schemas.ItensCategoriasSchema.model_validate(categoria)
 
 @router.get("/categorias/{categoria_id}", response_model=schemas.ItensCategoriasSchema)
-def get_categoria_by_id(categoria_id: int, logic: logic.ItensCategoriaLogic = Depends()):
+def get_categoria_by_id(categoria_id: int, logic: logic.ItensCategoriaLogic = Depends(provide(logic.ItensCategoriaLogic, leitura=True))):
     item = logic.get_categoria_by_id(categoria_id=categoria_id)
     return schemas.ItensCategoriasSchema.model_validate(item)
 
 @router.get("/categorias", response_model=List[schemas.ItensCategoriasSchema])
-def get_all_categorias(logic: logic.ItensCategoriaLogic = Depends()):
-    itens = logic.get_all_categorias()
-    return list(map(lambda i: schemas.ItensCategoriasSchema.model_validate(i), itens))
+def get_all_categorias(request: Request, response: Response, after_id: int | None = Query(default=None, ge=0), limit: int | None = Query(default=None, ge=1), logic: logic.ItensCategoriaLogic = Depends(provide(logic.ItensCategoriaLogic, leitura=True))):
+    nao_modificado = conditional_get(request=request, response=response, etag=logic.get_categorias_etag(), max_age=CATALOGO_MAX_AGE)
+    if nao_modificado:
+        return nao_modificado
+
+    categorias, possui_mais = logic.get_categorias_page(after_id=after_id, limit=limit)
+
+    response.headers["X-Proximo-Cursor"] = str(categorias[-1].id)
+    response.headers["X-Possui-Mais"] = str(possui_mais).lower()
+
+    return list(map(lambda c: schemas.ItensCategoriasSchema.model_validate(c), categorias))
 
 @router.patch("/categorias/{categoria_id}", response_model=schemas.ItensCategoriasSchema)
-def update_categoria(categoria_id: int, body: schemas.ItensCategoriasBodySchema, logic: logic.ItensCategoriaLogic = Depends()):
+def update_categoria(categoria_id: int, body: schemas.ItensCategoriasBodySchema, logic: logic.ItensCategoriaLogic = Depends(provide(logic.ItensCategoriaLogic))):
     categoria = logic.update_categoria(categoria_id=categoria_id, body=body)
     return schemas.ItensCategoriasSchema.model_validate(categoria)
 
 @router.delete("/categorias/{categoria_id}", response_model=schemas.ItensCategoriasSchema)
-def delete_categoria(categoria_id: int, logic: logic.ItensCategoriaLogic = Depends()):
+def delete_categoria(categoria_id: int, logic: logic.ItensCategoriaLogic = Depends(provide(logic.ItensCategoriaLogic))):
     categoria = logic.delete_categoria(categoria_id=categoria_id)
     return schemas.ItensCategoriasSchema.model_validate(categoria)
 
 @router.post("/subcategorias/nova", response_model=schemas.ItensSubCategoriasSchema)
-def create_subcategoria(body: schemas.ItensSubCategoriasBodySchema, logic: logic.ItensSubCategoriaLogic = Depends() ):
+def create_subcategoria(body: schemas.ItensSubCategoriasBodySchema, logic: logic.ItensSubCategoriaLogic = Depends(provide(logic.ItensSubCategoriaLogic)) ):
     subcategoria = logic.create_subcategoria(body=body)
     return schemas.ItensSubCategoriasSchema.model_validate(subcategoria)
 
 @router.get("/subcategorias/{subcategoria_id}", response_model=schemas.ItensSubCategoriasSchema)
-def get_subcategoria_by_id(subcategoria_id: int, logic: logic.ItensSubCategoriaLogic = Depends()):
+def get_subcategoria_by_id(subcategoria_id: int, logic: logic.ItensSubCategoriaLogic = Depends(provide(logic.ItensSubCategoriaLogic, leitura=True))):
     subcategoria = logic.get_sub_categoria_by_id(subcategoria_id=subcategoria_id)
     return schemas.ItensSubCategoriasSchema.model_validate(subcategoria)
 
 @router.get("/subcategorias", response_model=List[schemas.ItensSubCategoriasSchema])
-def get_all_subcategorias(logic: logic.ItensSubCategoriaLogic = Depends()):
-    subcategorias = logic.get_all_subcategorias()
+def get_all_subcategorias(request: Request, response: Response, after_id: int | None = Query(default=None, ge=0), limit: int | None = Query(default=None, ge=1), logic: logic.ItensSubCategoriaLogic = Depends(provide(logic.ItensSubCategoriaLogic, leitura=True))):
+    nao_modificado = conditional_get(request=request, response=response, etag=logic.get_subcategorias_etag(), max_age=CATALOGO_MAX_AGE)
+    if nao_modificado:
+        return nao_modificado
+
+    subcategorias, possui_mais = logic.get_subcategorias_page(after_id=after_id, limit=limit)
+
+    response.headers["X-Proximo-Cursor"] = str(subcategorias[-1].id)
+    response.headers["X-Possui-Mais"] = str(possui_mais).lower()
+
     return list(map(lambda s: schemas.ItensSubCategoriasSchema.model_validate(s), subcategorias))
 
 @router.get("/categorias/{categoria_id}/subcategorias", response_model=List[schemas.ItensSubCategoriasSchema])
-def get_subcategorias_by_categoria(categoria_id: int, logic: logic.ItensSubCategoriaLogic = Depends()):
+def get_subcategorias_by_categoria(categoria_id: int, logic: logic.ItensSubCategoriaLogic = Depends(provide(logic.ItensSubCategoriaLogic, leitura=True))):
     subcategorias = logic.get_subcategorias_by_categoria(categoria_id=categoria_id)
     return list(map(lambda s: schemas.ItensSubCategoriasSchema.model_validate(s), subcategorias))
 
 @router.patch("/subcategorias/{subcategoria_id}", response_model=schemas.ItensSubCategoriasSchema)
-def update_subcategoria(subcategoria_id: int, body: schemas.ItensSubCategoriasBodySchema, logic: logic.ItensSubCategoriaLogic = Depends()):
+def update_subcategoria(subcategoria_id: int, body: schemas.ItensSubCategoriasBodySchema, logic: logic.ItensSubCategoriaLogic = Depends(provide(logic.ItensSubCategoriaLogic))):
     subcategoria = logic.update_subcategoria(subcategoria_id=subcategoria_id, body=body)
     return schemas.ItensSubCategoriasSchema.model_validate(subcategoria)
 
 @router.delete("/subcategorias/{subcategoria_id}", response_model=schemas.ItensSubCategoriasSchema)
-def delete_subcategoria(subcategoria_id: int, logic: logic.ItensSubCategoriaLogic = Depends()):
+def delete_subcategoria(subcategoria_id: int, logic: logic.ItensSubCategoriaLogic = Depends(provide(logic.ItensSubCategoriaLogic))):
     subcategoria = logic.delete_subcategoria(subcategoria_id=subcategoria_id)
     return schemas.ItensSubCategoriasSchema.model_validate(subcategoria)
 
 @router.post("/marcas/nova", response_model=schemas.ItensMarcasSchema)
-def create_marca(body: schemas.ItensMarcasBodySchema, logic: logic.ItensMarcasLogic = Depends()):
+def create_marca(body: schemas.ItensMarcasBodySchema, logic: logic.ItensMarcasLogic = Depends(provide(logic.ItensMarcasLogic))):
     marca = logic.create_marca(body=body)
     return schemas.ItensMarcasSchema.model_validate(marca)
 
 @router.get("/marcas/{marca_id}", response_model=schemas.ItensMarcasSchema)
-def get_marca_by_id(marca_id: int, logic: logic.ItensMarcasLogic = Depends()):
+def get_marca_by_id(marca_id: int, logic: logic.ItensMarcasLogic = Depends(provide(logic.ItensMarcasLogic, leitura=True))):
     marca = logic.get_marca_by_id(marca_id=marca_id)
     return schemas.ItensMarcasSchema.model_validate(marca)
 
 @router.get("/marcas", response_model=List[schemas.ItensMarcasSchema])
-def get_all_marcas(logic: logic.ItensMarcasLogic = Depends()):
-    marcas = logic.get_all_marcas()
+def get_all_marcas(request: Request, response: Response, after_id: int | None = Query(default=None, ge=0), limit: int | None = Query(default=None, ge=1), logic: logic.ItensMarcasLogic = Depends(provide(logic.ItensMarcasLogic, leitura=True))):
+    nao_modificado = conditional_get(request=request, response=response, etag=logic.get_marcas_etag(), max_age=CATALOGO_MAX_AGE)
+    if nao_modificado:
+        return nao_modificado
+
+    marcas, possui_mais = logic.get_marcas_page(after_id=after_id, limit=limit)
+
+    response.headers["X-Proximo-Cursor"] = str(marcas[-1].id)
+    response.headers["X-Possui-Mais"] = str(possui_mais).lower()
+
     return list(map(lambda m: schemas.ItensMarcasSchema.model_validate(m), marcas))
 
 @router.patch("/marcas/{marca_id}", response_model=schemas.ItensMarcasSchema)
-def update_marca(marca_id: int, body: schemas.ItensMarcasBodySchema, logic: logic.ItensMarcasLogic = Depends()):
+def update_marca(marca_id: int, body: schemas.ItensMarcasBodySchema, logic: logic.ItensMarcasLogic = Depends(provide(logic.ItensMarcasLogic))):
     marca = logic.update_marca(marca_id=marca_id, body=body)
     return schemas.ItensMarcasSchema.model_validate(marca)
 
 @router.delete("/marcas/{marca_id}", response_model=schemas.ItensMarcasSchema)
-def delete_marca(marca_id: int, logic: logic.ItensMarcasLogic = Depends()):
+def delete_marca(marca_id: int, logic: logic.ItensMarcasLogic = Depends(provide(logic.ItensMarcasLogic))):
     marca = logic.delete_marca(marca_id=marca_id)
     return schemas.ItensMarcasSchema.model_validate(marca)
 
 @router.post("/unidades/nova", response_model=schemas.ItensUnidadesSchema)
-def create_unidade(body: schemas.ItensUnidadesBodySchema, logic: logic.ItensUnidadesLogic = Depends()):
+def create_unidade(body: schemas.ItensUnidadesBodySchema, logic: logic.ItensUnidadesLogic = Depends(provide(logic.ItensUnidadesLogic))):
     unidade = logic.create_unidade(body=body)
     return schemas.ItensUnidadesSchema.model_validate(unidade)
 
 @router.get("/unidades/{unidade_id}", response_model=schemas.ItensUnidadesSchema)
-def get_unidade_by_id(unidade_id: int, logic: logic.ItensUnidadesLogic = Depends()):
+def get_unidade_by_id(unidade_id: int, logic: logic.ItensUnidadesLogic = Depends(provide(logic.ItensUnidadesLogic, leitura=True))):
     unidade = logic.get_unidade_by_id(unidade_id=unidade_id)
     return schemas.ItensUnidadesSchema.model_validate(unidade)
 
 @router.get("/unidades", response_model=List[schemas.ItensUnidadesSchema])
-def get_all_unidades(logic: logic.ItensUnidadesLogic = Depends()):
+def get_all_unidades(request: Request, response: Response, logic: logic.ItensUnidadesLogic = Depends(provide(logic.ItensUnidadesLogic, leitura=True))):
+    nao_modificado = conditional_get(request=request, response=response, etag=logic.get_unidades_etag(), max_age=CATALOGO_MAX_AGE)
+    if nao_modificado:
+        return nao_modificado
+
     unidades = logic.get_all_unidades()
     return map(lambda u: schemas.ItensUnidadesSchema.model_validate(u), unidades)
 
 @router.patch("/unidades/{unidade_id}", response_model=schemas.ItensUnidadesSchema)
-def update_unidade(unidade_id: int, body: schemas.ItensUnidadesBodySchema, logic: logic.ItensUnidadesLogic = Depends()):
+def update_unidade(unidade_id: int, body: schemas.ItensUnidadesBodySchema, logic: logic.ItensUnidadesLogic = Depends(provide(logic.ItensUnidadesLogic))):
     unidade = logic.update_unidade(unidade_id=unidade_id, body=body)
     return schemas.ItensUnidadesSchema.model_validate(unidade)
 
 @router.delete("/unidades/{unidade_id}", response_model=schemas.ItensUnidadesSchema)
-def delete_unidade(unidade_id: int, logic: logic.ItensUnidadesLogic = Depends()):
+def delete_unidade(unidade_id: int, logic: logic.ItensUnidadesLogic = Depends(provide(logic.ItensUnidadesLogic))):
     unidade = logic.delete_unidade(unidade_id=unidade_id)
     return schemas.ItensUnidadesSchema.model_validate(unidade)
 
 @router.post("/novo", response_model=schemas.ItensSchema)
-def create_item(body: schemas.ItensBodySchema, logic: logic.ItensLogic = Depends()):
+def create_item(body: schemas.ItensBodySchema, logic: logic.ItensLogic = Depends(provide(logic.ItensLogic))):
     item = logic.create_item(body=body)
     return schemas.ItensSchema.model_validate(item)
 
+@router.post("/importacao", response_model=schemas.ItensImportacaoResponseSchema)
+def import_itens(arquivo: UploadFile = File(), formato: str | None = Query(default=None), delimitador: str = Query(default=",", min_length=1, max_length=1), logic: logic.ItensImportacaoLogic = Depends(provide(logic.ItensImportacaoLogic))):
+    # Formato pela extensão do arquivo quando não informado (.jsonl ou .ndjson, senão CSV)
+    formato = formato or ("jsonl" if (arquivo.filename or "").endswith((".jsonl", ".ndjson")) else "csv")
+    return logic.import_itens(arquivo=arquivo.file, formato=formato, delimitador=delimitador)
+
+# Registrada antes de /{item_id}
+@router.get("/busca", response_model=List[schemas.ItensBuscaResponseSchema])
+def search_itens(response: Response, q: str = Query(min_length=2, max_length=200), categoriaID: int | None = Query(default=None), subcategoriaID: int | None = Query(default=None), marcaID: int | None = Query(default=None), cursor: str | None = Query(default=None), limit: int | None = Query(default=None, ge=1), logic: logic.ItensLogic = Depends(provide(logic.ItensLogic, leitura=True))):
+    resultados, possui_mais = logic.search_itens(q=q, categoria_id=categoriaID, subcategoria_id=subcategoriaID, marca_id=marcaID, cursor=cursor, limit=limit)
+
+    response.headers["X-Proximo-Cursor"] = logic.busca_cursor(resultados[-1])
+    response.headers["X-Possui-Mais"] = str(possui_mais).lower()
+
+    return [schemas.ItensBuscaResponseSchema(**schemas.ItensSchema.model_validate(item).model_dump(), relevancia=relevancia) for item, relevancia in resultados]
+
 @router.get("/{item_id}", response_model=schemas.ItensSchema)
-def get_item_by_id(item_id: int, logic: logic.ItensLogic = Depends()):
+def get_item_by_id(item_id: int, logic: logic.ItensLogic = Depends(provide(logic.ItensLogic, leitura=True))):
     item = logic.get_item_by_id(item_id=item_id)
     return schemas.ItensSchema.model_validate(item)
 
 @router.get("/", response_model=List[schemas.ItensSchema])
-def get_all_itens(logic: logic.ItensLogic = Depends()):
-    itens = logic.get_all_itens()
+def get_all_itens(request: Request, response: Response, categoriaID: int | None = Query(default=None), subcategoriaID: int | None = Query(default=None), marcaID: int | None = Query(default=None), after_id: int | None = Query(default=None, ge=0), limit: int | None = Query(default=None, ge=1), logic: logic.ItensLogic = Depends(provide(logic.ItensLogic, leitura=True))):
+    nao_modificado = conditional_get(request=request, response=response, etag=logic.get_itens_etag(), max_age=CATALOGO_MAX_AGE)
+    if nao_modificado:
+        return nao_modificado
+
+    itens, possui_mais = logic.get_itens_page(after_id=after_id, limit=limit, categoria_id=categoriaID, subcategoria_id=subcategoriaID, marca_id=marcaID)
+
+    response.headers["X-Proximo-Cursor"] = str(itens[-1].id)
+    response.headers["X-Possui-Mais"] = str(possui_mais).lower()
+
     return list(map(lambda i: schemas.ItensSchema.model_validate(i), itens))
 
 @router.patch("/{item_id}", response_model=schemas.ItensSchema)
-def upadte_item(item_id: int, body: schemas.ItensBodySchema, logic: logic.ItensLogic = Depends()):
+def upadte_item(item_id: int, body: schemas.ItensBodySchema, logic: logic.ItensLogic = Depends(provide(logic.ItensLogic))):
     item = logic.update_item(item_id=item_id, body=body)
     return schemas.ItensSchema.model_validate(item)
 
 @router.delete("/{item_id}", response_model=schemas.ItensSchema)
-def delete_item(item_id: int, logic: logic.ItensLogic = Depends()):
+def delete_item(item_id: int, logic: logic.ItensLogic = Depends(provide(logic.ItensLogic))):
     item = logic.delete_item(item_id=item_id)
     return schemas.ItensSchema.model_validate(item)
\ No newline at end of file
@@ -1,3 +1,4 @@
+from typing import List
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -101,6 +102,12 @@ class ItensSchema(BaseModel):
         orm_mode = True
         from_attributes = True
 
+
+class ItensBuscaResponseSchema(ItensSchema):
+
+    relevancia: float
+
+
 class ItensBodySchema(BaseModel):
 
     nome: str
@@ -111,4 +118,27 @@ class ItensBodySchema(BaseModel):
 
     class Config:
         orm_mode = True
-        from_attributes = True        
\ No newline at end of file
+        from_attributes = True        
+
+class ItensImportacaoErroSchema(BaseModel):
+
+    linha: int
+    detalhe: str
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+
+class ItensImportacaoResponseSchema(BaseModel):
+
+    # erros: até ItensImportacaoLogic.IMPORTACAO_ERROS_LIMITE linhas rejeitadas, na ordem do arquivo
+    linhas: int
+    inseridos: int
+    atualizados: int
+    rejeitados: int
+    erros: List[ItensImportacaoErroSchema]
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
@@ -1,14 +1,46 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from environment.variables import get_settings
+from database.instance import async_engine
+from database.replicas import ReadYourWritesMiddleware, replica_engines
+from database.profiler import SQLProfilerMiddleware
+from utils.pubsub import get_pubsub
 
 # Routers
 import pregao.routes
+import pregao.async_routes
 import solicitacoes.routes
 import itens.routes
 import usuarios.routes
+import metricas.routes
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Recebendo os eventos publicados pelos demais workers
+    get_pubsub().start()
+    yield
+    get_pubsub().stop()
+
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Com réplicas de leitura, quem acabou de escrever lê do primário durante a janela configurada
+if replica_engines and get_settings().db_read_your_writes_segundos > 0:
+    app.add_middleware(ReadYourWritesMiddleware, janela=get_settings().db_read_your_writes_segundos)
+
+if get_settings().sql_perfil:
+    app.add_middleware(SQLProfilerMiddleware, debug_headers=get_settings().sql_debug_headers, limite_repeticoes=get_settings().sql_repeticoes_limite)
+
+# Com DB_ASYNC=1 as rotas assíncronas de lances têm precedência sobre as equivalentes síncronas
+if get_settings().db_async:
+    app.include_router(pregao.async_routes.router)
 
 app.include_router(pregao.routes.router)
 app.include_router(solicitacoes.routes.router)
 app.include_router(itens.routes.router)
-app.include_router(usuarios.routes.router)
\ No newline at end of file
+app.include_router(usuarios.routes.router)
+app.include_router(metricas.routes.router)
\ No newline at end of file
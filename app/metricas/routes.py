@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Depends
+from utils.metrics import MetricsRegistry, get_metrics
+
+router = APIRouter(
+    prefix="/metricas",
+    tags=["Metricas"]
+)
+
+@router.get("/")
+def get_metricas(metrics: MetricsRegistry = Depends(get_metrics)):
+    return metrics.snapshot()
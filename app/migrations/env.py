@@ -0,0 +1,82 @@
+from logging.config import fileConfig
+from alembic import context
+from sqlalchemy import Column, create_engine, text
+from sqlalchemy.pool import NullPool
+from environment.variables import get_settings
+from database.instance import Base
+
+# registrando todas as tabelas no metadata (usado pelo autogenerate e pelo alembic check)
+import pregao.models, itens.models, solicitacoes.models, usuarios.models  # noqa: F401
+from itens.models import ITENS_BUSCA_INDICES_TRIGRAMAS
+
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+settings = get_settings()
+target_metadata = Base.metadata
+
+
+# Índices de expressão (ex.: busca textual de Itens): o Postgres normaliza a expressão e o autogenerate
+# os detectaria sempre como alterados; não são comparados pelo alembic check
+INDICES_EXPRESSAO = {
+    indice.name for tabela in target_metadata.tables.values() for indice in tabela.indexes
+    if any(not isinstance(expressao, Column) for expressao in indice.expressions)
+}
+
+
+def include_name(name, type_, parent_names) -> bool:
+    # Apenas o schema da aplicação é comparado com o metadata
+    if type_ == "schema":
+        return name == settings.db_schema
+    return True
+
+
+def include_object(object, name, type_, reflected, compare_to) -> bool:
+    # Índices de trigramas: apenas na migration 0005 (extensão pg_trgm), fora do metadata
+    return not (type_ == "index" and (name in INDICES_EXPRESSAO or name in ITENS_BUSCA_INDICES_TRIGRAMAS))
+
+
+def configure(**kwargs) -> None:
+
+    context.configure(
+        target_metadata=target_metadata,
+        version_table_schema=settings.db_schema,
+        include_schemas=settings.db_schema is not None,
+        include_name=include_name,
+        include_object=include_object,
+        **kwargs
+    )
+
+
+def run_migrations_offline() -> None:
+
+    configure(url=settings.db_url, literal_binds=True, dialect_opts={"paramstyle": "named"})
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # Engine próprio, sem o statement_timeout da aplicação: a criação de índices pode ser longa
+
+    connectable = create_engine(settings.db_url, poolclass=NullPool)
+
+    with connectable.connect() as connection:
+
+        if settings.db_schema:
+            connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{settings.db_schema}"'))
+            connection.commit()
+
+        configure(connection=connection)
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,225 @@
+"""Schema inicial: tabelas existentes antes das migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 10:30:00
+
+Bancos criados antes das migrations já possuem estas tabelas: marque-os com `alembic stamp 0001`
+e aplique as revisões seguintes com `alembic upgrade head`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from environment.variables import get_settings
+
+# Schema da aplicação (POSTGRES_SCHEMA)
+SCHEMA = get_settings().db_schema
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABELAS = (
+    "ITENS_CATEGORIAS", "ITENS_SUBCATEGORIAS", "ITENS_MARCAS", "ITENS_UNIDADES", "ITENS",
+    "USUARIOS", "USUARIOS_INTERESSES",
+    "PREGAO_SOLICITACOES", "PREGAO_SOLICITACOES_ITENS", "PREGAO_SOLICITACOES_PARTICIPANTES",
+    "PREGAO_LANCES_REGRAS", "PREGAO_PREGOES", "PREGAO_PREGOES_ITENS", "PREGAO_PREGOES_PARTICIPANTES",
+    "PREGAO_PREGOES_LANCES", "PREGAO_CONVERSOES",
+)
+
+
+def indice(tabela: str, coluna: str) -> str:
+    # Mesmo nome gerado pelo SQLAlchemy para Column(index=True): ix_<schema>_<tabela>_<coluna>
+    return f"ix_{SCHEMA}_{tabela}_{coluna}" if SCHEMA else f"ix_{tabela}_{coluna}"
+
+
+def id_column() -> sa.Column:
+    return sa.Column("id", sa.BigInteger(), primary_key=True)
+
+
+def datas_columns() -> list[sa.Column]:
+    return [sa.Column("criadoEm", sa.DateTime()), sa.Column("atualizadoEm", sa.DateTime())]
+
+
+def upgrade() -> None:
+
+    op.create_table("ITENS_CATEGORIAS",
+        id_column(),
+        sa.Column("nome", sa.String()),
+        *datas_columns(),
+        sa.Column("deleted", sa.Boolean()),
+        schema=SCHEMA
+    )
+
+    op.create_table("ITENS_SUBCATEGORIAS",
+        id_column(),
+        sa.Column("nome", sa.String()),
+        sa.Column("categoriaID", sa.BigInteger()),
+        *datas_columns(),
+        sa.Column("deleted", sa.Boolean()),
+        schema=SCHEMA
+    )
+
+    op.create_table("ITENS_MARCAS",
+        id_column(),
+        sa.Column("nome", sa.String()),
+        *datas_columns(),
+        sa.Column("deleted", sa.Boolean()),
+        schema=SCHEMA
+    )
+
+    op.create_table("ITENS_UNIDADES",
+        id_column(),
+        sa.Column("unidade", sa.String()),
+        sa.Column("descricao", sa.String()),
+        *datas_columns(),
+        sa.Column("deleted", sa.Boolean()),
+        schema=SCHEMA
+    )
+
+    op.create_table("ITENS",
+        id_column(),
+        sa.Column("nome", sa.String()),
+        sa.Column("descricao", sa.String()),
+        sa.Column("categoriaID", sa.BigInteger()),
+        sa.Column("subcategoriaID", sa.BigInteger()),
+        sa.Column("marcaID", sa.BigInteger()),
+        *datas_columns(),
+        sa.Column("deleted", sa.Boolean()),
+        schema=SCHEMA
+    )
+
+    op.create_table("USUARIOS",
+        id_column(),
+        sa.Column("email", sa.String()),
+        sa.Column("nome", sa.String()),
+        schema=SCHEMA
+    )
+
+    op.create_table("USUARIOS_INTERESSES",
+        id_column(),
+        sa.Column("usuarioID", sa.BigInteger()),
+        sa.Column("categoriaID", sa.BigInteger()),
+        sa.Column("interesseTipo", sa.String()),
+        schema=SCHEMA
+    )
+
+    op.create_table("PREGAO_SOLICITACOES",
+        id_column(),
+        sa.Column("descricao", sa.String()),
+        sa.Column("informacoes", sa.String()),
+        sa.Column("status", sa.String()),
+        sa.Column("dataHoraInicioSugerida", sa.DateTime()),
+        sa.Column("dataHoraFimSugerida", sa.DateTime()),
+        sa.Column("criadoPor", sa.BigInteger()),
+        sa.Column("motivoRejeicao", sa.String()),
+        *datas_columns(),
+        schema=SCHEMA
+    )
+
+    op.create_table("PREGAO_SOLICITACOES_ITENS",
+        id_column(),
+        sa.Column("solicitacaoID", sa.BigInteger()),
+        sa.Column("criadoPor", sa.BigInteger()),
+        sa.Column("projecaoQuantidade", sa.Double()),
+        *datas_columns(),
+        sa.Column("deleted", sa.Boolean()),
+        sa.Column("itemNome", sa.String()),
+        sa.Column("itemDescricao", sa.String()),
+        sa.Column("itemCategoria", sa.String()),
+        sa.Column("itemSubcategoria", sa.String()),
+        sa.Column("itemUnidade", sa.String()),
+        sa.Column("itemMarca", sa.String()),
+        sa.Column("categoriaReferenciaID", sa.BigInteger()),
+        sa.Column("subcategoriaReferenciaID", sa.BigInteger()),
+        sa.Column("unidadeReferenciaID", sa.BigInteger()),
+        sa.Column("marcaReferenciaID", sa.BigInteger()),
+        sa.Column("itemReferenciaID", sa.BigInteger()),
+        schema=SCHEMA
+    )
+
+    op.create_table("PREGAO_SOLICITACOES_PARTICIPANTES",
+        id_column(),
+        sa.Column("solicitacaoID", sa.BigInteger()),
+        sa.Column("usuarioID", sa.BigInteger()),
+        sa.Column("participanteTipo", sa.String()),
+        schema=SCHEMA
+    )
+
+    op.create_table("PREGAO_LANCES_REGRAS",
+        id_column(),
+        sa.Column("diferencaDeValorMinima", sa.Double()),
+        sa.Column("intervaloDeTempoEmMinutos", sa.Integer()),
+        sa.Column("lancesPorIntervaloDeTempo", sa.Integer()),
+        schema=SCHEMA
+    )
+
+    op.create_table("PREGAO_PREGOES",
+        id_column(),
+        sa.Column("descricao", sa.String()),
+        sa.Column("informacoes", sa.String()),
+        sa.Column("status", sa.String()),
+        sa.Column("criadoPor", sa.BigInteger()),
+        sa.Column("criadoEm", sa.DateTime()),
+        sa.Column("regraLanceID", sa.BigInteger()),
+        sa.Column("atualizadoEm", sa.DateTime()),
+        sa.Column("dataHoraInicio", sa.DateTime()),
+        sa.Column("dataHoraFim", sa.DateTime()),
+        sa.Column("abertoADemandasEm", sa.DateTime()),
+        sa.Column("abertoADemandasAte", sa.DateTime()),
+        schema=SCHEMA
+    )
+    op.create_index(indice("PREGAO_PREGOES", "status"), "PREGAO_PREGOES", ["status"], schema=SCHEMA)
+
+    op.create_table("PREGAO_PREGOES_ITENS",
+        id_column(),
+        sa.Column("pregaoID", sa.BigInteger()),
+        sa.Column("itemID", sa.BigInteger()),
+        sa.Column("criadoPor", sa.BigInteger()),
+        sa.Column("projecaoQuantidade", sa.Double()),
+        sa.Column("unidadeID", sa.BigInteger()),
+        *datas_columns(),
+        sa.Column("deleted", sa.Boolean()),
+        sa.Column("demandaAtual", sa.Boolean()),
+        schema=SCHEMA
+    )
+
+    op.create_table("PREGAO_PREGOES_PARTICIPANTES",
+        id_column(),
+        sa.Column("pregaoID", sa.BigInteger()),
+        sa.Column("usuarioID", sa.BigInteger()),
+        sa.Column("participanteTipo", sa.String()),
+        schema=SCHEMA
+    )
+
+    op.create_table("PREGAO_PREGOES_LANCES",
+        id_column(),
+        sa.Column("pregaoID", sa.BigInteger()),
+        sa.Column("participanteID", sa.BigInteger()),
+        sa.Column("itemID", sa.BigInteger()),
+        sa.Column("valorLance", sa.Double()),
+        sa.Column("dataHoraLance", sa.DateTime()),
+        sa.Column("dataHoraRegistro", sa.DateTime()),
+        schema=SCHEMA
+    )
+
+    op.create_table("PREGAO_CONVERSOES",
+        id_column(),
+        sa.Column("pregaoID", sa.BigInteger()),
+        sa.Column("solicitacaoID", sa.BigInteger()),
+        schema=SCHEMA
+    )
+
+    # Column(primary_key=True, index=True): índice adicional em id, mantido para coincidir com o metadata
+    for tabela in TABELAS:
+        op.create_index(indice(tabela, "id"), tabela, ["id"], schema=SCHEMA)
+
+
+def downgrade() -> None:
+
+    for tabela in reversed(TABELAS):
+        op.drop_table(tabela, schema=SCHEMA)
@@ -0,0 +1,58 @@
+"""Índices compostos para as consultas das classes de lógica
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:45:00
+
+Os índices são criados com CREATE INDEX CONCURRENTLY (fora da transação da migration), sem bloquear
+as escritas nas tabelas, e IF NOT EXISTS: os índices de lances já podem existir em bancos criados
+pelo metadata (benchmarks).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from environment.variables import get_settings
+
+# Schema da aplicação (POSTGRES_SCHEMA)
+SCHEMA = get_settings().db_schema
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDICES = (
+    # Lance vencedor por Item: DISTINCT ON (itemID) ordenado por valor e horário do lance
+    ("ix_pregao_lances_pregao_item_valor", "PREGAO_PREGOES_LANCES", ["pregaoID", "itemID", "valorLance", "dataHoraLance"]),
+    # Paginação por cursor (keyset) dos lances do Pregão
+    ("ix_pregao_lances_pregao_id", "PREGAO_PREGOES_LANCES", ["pregaoID", "id"]),
+    # Limite de lances por intervalo: WHERE pregaoID = ? AND participanteID = ? AND dataHoraRegistro >= ?
+    ("ix_pregao_lances_pregao_participante_registro", "PREGAO_PREGOES_LANCES", ["pregaoID", "participanteID", "dataHoraRegistro"]),
+    # Histórico de lances do Pregão: WHERE pregaoID = ? ORDER BY dataHoraRegistro
+    ("ix_pregao_lances_pregao_registro", "PREGAO_PREGOES_LANCES", ["pregaoID", "dataHoraRegistro"]),
+    ("ix_pregao_itens_pregao_item", "PREGAO_PREGOES_ITENS", ["pregaoID", "itemID"]),
+    ("ix_pregao_participantes_pregao_usuario", "PREGAO_PREGOES_PARTICIPANTES", ["pregaoID", "usuarioID"]),
+    ("ix_pregao_conversoes_pregao", "PREGAO_CONVERSOES", ["pregaoID"]),
+    ("ix_pregao_conversoes_solicitacao", "PREGAO_CONVERSOES", ["solicitacaoID"]),
+    ("ix_solicitacoes_itens_solicitacao", "PREGAO_SOLICITACOES_ITENS", ["solicitacaoID"]),
+    ("ix_solicitacoes_participantes_solicitacao_usuario", "PREGAO_SOLICITACOES_PARTICIPANTES", ["solicitacaoID", "usuarioID"]),
+    ("ix_itens_subcategorias_categoria", "ITENS_SUBCATEGORIAS", ["categoriaID"]),
+    ("ix_usuarios_interesses_usuario_categoria_tipo", "USUARIOS_INTERESSES", ["usuarioID", "categoriaID", "interesseTipo"]),
+)
+
+
+def upgrade() -> None:
+
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas in INDICES:
+            op.create_index(nome, tabela, colunas, schema=SCHEMA, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+
+    with op.get_context().autocommit_block():
+        for nome, tabela, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, schema=SCHEMA, postgresql_concurrently=True, if_exists=True)
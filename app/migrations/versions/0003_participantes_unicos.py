@@ -0,0 +1,97 @@
+"""Participação única do Usuário em cada Pregão
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 14:00:00
+
+A inscrição em lote insere os Participantes com INSERT ... ON CONFLICT (pregaoID, usuarioID), que requer
+uma constraint única. Participações repetidas (inscrições concorrentes antes da constraint) são unificadas
+no menor id, com os lances e os Itens do Pregão (criadoPor) movidos para ele; o índice único é criado com
+CONCURRENTLY e associado à constraint, substituindo o índice ix_pregao_participantes_pregao_usuario.
+
+Participações repetidas com participanteTipo diferentes (ex.: COMPRADOR e FORNECEDOR) não são unificadas:
+a migração é interrompida com a lista dos conflitos, que devem ser corrigidos manualmente.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from environment.variables import get_settings
+
+# Schema da aplicação (POSTGRES_SCHEMA)
+SCHEMA = get_settings().db_schema
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABELA = "PREGAO_PREGOES_PARTICIPANTES"
+CONSTRAINT = "uq_pregao_participantes_pregao_usuario"
+INDICE = "ix_pregao_participantes_pregao_usuario"
+
+
+def tabela(nome: str) -> str:
+    return f'"{SCHEMA}"."{nome}"' if SCHEMA else f'"{nome}"'
+
+
+def upgrade() -> None:
+
+    # Unificar papéis diferentes moveria os lances de um Fornecedor para a participação de um Comprador
+    op.execute(f"""
+        DO $$
+        DECLARE
+            conflitos text;
+        BEGIN
+            SELECT string_agg(format('pregaoID %s, usuarioID %s (%s)', "pregaoID", "usuarioID", tipos), '; ') INTO conflitos
+            FROM (
+                SELECT "pregaoID", "usuarioID", string_agg(DISTINCT coalesce("participanteTipo", 'NULL'), ', ') AS tipos
+                FROM {tabela(TABELA)}
+                GROUP BY "pregaoID", "usuarioID"
+                HAVING count(DISTINCT coalesce("participanteTipo", 'NULL')) > 1
+            ) AS conflito;
+
+            IF conflitos IS NOT NULL THEN
+                RAISE EXCEPTION 'Participantes repetidos com participanteTipo diferentes: %', conflitos
+                    USING HINT = 'Remova ou corrija as participações indevidas antes de aplicar a migração 0003';
+            END IF;
+        END
+        $$
+    """)
+
+    # Participação mantida (menor id) de cada Participante repetido
+    op.execute(f"""
+        CREATE TEMPORARY TABLE participantes_repetidos ON COMMIT DROP AS
+        SELECT id, min(id) OVER (PARTITION BY "pregaoID", "usuarioID") AS mantido
+        FROM {tabela(TABELA)}
+    """)
+    op.execute('DELETE FROM participantes_repetidos WHERE id = mantido')
+
+    # Colunas com ids de Participantes do Pregão: lances e Itens incluídos pelo Comprador (criadoPor)
+
+    op.execute(f"""
+        UPDATE {tabela("PREGAO_PREGOES_LANCES")} AS lance SET "participanteID" = repetido.mantido
+        FROM participantes_repetidos AS repetido WHERE lance."participanteID" = repetido.id
+    """)
+    # Itens gerados das Solicitações guardam o Participante da Solicitação: apenas os do mesmo Pregão são movidos
+    op.execute(f"""
+        UPDATE {tabela("PREGAO_PREGOES_ITENS")} AS item SET "criadoPor" = repetido.mantido
+        FROM participantes_repetidos AS repetido, {tabela(TABELA)} AS participante
+        WHERE item."criadoPor" = repetido.id AND participante.id = repetido.id AND item."pregaoID" = participante."pregaoID"
+    """)
+    op.execute(f'DELETE FROM {tabela(TABELA)} AS participante USING participantes_repetidos AS repetido WHERE participante.id = repetido.id')
+
+    with op.get_context().autocommit_block():
+        op.create_index(CONSTRAINT, TABELA, ["pregaoID", "usuarioID"], unique=True, schema=SCHEMA, postgresql_concurrently=True, if_not_exists=True)
+        op.execute(f'ALTER TABLE {tabela(TABELA)} ADD CONSTRAINT "{CONSTRAINT}" UNIQUE USING INDEX "{CONSTRAINT}"')
+        op.drop_index(INDICE, table_name=TABELA, schema=SCHEMA, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+
+    with op.get_context().autocommit_block():
+        op.create_index(INDICE, TABELA, ["pregaoID", "usuarioID"], schema=SCHEMA, postgresql_concurrently=True, if_not_exists=True)
+
+    op.drop_constraint(CONSTRAINT, TABELA, schema=SCHEMA, type_="unique")
@@ -0,0 +1,43 @@
+"""Versões das tabelas do catálogo
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:30:00
+
+Cada escrita em categorias, subcategorias, marcas e unidades incrementa a versão da tabela na mesma transação;
+os workers comparam as versões com as do seu cache do catálogo e recarregam as tabelas alteradas.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from environment.variables import get_settings
+
+# Schema da aplicação (POSTGRES_SCHEMA)
+SCHEMA = get_settings().db_schema
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABELAS_CATALOGO = ("ITENS_CATEGORIAS", "ITENS_SUBCATEGORIAS", "ITENS_MARCAS", "ITENS_UNIDADES")
+
+
+def upgrade() -> None:
+
+    versoes = op.create_table("ITENS_CATALOGO_VERSOES",
+        sa.Column("tabela", sa.String(), primary_key=True),
+        sa.Column("versao", sa.BigInteger(), nullable=False),
+        sa.Column("atualizadoEm", sa.DateTime()),
+        schema=SCHEMA
+    )
+
+    op.bulk_insert(versoes, [{"tabela": tabela, "versao": 0} for tabela in TABELAS_CATALOGO])
+
+
+def downgrade() -> None:
+
+    op.drop_table("ITENS_CATALOGO_VERSOES", schema=SCHEMA)
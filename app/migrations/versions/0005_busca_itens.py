@@ -0,0 +1,46 @@
+"""Índices da busca de Itens (texto completo e trigramas)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 17:00:00
+
+GET /itens/busca combina a busca textual em português sobre nome e descrição (@@) com a similaridade por
+trigramas da extensão pg_trgm (%, <%). A extensão é criada no schema padrão (public, confiável a partir do
+Postgres 13) e os índices GIN são criados com CONCURRENTLY, sem bloquear as escritas em ITENS.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from environment.variables import get_settings
+
+# Schema da aplicação (POSTGRES_SCHEMA)
+SCHEMA = get_settings().db_schema
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mesma expressão de itens.models.ITENS_BUSCA_DOCUMENTO
+DOCUMENTO = "to_tsvector('portuguese'::regconfig, coalesce(nome, '') || ' ' || coalesce(descricao, ''))"
+
+
+def upgrade() -> None:
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    with op.get_context().autocommit_block():
+        op.create_index("ix_itens_busca_documento", "ITENS", [sa.text(DOCUMENTO)], schema=SCHEMA, postgresql_using="gin", postgresql_concurrently=True, if_not_exists=True)
+        op.create_index("ix_itens_nome_trgm", "ITENS", ["nome"], schema=SCHEMA, postgresql_using="gin", postgresql_ops={"nome": "gin_trgm_ops"}, postgresql_concurrently=True, if_not_exists=True)
+        op.create_index("ix_itens_descricao_trgm", "ITENS", ["descricao"], schema=SCHEMA, postgresql_using="gin", postgresql_ops={"descricao": "gin_trgm_ops"}, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+
+    # A extensão pg_trgm é mantida: pode ser utilizada por outros schemas do banco
+    with op.get_context().autocommit_block():
+        for nome in ("ix_itens_descricao_trgm", "ix_itens_nome_trgm", "ix_itens_busca_documento"):
+            op.drop_index(nome, table_name="ITENS", schema=SCHEMA, postgresql_concurrently=True, if_exists=True)
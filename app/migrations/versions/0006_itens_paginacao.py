@@ -0,0 +1,45 @@
+"""Índices da listagem paginada de Itens
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 18:30:00
+
+GET /itens/ é paginado por cursor (id > after_id ORDER BY id) com filtros opcionais de categoria, subcategoria
+e marca; os índices (filtro, id) retornam a página já ordenada, lendo apenas limit + 1 registros. Sem filtro,
+a página é lida pela chave primária. Criados com CONCURRENTLY, sem bloquear as escritas em ITENS.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from environment.variables import get_settings
+
+# Schema da aplicação (POSTGRES_SCHEMA)
+SCHEMA = get_settings().db_schema
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDICES = (
+    ("ix_itens_categoria_id", "ITENS", ["categoriaID", "id"]),
+    ("ix_itens_subcategoria_id", "ITENS", ["subcategoriaID", "id"]),
+    ("ix_itens_marca_id", "ITENS", ["marcaID", "id"]),
+)
+
+
+def upgrade() -> None:
+
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas in INDICES:
+            op.create_index(nome, tabela, colunas, schema=SCHEMA, postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+
+    with op.get_context().autocommit_block():
+        for nome, tabela, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, schema=SCHEMA, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,152 @@
+from fastapi import Depends, HTTPException
+from database.instance import get_async_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from utils.http_exceptions import ResourceNotFoundException
+from typing import List
+from datetime import datetime
+from .lances_book import PregaoLancesBook, PregaoLancesVencedores, get_lances_book
+from .rate_limit import PregaoLancesRateLimiter, get_rate_limiter
+from .eventos import PregaoLancesEventos, get_lances_eventos
+from .group_commit import PregaoLancesGroupCommit, get_lances_group_commit, insert_lances_async
+from .logic import PregaoLanceContexto, PregaoLancesBaseLogic
+from . import models
+from . import schemas
+
+
+class PregaoLancesAsyncLogic(PregaoLancesBaseLogic):
+
+    '''
+        Operações de Lances do Pregão com AsyncSession (DB_ASYNC=1).
+        As rotas de registro e leitura de lances aguardam o banco no event loop, sem ocupar uma thread do threadpool.
+    '''
+
+    def __init__(self,
+                db: AsyncSession = Depends(get_async_db),
+                lances_book: PregaoLancesBook = Depends(get_lances_book),
+                rate_limiter: PregaoLancesRateLimiter = Depends(get_rate_limiter),
+                lances_eventos: PregaoLancesEventos = Depends(get_lances_eventos),
+                group_commit: PregaoLancesGroupCommit = Depends(get_lances_group_commit),
+            ) -> None:
+
+        self.db: AsyncSession = db
+        self.lances_book: PregaoLancesBook = lances_book
+        self.rate_limiter: PregaoLancesRateLimiter = rate_limiter
+        self.lances_eventos: PregaoLancesEventos = lances_eventos
+        self.group_commit: PregaoLancesGroupCommit = group_commit
+
+
+    async def get_pregao_by_id(self, pregao_id: int) -> models.PregaoModel | HTTPException:
+
+        pregao = (await self.db.scalars(select(models.PregaoModel).filter(models.PregaoModel.id == pregao_id))).first()
+
+        if pregao is None:
+            raise ResourceNotFoundException()
+
+        return pregao
+
+
+    async def get_pregao_lance_vencedor(self, pregao_id: int) -> schemas.PregaoLancesResponseSchema | HTTPException:
+
+        pregao = await self.get_pregao_by_id(pregao_id=pregao_id)
+
+        lance_vencedor = await self.get_lance_vencedor(pregao_id=pregao.id)
+
+        if lance_vencedor == None:
+            raise ResourceNotFoundException()
+
+        return lance_vencedor
+
+
+    async def get_pregao_lances_vencedores(self, pregao_id: int) -> List[schemas.PregaoItemVencedorResponseSchema] | HTTPException:
+
+        pregao = await self.get_pregao_by_id(pregao_id=pregao_id)
+
+        itens_vencedores = (await self.db.execute(self.lances_vencedores_statement(pregao_id=pregao.id))).all()
+
+        return self.build_itens_vencedores(pregao_id=pregao.id, itens_vencedores=itens_vencedores)
+
+
+    async def get_pregao_lances(self, pregao_id: int) -> List[models.PregaoLancesModel] | HTTPException:
+
+        pregao = await self.get_pregao_by_id(pregao_id=pregao_id)
+
+        lances: List[models.PregaoLancesModel] = (await self.db.scalars(
+            select(models.PregaoLancesModel).filter(
+                models.PregaoLancesModel.pregaoID==pregao.id
+            ).order_by(
+                models.PregaoLancesModel.dataHoraRegistro
+            )
+        )).all()
+
+        return lances
+
+
+    async def get_pregao_lances_page(self, pregao_id: int, after_id: int | None = None, limit: int | None = None) -> tuple[List[models.PregaoLancesModel], bool] | HTTPException:
+
+        pregao = await self.get_pregao_by_id(pregao_id=pregao_id)
+
+        limit = min(limit or self.LANCES_PAGINA_LIMITE_PADRAO, self.LANCES_PAGINA_LIMITE_MAXIMO)
+        after_id = after_id or 0
+        lances = await self.get_pregao_lances_after(pregao_id=pregao.id, after_id=max(after_id - self.LANCES_CURSOR_SOBREPOSICAO, 0), limit=limit + self.LANCES_CURSOR_SOBREPOSICAO + 1)
+
+        return self.lances_page(lances=lances, after_id=after_id, limit=limit)
+
+
+    async def get_pregao_lances_after(self, pregao_id: int, after_id: int, limit: int) -> List[models.PregaoLancesModel]:
+
+        lances: List[models.PregaoLancesModel] = (await self.db.scalars(self.lances_after_statement(pregao_id=pregao_id, after_id=after_id, limit=limit))).all()
+
+        return lances
+
+
+    async def get_lance_vencedor(self, pregao_id: int, item_id: int | None = None) -> schemas.PregaoLancesResponseSchema | None:
+        # O loader do livro de lances é síncrono: o banco é lido antes, apenas quando o vencedor não está em memória
+
+        vencedor = self.lances_book.peek(pregao_id=pregao_id, item_id=item_id)
+
+        if vencedor is not PregaoLancesVencedores.NAO_CARREGADO:
+            return vencedor
+
+        lance = (await self.db.scalars(self.lance_vencedor_statement(pregao_id=pregao_id, item_id=item_id))).first()
+
+        return self.lances_book.get_vencedor(pregao_id=pregao_id, item_id=item_id, loader=lambda: lance)
+
+
+    async def get_lance_contexto(self, pregao_id: int, body: schemas.PregaoLancesBodySchema) -> PregaoLanceContexto | HTTPException:
+
+        agora = datetime.now()
+        contexto = (await self.db.execute(self.lance_contexto_statement(pregao_id=pregao_id, body=body, agora=agora))).first()
+
+        return self.check_lance_contexto(contexto=contexto, agora=agora)
+
+
+    async def create_pregao_lance(self, pregao_id: int, body: schemas.PregaoLancesBodySchema) -> schemas.PregaoLancesResponseSchema | HTTPException:
+
+        contexto = await self.get_lance_contexto(pregao_id=pregao_id, body=body)
+
+        # O lance concorre apenas com os lances do mesmo Item do Pregão
+        self.validate_lance(contexto=contexto, lance_vencedor=contexto.lance_vencedor, body=body)
+
+        new_pregao_lance = self.new_pregao_lance(pregao=contexto.pregao, pregao_item=contexto.pregao_item, pregao_participante=contexto.pregao_participante, body=body)
+
+        if self.group_commit.habilitado:
+            # o group commit grava em uma thread própria: a espera pelo lote ocupa uma thread do threadpool,
+            # sem manter a conexão da requisição
+            diferenca_minima = contexto.regra.diferencaDeValorMinima
+            await self.db.rollback()
+            new_pregao_lance = await run_in_threadpool(self.group_commit.submit, lance=new_pregao_lance, diferenca_minima=diferenca_minima)
+        else:
+            new_pregao_lance = (await insert_lances_async(db=self.db, lances=[new_pregao_lance]))[0]
+            await self.db.commit()
+
+        # Atualizando o livro de lances vencedores, a janela do limitador e o feed apenas após o commit
+        self.rate_limiter.record(pregao_id=new_pregao_lance.pregaoID, participante_id=new_pregao_lance.participanteID)
+
+        if self.lances_eventos.pubsub.BLOQUEANTE:
+            await run_in_threadpool(self.publish_pregao_lance, lance=new_pregao_lance)
+        else:
+            self.publish_pregao_lance(lance=new_pregao_lance)
+
+        return new_pregao_lance
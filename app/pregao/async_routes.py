@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends, Query, Response
+from typing import List
+from .ingestion import PregaoLancesIngestor, get_lances_ingestor
+from . import async_logic
+from . import schemas
+
+# Rotas de lances com AsyncSession, incluídas antes de pregao.routes quando DB_ASYNC=1
+router = APIRouter(
+    prefix="/pregoes",
+    tags=["Pregao"]
+)
+
+@router.get("/{pregao_id}", response_model=schemas.PregaoSchema)
+async def get_pregao(pregao_id: int, logic: async_logic.PregaoLancesAsyncLogic = Depends()):
+    pregao = await logic.get_pregao_by_id(pregao_id=pregao_id)
+    return schemas.PregaoSchema.model_validate(pregao)
+
+@router.post("/{pregao_id}/lances/registrar", response_model=schemas.PregaoLancesResponseSchema)
+async def create_pregao_lance(pregao_id: int, body: schemas.PregaoLancesBodySchema, logic: async_logic.PregaoLancesAsyncLogic = Depends(), ingestor: PregaoLancesIngestor = Depends(get_lances_ingestor)):
+
+    # Com a ingestão por fila habilitada, o lance é validado e gravado pelo escritor único do Pregão
+    if ingestor.habilitado:
+        pregao_lance = await ingestor.submit(pregao_id=pregao_id, body=body)
+    else:
+        pregao_lance = await logic.create_pregao_lance(pregao_id=pregao_id, body=body)
+
+    return schemas.PregaoLancesResponseSchema.model_validate(pregao_lance)
+
+@router.get("/{pregao_id}/lances", response_model=List[schemas.PregaoLancesResponseSchema])
+async def get_pregao_lances(pregao_id: int, response: Response, after_id: int | None = Query(default=None, ge=0), limit: int | None = Query(default=None, ge=1), logic: async_logic.PregaoLancesAsyncLogic = Depends()):
+
+    # Sem cursor: histórico completo ordenado por dataHoraRegistro
+    if after_id is None and limit is None:
+        pregao_lances = await logic.get_pregao_lances(pregao_id=pregao_id)
+        return map(lambda l: schemas.PregaoLancesResponseSchema.model_validate(l), pregao_lances)
+
+    # Com cursor: lances com id maior que after_id, ordenados por id, precedidos pela sobreposição abaixo do cursor
+    # (lances gravados fora da ordem dos ids); o cliente descarta os ids já recebidos
+    pregao_lances, possui_mais = await logic.get_pregao_lances_page(pregao_id=pregao_id, after_id=after_id, limit=limit)
+
+    response.headers["X-Proximo-Cursor"] = str(max(after_id or 0, pregao_lances[-1].id if pregao_lances else 0))
+    response.headers["X-Possui-Mais"] = str(possui_mais).lower()
+
+    return map(lambda l: schemas.PregaoLancesResponseSchema.model_validate(l), pregao_lances)
+
+@router.get("/{pregao_id}/lances/vencedor", response_model=schemas.PregaoLancesResponseSchema)
+async def get_pregao_lance_vencedor(pregao_id: int, logic: async_logic.PregaoLancesAsyncLogic = Depends()):
+    pregao_lance_vencedor = await logic.get_pregao_lance_vencedor(pregao_id=pregao_id)
+    return schemas.PregaoLancesResponseSchema.model_validate(pregao_lance_vencedor)
+
+@router.get("/{pregao_id}/lances/vencedores", response_model=List[schemas.PregaoItemVencedorResponseSchema])
+async def get_pregao_lances_vencedores(pregao_id: int, logic: async_logic.PregaoLancesAsyncLogic = Depends()):
+    vencedores = await logic.get_pregao_lances_vencedores(pregao_id=pregao_id)
+    return vencedores
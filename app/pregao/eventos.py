@@ -0,0 +1,78 @@
+from utils.pubsub import PubSub, get_pubsub
+from .lances_book import PregaoLancesBook, get_lances_book
+from .rate_limit import PregaoLancesRateLimiter, get_rate_limiter
+from .feed import PregaoLancesFeed, get_lances_feed
+from . import models
+from . import schemas
+
+
+class PregaoLancesEventos:
+
+    '''
+        Eventos de lances publicados no PubSub e consumidos por todos os workers.
+
+        Eventos:
+        - LANCE: lance aceito e commitado
+        - VENCEDOR: o lance passou a ser o vencedor do seu Item
+
+        No worker que aceitou o lance, o livro de lances e o limitador já foram atualizados antes da
+        publicação; nos demais workers são atualizados ao receber o evento. O feed ao vivo de todos os
+        workers (inclusive o de origem) é alimentado pelos eventos.
+    '''
+
+    CANAL = "pregao_lances"
+
+    EVENTO_LANCE = PregaoLancesFeed.EVENTO_LANCE
+    EVENTO_VENCEDOR = PregaoLancesFeed.EVENTO_VENCEDOR
+
+    def __init__(self, pubsub: PubSub, lances_book: PregaoLancesBook, rate_limiter: PregaoLancesRateLimiter, lances_feed: PregaoLancesFeed) -> None:
+        self.pubsub: PubSub = pubsub
+        self.lances_book: PregaoLancesBook = lances_book
+        self.rate_limiter: PregaoLancesRateLimiter = rate_limiter
+        self.lances_feed: PregaoLancesFeed = lances_feed
+
+        self.pubsub.subscribe(canal=self.CANAL, handler=self.receive)
+        self.pubsub.on_perda(self.invalidate)
+
+
+    def publish_lance(self, lance: models.PregaoLancesModel | schemas.PregaoLancesResponseSchema, vencedor_alterado: bool) -> None:
+
+        payload = schemas.PregaoLancesResponseSchema.model_validate(lance).model_dump(mode="json")
+
+        self.pubsub.publish(canal=self.CANAL, dados={"evento": self.EVENTO_LANCE, "lance": payload})
+
+        if vencedor_alterado:
+            self.pubsub.publish(canal=self.CANAL, dados={"evento": self.EVENTO_VENCEDOR, "lance": payload})
+
+
+    def receive(self, dados: dict, local: bool) -> None:
+
+        lance = schemas.PregaoLancesResponseSchema.model_validate(dados["lance"])
+
+        if not local:
+            if dados["evento"] == self.EVENTO_LANCE:
+                self.lances_book.register(lance)
+                self.rate_limiter.record(pregao_id=lance.pregaoID, participante_id=lance.participanteID)
+
+            elif dados["evento"] == self.EVENTO_VENCEDOR:
+                # o vencedor conhecido pelo worker de origem vale também para um Item ainda não carregado aqui
+                self.lances_book.warm_itens(pregao_id=lance.pregaoID, vencedores={lance.itemID: lance})
+
+        self.lances_feed.publish_lance(evento=dados["evento"], lance=lance)
+
+
+    def invalidate(self) -> None:
+        # Eventos de outros workers podem ter sido perdidos: o estado é reconstruído a partir do banco
+        self.lances_book.invalidate()
+        self.rate_limiter.invalidate()
+
+
+lances_eventos = PregaoLancesEventos(
+    pubsub=get_pubsub(),
+    lances_book=get_lances_book(),
+    rate_limiter=get_rate_limiter(),
+    lances_feed=get_lances_feed()
+)
+
+def get_lances_eventos() -> PregaoLancesEventos:
+    return lances_eventos
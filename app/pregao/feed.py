@@ -0,0 +1,230 @@
+import json
+import asyncio
+from collections import deque
+from threading import Lock
+from typing import Callable, Deque, Dict, List, Set
+from fastapi import WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+from . import models
+from . import schemas
+
+
+class PregaoLancesFeedAssinante:
+
+    '''
+        Assinante (conexão WebSocket) do feed de lances de um Pregão.
+        A fila é limitada: um assinante lento tem as mensagens pendentes descartadas e recebe
+        um aviso de atraso (ATRASADO), devendo reconectar informando o último lance recebido.
+    '''
+
+    ATRASADO = object()
+    DESCONECTADO = object()
+
+    def __init__(self, pregao_id: int, loop: asyncio.AbstractEventLoop, max_pendentes: int) -> None:
+        self.pregao_id: int = pregao_id
+        self.loop: asyncio.AbstractEventLoop = loop
+        # os sinais ATRASADO e DESCONECTADO não contam no limite, por isso a fila não tem maxsize
+        self.fila: asyncio.Queue = asyncio.Queue()
+        self.max_pendentes: int = max_pendentes
+        self.atrasado: bool = False
+
+    def offer(self, lance_id: int, evento: str, mensagem: str) -> None:
+        # executado sempre no event loop do assinante
+
+        if self.atrasado:
+            return
+
+        if self.fila.qsize() >= self.max_pendentes:
+            self.atrasado = True
+
+            while not self.fila.empty():
+                self.fila.get_nowait()
+
+            self.fila.put_nowait(self.ATRASADO)
+            return
+
+        self.fila.put_nowait((lance_id, evento, mensagem))
+
+
+class PregaoLancesEnviados:
+
+    '''
+        Ids dos últimos lances enviados a um assinante (limitado), para descartar os eventos repetidos.
+        Os lances podem ser publicados fora da ordem dos ids (commits concorrentes): a comparação com
+        o maior id enviado descartaria lances ainda não entregues.
+    '''
+
+    def __init__(self, limite: int) -> None:
+        self._ordem: Deque[int] = deque()
+        self._ids: Set[int] = set()
+        self.limite: int = limite
+
+    def __contains__(self, lance_id: int) -> bool:
+        return lance_id in self._ids
+
+    def add(self, lance_id: int) -> None:
+
+        if lance_id in self._ids:
+            return
+
+        if len(self._ordem) >= self.limite:
+            self._ids.discard(self._ordem.popleft())
+
+        self._ordem.append(lance_id)
+        self._ids.add(lance_id)
+
+
+class PregaoLancesFeed:
+
+    '''
+        Distribui os lances aceitos e as mudanças de lance vencedor aos assinantes de cada Pregão.
+        Cada evento é serializado uma única vez e entregue a todos os assinantes do Pregão.
+
+        Eventos:
+        - LANCE: lance aceito
+        - VENCEDOR: o lance passou a ser o vencedor do seu Item
+    '''
+
+    EVENTO_LANCE = "LANCE"
+    EVENTO_VENCEDOR = "VENCEDOR"
+    EVENTO_ATRASADO = "ATRASADO"
+
+    MAX_PENDENTES = 256
+    REPLAY_LOTE = 500
+    # Lances repetidos entre o replay e os eventos ao vivo são publicados após a assinatura, limitados
+    # pela fila do assinante (MAX_PENDENTES): os ids mais recentes enviados bastam para descartá-los
+    ENVIADOS_LIMITE = 4096
+
+    # Código de fechamento enviado ao assinante atrasado (1013: Try Again Later)
+    WS_CLOSE_ATRASADO = 1013
+
+    def __init__(self, max_pendentes: int = MAX_PENDENTES) -> None:
+        self._lock: Lock = Lock()
+        self._assinantes: Dict[int, Set[PregaoLancesFeedAssinante]] = {}
+        self.max_pendentes: int = max_pendentes
+
+
+    def subscribe(self, pregao_id: int) -> PregaoLancesFeedAssinante:
+
+        assinante = PregaoLancesFeedAssinante(pregao_id=pregao_id, loop=asyncio.get_running_loop(), max_pendentes=self.max_pendentes)
+
+        with self._lock:
+            self._assinantes.setdefault(pregao_id, set()).add(assinante)
+
+        return assinante
+
+
+    def unsubscribe(self, assinante: PregaoLancesFeedAssinante) -> None:
+
+        with self._lock:
+            assinantes = self._assinantes.get(assinante.pregao_id, set())
+            assinantes.discard(assinante)
+
+            if not assinantes:
+                self._assinantes.pop(assinante.pregao_id, None)
+
+
+    @staticmethod
+    def lance_payload(lance: models.PregaoLancesModel | schemas.PregaoLancesResponseSchema) -> dict:
+        return schemas.PregaoLancesResponseSchema.model_validate(lance).model_dump(mode="json")
+
+
+    def publish(self, pregao_id: int, evento: dict) -> None:
+        # Pode ser chamado de qualquer thread (rotas síncronas executam no threadpool)
+
+        with self._lock:
+            assinantes = list(self._assinantes.get(pregao_id, ()))
+
+        if not assinantes:
+            return
+
+        mensagem = json.dumps(evento)
+
+        for assinante in assinantes:
+            try:
+                assinante.loop.call_soon_threadsafe(assinante.offer, evento["id"], evento["evento"], mensagem)
+            except RuntimeError:
+                # event loop encerrado, a conexão será removida ao finalizar
+                pass
+
+
+    def publish_lance(self, evento: str, lance: models.PregaoLancesModel | schemas.PregaoLancesResponseSchema) -> None:
+        # evento: EVENTO_LANCE (lance aceito) ou EVENTO_VENCEDOR (novo vencedor do Item)
+
+        payload = self.lance_payload(lance)
+
+        if evento == self.EVENTO_VENCEDOR:
+            self.publish(pregao_id=lance.pregaoID, evento={"evento": evento, "id": lance.id, "itemID": lance.itemID, "lance": payload})
+        else:
+            self.publish(pregao_id=lance.pregaoID, evento={"evento": evento, "id": lance.id, "lance": payload})
+
+
+    async def _receive(self, websocket: WebSocket, assinante: PregaoLancesFeedAssinante) -> None:
+        # Mensagens do cliente são ignoradas, a leitura serve apenas para detectar a desconexão
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            assinante.fila.put_nowait(assinante.DESCONECTADO)
+
+
+    async def serve(self, websocket: WebSocket, pregao_id: int, ultimo_id: int | None, replay: Callable[[int, int], List[models.PregaoLancesModel]]) -> None:
+        '''
+            Atende uma conexão WebSocket já aceita.
+            Com ultimo_id informado, os lances posteriores a ele são reenviados (replay) antes dos eventos ao vivo.
+            A assinatura é feita antes do replay para que nenhum lance seja perdido entre as duas etapas.
+        '''
+
+        assinante = self.subscribe(pregao_id=pregao_id)
+        receiver = asyncio.create_task(self._receive(websocket=websocket, assinante=assinante))
+        ultimo_enviado: int = ultimo_id or 0
+        enviados = PregaoLancesEnviados(limite=self.ENVIADOS_LIMITE)
+
+        try:
+            if ultimo_id is not None:
+                while True:
+                    lances = await run_in_threadpool(replay, ultimo_enviado, self.REPLAY_LOTE)
+
+                    for lance in lances:
+                        await websocket.send_text(json.dumps({"evento": self.EVENTO_LANCE, "id": lance.id, "lance": self.lance_payload(lance)}))
+                        enviados.add(lance.id)
+                        ultimo_enviado = lance.id
+
+                    if len(lances) < self.REPLAY_LOTE:
+                        break
+
+            while True:
+                item = await assinante.fila.get()
+
+                if item is assinante.DESCONECTADO:
+                    break
+
+                if item is assinante.ATRASADO:
+                    await websocket.send_text(json.dumps({"evento": self.EVENTO_ATRASADO, "ultimoID": ultimo_enviado}))
+                    await websocket.close(code=self.WS_CLOSE_ATRASADO)
+                    break
+
+                lance_id, evento, mensagem = item
+
+                if evento == self.EVENTO_LANCE:
+                    # Lances já entregues pelo replay ou recebidos novamente
+                    if lance_id in enviados:
+                        continue
+
+                    enviados.add(lance_id)
+
+                await websocket.send_text(mensagem)
+                ultimo_enviado = max(ultimo_enviado, lance_id)
+
+        except WebSocketDisconnect:
+            pass
+
+        finally:
+            receiver.cancel()
+            self.unsubscribe(assinante=assinante)
+
+
+lances_feed = PregaoLancesFeed()
+
+def get_lances_feed() -> PregaoLancesFeed:
+    return lances_feed
@@ -0,0 +1,216 @@
+import logging
+from http import HTTPStatus
+from threading import Condition, Thread
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from time import monotonic, perf_counter
+from typing import Callable, Dict, List, Tuple
+from fastapi import HTTPException
+from sqlalchemy import Insert, func, insert, select, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.instance import SessionLocal
+from environment.variables import get_settings
+from utils.http_exceptions import ResourceExpectationFailedException
+from utils.metrics import MetricsRegistry, get_metrics
+from . import models
+from . import schemas
+
+
+logger = logging.getLogger(__name__)
+
+LANCE_COLUNAS = ("pregaoID", "participanteID", "itemID", "valorLance", "dataHoraLance")
+
+def insert_lances_statement() -> Insert:
+    # Um único INSERT ... VALUES (...), (...) RETURNING para todos os lances, na ordem recebida
+    return insert(models.PregaoLancesModel).returning(models.PregaoLancesModel, sort_by_parameter_order=True)
+
+def lances_valores(lances: List[models.PregaoLancesModel]) -> List[dict]:
+    return [{coluna: getattr(lance, coluna) for coluna in LANCE_COLUNAS} for lance in lances]
+
+def insert_lances(db: Session, lances: List[models.PregaoLancesModel]) -> List[schemas.PregaoLancesResponseSchema]:
+
+    inseridos = db.scalars(insert_lances_statement(), lances_valores(lances)).all()
+
+    # snapshot antes do commit, que expira as instâncias
+    return [schemas.PregaoLancesResponseSchema.model_validate(lance) for lance in inseridos]
+
+async def insert_lances_async(db: AsyncSession, lances: List[models.PregaoLancesModel]) -> List[schemas.PregaoLancesResponseSchema]:
+
+    inseridos = (await db.scalars(insert_lances_statement(), lances_valores(lances))).all()
+
+    return [schemas.PregaoLancesResponseSchema.model_validate(lance) for lance in inseridos]
+
+
+class PregaoLancesGroupCommit:
+
+    '''
+        Group commit dos lances: os lances que chegam dentro de uma janela de poucos milissegundos
+        são gravados juntos, em uma única transação com um INSERT de várias linhas.
+        Cada requisição aguarda e recebe a sua própria linha.
+
+        - janela_ms: tempo máximo de espera pelo lote a partir do primeiro lance pendente
+        - lote_maximo: o lote é gravado imediatamente ao atingir este tamanho
+        - timeout: espera máxima da requisição pelo commit do seu lote
+        - A requisição deve devolver a conexão da sua sessão ao pool antes de submit(): o lote é gravado
+          com outra conexão do mesmo pool
+        - Os lances são validados novamente no lote, em ordem, contra o vencedor de cada Item: o vencedor
+          commitado (lido no início do lote) atualizado pelos lances já aceitos no próprio lote. Os lotes
+          de um processo são gravados um por vez, mas lotes de workers diferentes (uvicorn --workers) ainda
+          podem aceitar lances iguais concorrentes
+        - Uma falha inesperada do coletor rejeita os lances do lote em andamento e o coletor é reiniciado
+    '''
+
+    def __init__(self, habilitado: bool, janela_ms: float, lote_maximo: int, metrics: MetricsRegistry, timeout: float = 10, session_factory: Callable[[], Session] = SessionLocal) -> None:
+        self.habilitado: bool = habilitado
+        self.janela: float = janela_ms / 1000
+        self.lote_maximo: int = lote_maximo
+        self.timeout: float = timeout
+        self.session_factory: Callable[[], Session] = session_factory
+
+        self._cond: Condition = Condition()
+        self._pendentes: List[Tuple[models.PregaoLancesModel, float, Future]] = []
+        self._thread: Thread | None = None
+
+        self.tamanho_lote = metrics.histogram("pregao_lances_group_commit_lote_tamanho", "Lances por transação", buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500))
+        self.latencia_flush = metrics.histogram("pregao_lances_group_commit_flush_segundos", "Duração do INSERT + COMMIT de cada lote")
+        self.timeouts = metrics.counter("pregao_lances_group_commit_timeouts_total", "Lances sem confirmação do lote dentro do timeout")
+        self.reinicios = metrics.counter("pregao_lances_group_commit_reinicios_total", "Falhas inesperadas do coletor de lotes")
+
+
+    def submit(self, lance: models.PregaoLancesModel, diferenca_minima: float) -> schemas.PregaoLancesResponseSchema | HTTPException:
+        # Bloqueia a thread da requisição até o commit do lote que contém o lance (no máximo timeout segundos)
+
+        futuro: Future = Future()
+
+        with self._cond:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = Thread(target=self._run, name="pregao-lances-group-commit", daemon=True)
+                self._thread.start()
+
+            self._pendentes.append((lance, diferenca_minima, futuro))
+            self._cond.notify()
+
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self.timeouts.inc()
+
+        # Ainda pendente: o lance é retirado da fila e não será gravado
+        if futuro.cancel():
+            raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail="Lance não gravado: tempo de espera do lote excedido")
+
+        # O lote já está sendo gravado (limitado pelo pool_timeout e pelo statement_timeout)
+        try:
+            return futuro.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise HTTPException(status_code=HTTPStatus.GATEWAY_TIMEOUT, detail="Gravação do lance não confirmada, consulte os lances do Pregão")
+
+
+    def _run(self) -> None:
+
+        while True:
+            lote: List[Tuple[models.PregaoLancesModel, float, Future]] = []
+
+            try:
+                lote = self.collect()
+                self.flush(lote)
+
+            except Exception as error:
+                # O coletor continua: apenas os lances deste lote são rejeitados
+                logger.exception("Erro no group commit dos lances, lote de %d lances rejeitado", len(lote))
+                self.reinicios.inc()
+
+                for _, _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(error)
+
+
+    def collect(self) -> List[Tuple[models.PregaoLancesModel, float, Future]]:
+
+        with self._cond:
+            while not self._pendentes:
+                self._cond.wait()
+
+            # Janela de agrupamento a partir do primeiro lance pendente
+            limite = monotonic() + self.janela
+            while len(self._pendentes) < self.lote_maximo:
+                restante = limite - monotonic()
+                if restante <= 0:
+                    break
+                self._cond.wait(restante)
+
+            lote = self._pendentes[:self.lote_maximo]
+            del self._pendentes[:self.lote_maximo]
+
+        # Lances cancelados por timeout da requisição não são gravados; os demais não podem mais ser cancelados
+        return [pendente for pendente in lote if pendente[2].set_running_or_notify_cancel()]
+
+
+    def validate_lote(self, db: Session, lote: List[Tuple[models.PregaoLancesModel, float, Future]]) -> List[Tuple[models.PregaoLancesModel, Future]]:
+        # Mesmas regras de valor de validate_lance, contra o vencedor commitado atualizado pelos lances aceitos no lote
+
+        itens = {(lance.pregaoID, lance.itemID) for lance, _, _ in lote}
+
+        vencedores: Dict[Tuple[int, int], float] = {
+            (pregao_id, item_id): valor for pregao_id, item_id, valor in db.execute(
+                select(models.PregaoLancesModel.pregaoID, models.PregaoLancesModel.itemID, func.min(models.PregaoLancesModel.valorLance)).filter(
+                    tuple_(models.PregaoLancesModel.pregaoID, models.PregaoLancesModel.itemID).in_(itens)
+                ).group_by(models.PregaoLancesModel.pregaoID, models.PregaoLancesModel.itemID)
+            )
+        }
+
+        aceitos: List[Tuple[models.PregaoLancesModel, Future]] = []
+
+        for lance, diferenca_minima, futuro in lote:
+            vencedor = vencedores.get((lance.pregaoID, lance.itemID))
+
+            if vencedor is not None and (lance.valorLance >= vencedor or vencedor - lance.valorLance < diferenca_minima):
+                futuro.set_exception(ResourceExpectationFailedException())
+                continue
+
+            vencedores[(lance.pregaoID, lance.itemID)] = lance.valorLance
+            aceitos.append((lance, futuro))
+
+        return aceitos
+
+
+    def flush(self, lote: List[Tuple[models.PregaoLancesModel, float, Future]]) -> None:
+
+        if not lote:
+            return
+
+        inicio = perf_counter()
+        db = self.session_factory()
+        aceitos: List[Tuple[models.PregaoLancesModel, Future]] = []
+
+        try:
+            aceitos = self.validate_lote(db=db, lote=lote)
+            inseridos = insert_lances(db=db, lances=[lance for lance, _ in aceitos]) if aceitos else []
+            db.commit()
+
+        except Exception as error:
+            db.rollback()
+            for _, _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(error)
+            return
+
+        finally:
+            db.close()
+            self.tamanho_lote.observe(len(aceitos))
+            self.latencia_flush.observe(perf_counter() - inicio)
+
+        for (_, futuro), lance in zip(aceitos, inseridos):
+            futuro.set_result(lance)
+
+
+lances_group_commit = PregaoLancesGroupCommit(
+    habilitado=get_settings().lances_group_commit,
+    janela_ms=get_settings().lances_group_commit_janela_ms,
+    lote_maximo=get_settings().lances_group_commit_lote_maximo,
+    metrics=get_metrics(),
+    timeout=get_settings().lances_group_commit_timeout_segundos
+)
+
+def get_lances_group_commit() -> PregaoLancesGroupCommit:
+    return lances_group_commit
@@ -0,0 +1,162 @@
+import asyncio
+from typing import Callable, Dict, List
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from database.instance import SessionLocal
+from environment.variables import get_settings
+from dependences import get_container
+from .group_commit import insert_lances
+from . import logic
+from . import models
+from . import schemas
+
+
+def build_lances_logic(db: Session) -> logic.PregaoLancesLogic:
+    # Monta o PregaoLancesLogic fora de uma requisição (sem o Depends do FastAPI)
+    return get_container().build(logic.PregaoLancesLogic, db=db)
+
+
+class PregaoLancesIngestor:
+
+    '''
+        Ingestão de lances com um único escritor por Pregão.
+
+        - Cada Pregão possui uma fila ordenada e uma task que a consome
+        - Os lances são validados em ordem contra o vencedor do livro de lances (em memória; lido do banco
+          apenas enquanto o Item não está carregado) e os lances já aceitos no próprio lote, e gravados em lotes,
+          em uma única transação por lote. A consulta de contexto (Pregão, Regra, Item, Participante e lances
+          recentes do Fornecedor) continua sendo executada para cada lance
+        - Pregões diferentes são processados em paralelo
+        - Cada requisição aguarda o resultado (aceite ou rejeição) do seu próprio lance
+        - O escritor único vale por processo: com vários workers (uvicorn --workers), ou com
+          PREGAO_LANCES_INGESTAO_FILA desabilitado, lances concorrentes de processos diferentes ainda podem
+          superar o mesmo vencedor desatualizado (o livro de lances dos demais workers é atualizado pelos
+          eventos, após o commit)
+    '''
+
+    LOTE_MAXIMO = 50
+    # Tempo sem lances após o qual a task do Pregão é encerrada
+    OCIOSO_SEGUNDOS = 60
+
+    def __init__(self, habilitado: bool, session_factory: Callable[[], Session] = SessionLocal) -> None:
+        self.habilitado: bool = habilitado
+        self.session_factory: Callable[[], Session] = session_factory
+        self._filas: Dict[int, asyncio.Queue] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+
+    async def submit(self, pregao_id: int, body: schemas.PregaoLancesBodySchema) -> schemas.PregaoLancesResponseSchema:
+
+        fila = self._filas.get(pregao_id)
+
+        if fila is None:
+            fila = self._filas[pregao_id] = asyncio.Queue()
+            self._tasks[pregao_id] = asyncio.create_task(self._worker(pregao_id=pregao_id, fila=fila))
+
+        resultado = asyncio.get_running_loop().create_future()
+        fila.put_nowait((body, resultado))
+
+        return await resultado
+
+
+    async def _worker(self, pregao_id: int, fila: asyncio.Queue) -> None:
+
+        while True:
+            try:
+                pedidos = [await asyncio.wait_for(fila.get(), timeout=self.OCIOSO_SEGUNDOS)]
+            except asyncio.TimeoutError:
+                # nenhum await entre a verificação e a remoção: submit() não pode intercalar aqui
+                if fila.empty():
+                    del self._filas[pregao_id]
+                    del self._tasks[pregao_id]
+                    return
+                continue
+
+            while len(pedidos) < self.LOTE_MAXIMO and not fila.empty():
+                pedidos.append(fila.get_nowait())
+
+            try:
+                resultados = await run_in_threadpool(self.process_lote, pregao_id, [body for body, _ in pedidos])
+            except Exception as error:
+                resultados = [error] * len(pedidos)
+
+            for (_, futuro), resultado in zip(pedidos, resultados):
+                if futuro.done():
+                    continue
+
+                if isinstance(resultado, BaseException):
+                    futuro.set_exception(resultado)
+                else:
+                    futuro.set_result(resultado)
+
+
+    def process_lote(self, pregao_id: int, lote: List[schemas.PregaoLancesBodySchema]) -> List[schemas.PregaoLancesResponseSchema | HTTPException]:
+        # Executado no threadpool: valida em ordem e grava os lances aceitos em uma única transação
+
+        db = self.session_factory()
+        lances_logic = build_lances_logic(db=db)
+
+        resultados: List[models.PregaoLancesModel | HTTPException] = []
+        aceitos: List[models.PregaoLancesModel] = []
+        # vencedores e lances por Fornecedor ainda não commitados neste lote
+        vencedores_pendentes: Dict[int, models.PregaoLancesModel] = {}
+        lances_pendentes: Dict[int, int] = {}
+
+        try:
+            for body in lote:
+                try:
+                    contexto = lances_logic.get_lance_contexto(pregao_id=pregao_id, body=body)
+
+                    # vencedor do livro de lances, ou o último lance aceito neste lote
+                    lance_vencedor = vencedores_pendentes.get(contexto.pregao_item.id) or contexto.lance_vencedor
+
+                    lances_logic.validate_lance(
+                        contexto=contexto,
+                        lance_vencedor=lance_vencedor,
+                        body=body,
+                        lances_pendentes=lances_pendentes.get(contexto.pregao_participante.id, 0)
+                    )
+
+                except HTTPException as error:
+                    resultados.append(error)
+                    continue
+
+                pregao_item, pregao_participante = contexto.pregao_item, contexto.pregao_participante
+                new_pregao_lance = lances_logic.new_pregao_lance(pregao=contexto.pregao, pregao_item=pregao_item, pregao_participante=pregao_participante, body=body)
+
+                # o lance já conta para os próximos lances do lote
+                vencedores_pendentes[pregao_item.id] = new_pregao_lance
+                lances_pendentes[pregao_participante.id] = lances_pendentes.get(pregao_participante.id, 0) + 1
+                lances_logic.rate_limiter.record(pregao_id=pregao_id, participante_id=pregao_participante.id)
+
+                aceitos.append(new_pregao_lance)
+                resultados.append(new_pregao_lance)
+
+            # um único INSERT de várias linhas com RETURNING e um único commit para o lote
+            inseridos = insert_lances(db=db, lances=aceitos) if aceitos else []
+            db.commit()
+
+        except Exception:
+            db.rollback()
+            # o estado em memória pode ter divergido do banco, será reconstruído no próximo acesso
+            lances_logic.lances_book.invalidate(pregao_id=pregao_id)
+            lances_logic.rate_limiter.invalidate(pregao_id=pregao_id)
+            raise
+
+        finally:
+            db.close()
+
+        snapshots = dict(zip(map(id, aceitos), inseridos))
+        resultados = [snapshots[id(resultado)] if isinstance(resultado, models.PregaoLancesModel) else resultado for resultado in resultados]
+
+        for lance in inseridos:
+            lances_logic.publish_pregao_lance(lance=lance)
+
+        return resultados
+
+
+lances_ingestor = PregaoLancesIngestor(habilitado=get_settings().lances_ingestao_fila)
+
+def get_lances_ingestor() -> PregaoLancesIngestor:
+    return lances_ingestor
@@ -0,0 +1,143 @@
+from threading import Lock
+from typing import Callable, Dict
+from . import models
+from . import schemas
+
+
+class PregaoLancesVencedores:
+
+    '''
+        Lances vencedores conhecidos de um Pregão: o vencedor geral e o vencedor de cada Item do Pregão.
+        Um valor ausente no dicionário de itens (ou NAO_CARREGADO no vencedor geral) indica que o
+        vencedor ainda não foi lido do banco; None indica que não há lances.
+    '''
+
+    NAO_CARREGADO = object()
+
+    def __init__(self) -> None:
+        self.vencedor: schemas.PregaoLancesResponseSchema | None | object = self.NAO_CARREGADO
+        self.itens: Dict[int, schemas.PregaoLancesResponseSchema | None] = {}
+
+
+class PregaoLancesBook:
+
+    '''
+        Livro em memória, local ao processo, com o lance vencedor de cada Pregão e de cada Item do Pregão.
+
+        - O vencedor é lido do banco no primeiro acesso e mantido em memória
+        - Cada lance registrado atualiza o livro após o commit
+        - invalidate() descarta o estado, que é reconstruído a partir da tabela PREGAO_PREGOES_LANCES no próximo acesso
+    '''
+
+    def __init__(self) -> None:
+        self._lock: Lock = Lock()
+        self._pregoes: Dict[int, PregaoLancesVencedores] = {}
+
+
+    @staticmethod
+    def lance_key(lance: schemas.PregaoLancesResponseSchema | models.PregaoLancesModel) -> tuple:
+        # mesma ordenação utilizada na consulta do lance vencedor
+        return (lance.valorLance, lance.dataHoraLance, lance.dataHoraRegistro, lance.id)
+
+
+    def is_better(self, lance: schemas.PregaoLancesResponseSchema, atual: schemas.PregaoLancesResponseSchema | None) -> bool:
+        return atual is None or self.lance_key(lance) < self.lance_key(atual)
+
+
+    def peek(self, pregao_id: int, item_id: int | None = None) -> schemas.PregaoLancesResponseSchema | None | object:
+        # Vencedor em memória, sem consultar o banco; NAO_CARREGADO quando ainda não foi lido
+
+        with self._lock:
+            pregao = self._pregoes.get(pregao_id)
+
+            if pregao is None:
+                return PregaoLancesVencedores.NAO_CARREGADO
+
+            if item_id is None:
+                return pregao.vencedor
+
+            return pregao.itens.get(item_id, PregaoLancesVencedores.NAO_CARREGADO)
+
+
+    def get_vencedor(self, pregao_id: int, loader: Callable[[], models.PregaoLancesModel | None], item_id: int | None = None) -> schemas.PregaoLancesResponseSchema | None:
+
+        with self._lock:
+            pregao = self._pregoes.get(pregao_id)
+
+            if pregao is not None:
+                if item_id is None and pregao.vencedor is not PregaoLancesVencedores.NAO_CARREGADO:
+                    return pregao.vencedor
+
+                if item_id is not None and item_id in pregao.itens:
+                    return pregao.itens[item_id]
+
+        # Lendo do banco fora do lock para não bloquear os demais Pregões
+        lance = loader()
+        snapshot = schemas.PregaoLancesResponseSchema.model_validate(lance) if lance is not None else None
+
+        with self._lock:
+            pregao = self._pregoes.setdefault(pregao_id, PregaoLancesVencedores())
+
+            # Um lance pode ter sido registrado enquanto a consulta executava, mantendo o melhor dos dois
+            if item_id is None:
+                if pregao.vencedor is PregaoLancesVencedores.NAO_CARREGADO or (snapshot is not None and self.is_better(snapshot, pregao.vencedor)):
+                    pregao.vencedor = snapshot
+                return pregao.vencedor
+
+            atual = pregao.itens.get(item_id, PregaoLancesVencedores.NAO_CARREGADO)
+            if atual is PregaoLancesVencedores.NAO_CARREGADO or (snapshot is not None and self.is_better(snapshot, atual)):
+                pregao.itens[item_id] = snapshot
+            return pregao.itens[item_id]
+
+
+    def warm_itens(self, pregao_id: int, vencedores: Dict[int, models.PregaoLancesModel | None]) -> None:
+        # Carrega de uma só vez os vencedores dos Itens do Pregão (item sem lances -> None)
+
+        with self._lock:
+            pregao = self._pregoes.setdefault(pregao_id, PregaoLancesVencedores())
+
+            for item_id, lance in vencedores.items():
+                snapshot = schemas.PregaoLancesResponseSchema.model_validate(lance) if lance is not None else None
+                atual = pregao.itens.get(item_id, PregaoLancesVencedores.NAO_CARREGADO)
+
+                if atual is PregaoLancesVencedores.NAO_CARREGADO or (snapshot is not None and self.is_better(snapshot, atual)):
+                    pregao.itens[item_id] = snapshot
+
+
+    def register(self, lance: models.PregaoLancesModel) -> bool:
+        # Retorna True quando o lance passa a ser o vencedor do Pregão ou do Item
+
+        snapshot = schemas.PregaoLancesResponseSchema.model_validate(lance)
+        changed = False
+
+        with self._lock:
+            pregao = self._pregoes.get(snapshot.pregaoID)
+
+            # Sem estado carregado não há como saber se o lance é o vencedor, o próximo acesso lerá do banco
+            if pregao is None:
+                return False
+
+            if pregao.vencedor is not PregaoLancesVencedores.NAO_CARREGADO and self.is_better(snapshot, pregao.vencedor):
+                pregao.vencedor = snapshot
+                changed = True
+
+            if snapshot.itemID in pregao.itens and self.is_better(snapshot, pregao.itens[snapshot.itemID]):
+                pregao.itens[snapshot.itemID] = snapshot
+                changed = True
+
+        return changed
+
+
+    def invalidate(self, pregao_id: int | None = None) -> None:
+
+        with self._lock:
+            if pregao_id is None:
+                self._pregoes.clear()
+            else:
+                self._pregoes.pop(pregao_id, None)
+
+
+lances_book = PregaoLancesBook()
+
+def get_lances_book() -> PregaoLancesBook:
+    return lances_book
@@ -1,9 +1,11 @@
 from fastapi import Depends, HTTPException
 from database.instance import get_db
-from sqlalchemy.orm import Session
-from sqlalchemy import asc
+from database.loader import get_loader
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import Row, Select, asc, bindparam, func, insert, literal, null, select, true, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from utils.http_exceptions import NoContentException, ResourceNotFoundException, ResourceConflictException, ResourceExpectationFailedException
-from typing import List
+from typing import Callable, List, NamedTuple
 from itertools import chain
 from collections import defaultdict
 from http import HTTPStatus
@@ -13,10 +15,33 @@ from usuarios.models import UserModel
 from solicitacoes.logic import SolicitacaoLogic, SolicitacaoItensLogic, SolicitacaoParticipantesLogic
 from solicitacoes.models import SolicitacoesModel, SolicitacoesItensModel, SolicitacoesParticipantesModel
 from itens.logic import ItensLogic, ItensUnidadesLogic
+from .lances_book import PregaoLancesBook, PregaoLancesVencedores, get_lances_book
+from .rate_limit import PregaoLancesRateLimiter, get_rate_limiter
+from .eventos import PregaoLancesEventos, get_lances_eventos
+from .group_commit import PregaoLancesGroupCommit, get_lances_group_commit, insert_lances
 from . import models
 from . import schemas
 import copy
 
+# Consultas frequentes montadas uma única vez, com parâmetros nomeados (bindparam): a cada chamada apenas os
+# valores são informados e o SQL compilado vem do cache do engine, sem reconstruir um Query
+
+PARTICIPANTE_BY_USUARIO_PREGAO_STATEMENT = select(models.PregaoParticipantesModel).filter(
+    models.PregaoParticipantesModel.pregaoID==bindparam("pregao_id"),
+    models.PregaoParticipantesModel.usuarioID==bindparam("usuario_id")
+).limit(1)
+
+PREGAO_ITEM_BY_PREGAO_ITEM_STATEMENT = select(models.PregaoItensModel).filter(
+    models.PregaoItensModel.pregaoID==bindparam("pregao_id"),
+    models.PregaoItensModel.itemID==bindparam("item_id")
+).limit(1)
+
+PREGAO_ITEM_DEMANDA_ATUAL_STATEMENT = select(models.PregaoItensModel).filter(
+    models.PregaoItensModel.pregaoID==bindparam("pregao_id"),
+    models.PregaoItensModel.itemID==bindparam("item_id"),
+    models.PregaoItensModel.demandaAtual==True
+).limit(1)
+
 
 class PregaoRegrasLancesLogic:
 
@@ -56,9 +81,7 @@ class PregaoRegrasLancesLogic:
 
     def get_regra_lances_by_id(self, regra_id: int) -> models.PregaoLancesRegrasModel:
         
-        regra: models.PregaoLancesRegrasModel = self.db.query(models.PregaoLancesRegrasModel).filter(
-            models.PregaoLancesRegrasModel.id == regra_id
-        ).first()
+        regra: models.PregaoLancesRegrasModel = get_loader(self.db).get(models.PregaoLancesRegrasModel, regra_id)
 
         if regra == None:
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"Não há Regra de Lance cadastrada com o ID: {regra_id}")
@@ -102,7 +125,7 @@ class PregaoLogic:
 
 
     def get_pregao_by_id(self, pregao_id: int) -> models.PregaoModel | HTTPException:
-        pregao = self.db.query(models.PregaoModel).filter(models.PregaoModel.id == pregao_id).first()
+        pregao = get_loader(self.db).get(models.PregaoModel, pregao_id)
         
         if pregao is None:
             raise ResourceNotFoundException()
@@ -166,10 +189,19 @@ class PregaoParticipantesLogic:
         - Remoção de um Comprador de um Pregão
         - Inclusão de um Fornecedor em um Pregão
         - Remoção de um Fornecedor de um Pregão
+        - Inscrição em lote de Compradores e Fornecedores, com o resultado de cada inscrição
     '''
 
     PARTICIPANTE_COMPRADOR_TIPO = "COMPRADOR"
     PARTICIPANTE_FORNECEDOR_TIPO = "FORNECEDOR"
+    PARTICIPANTE_TIPOS = (PARTICIPANTE_COMPRADOR_TIPO, PARTICIPANTE_FORNECEDOR_TIPO)
+
+    INSCRICAO_INSCRITO = "INSCRITO"
+    INSCRICAO_JA_INSCRITO = "JA_INSCRITO"
+    INSCRICAO_CONFLITO = "CONFLITO"
+    INSCRICAO_USUARIO_NAO_ENCONTRADO = "USUARIO_NAO_ENCONTRADO"
+    INSCRICAO_TIPO_INVALIDO = "TIPO_INVALIDO"
+    INSCRICAO_DUPLICADO = "DUPLICADO"
 
     def __init__(self,
                  db: Session = Depends(get_db),
@@ -183,9 +215,7 @@ class PregaoParticipantesLogic:
 
     def get_pregao_participante_by_id(self, pregao_participante_id: int) -> models.PregaoParticipantesModel | HTTPException:
 
-        pregao_participante = self.db.query(models.PregaoParticipantesModel).filter(
-            models.PregaoParticipantesModel.id==pregao_participante_id
-        ).first()
+        pregao_participante = get_loader(self.db).get(models.PregaoParticipantesModel, pregao_participante_id)
 
         if pregao_participante == None:
             raise ResourceNotFoundException()
@@ -207,10 +237,7 @@ class PregaoParticipantesLogic:
 
     def get_participante_by_usuario_pregao(self, pregao_id: int, usuario_id: int) -> models.PregaoParticipantesModel | HTTPException:
         
-        participante: models.PregaoParticipantesModel = self.db.query(models.PregaoParticipantesModel).filter(
-            models.PregaoParticipantesModel.pregaoID==pregao_id,
-            models.PregaoParticipantesModel.usuarioID==usuario_id
-        ).first()
+        participante: models.PregaoParticipantesModel = self.db.scalars(PARTICIPANTE_BY_USUARIO_PREGAO_STATEMENT, {"pregao_id": pregao_id, "usuario_id": usuario_id}).first()
 
         if participante == None:
             raise NoContentException()
@@ -220,19 +247,16 @@ class PregaoParticipantesLogic:
 
     def participante_already_setted(self, pregao_id: int, usuario_id: int) -> bool:
 
-        participante: models.PregaoParticipantesModel = self.db.query(models.PregaoParticipantesModel).filter(
-            models.PregaoParticipantesModel.pregaoID==pregao_id,
-            models.PregaoParticipantesModel.usuarioID==usuario_id
-        ).first()
+        participante: models.PregaoParticipantesModel = self.db.scalars(PARTICIPANTE_BY_USUARIO_PREGAO_STATEMENT, {"pregao_id": pregao_id, "usuario_id": usuario_id}).first()
 
         return participante != None
 
 
     def create_pregao_participante(self, pregao_id: int, usuario_id: int, participante_tipo: str) -> models.PregaoParticipantesModel | HTTPException:
 
-        if self.participante_already_setted(pregao_id=pregao_id, usuario_id=usuario_id):
+        participante: models.PregaoParticipantesModel = self.db.scalars(PARTICIPANTE_BY_USUARIO_PREGAO_STATEMENT, {"pregao_id": pregao_id, "usuario_id": usuario_id}).first()
 
-            participante: models.PregaoParticipantesModel = self.get_participante_by_usuario_pregao(pregao_id=pregao_id, usuario_id=usuario_id)
+        if participante != None:
             
             if participante.participanteTipo != participante_tipo:
                 raise HTTPException(status_code=409, detail=f"Não é possível definir Usuário {usuario_id} como {participante_tipo}, Usuário já cadastrado como {participante.participanteTipo}")
@@ -255,6 +279,85 @@ class PregaoParticipantesLogic:
         return new_pregao_participante
     
 
+    def create_pregao_participantes_lote(self, pregao_id: int, body: schemas.PregaoParticipantesLoteBodySchema) -> schemas.PregaoParticipantesLoteResponseSchema | HTTPException:
+
+        pregao: models.PregaoModel = self.pregao_logic.get_pregao_by_id(pregao_id=pregao_id)
+
+        # Validando todos os Usuários em uma única consulta
+        usuarios_existentes = self.user_logic.get_existing_user_ids(user_ids=list({inscricao.usuarioID for inscricao in body.participantes}))
+
+        resultados: List[schemas.PregaoParticipanteInscricaoResultadoSchema] = []
+        inscricoes: dict[int, schemas.PregaoParticipanteInscricaoResultadoSchema] = {}
+
+        for inscricao in body.participantes:
+
+            resultado = schemas.PregaoParticipanteInscricaoResultadoSchema(usuarioID=inscricao.usuarioID, participanteTipo=inscricao.participanteTipo, status=self.INSCRICAO_INSCRITO)
+            resultados.append(resultado)
+
+            if inscricao.participanteTipo not in self.PARTICIPANTE_TIPOS:
+                resultado.status = self.INSCRICAO_TIPO_INVALIDO
+                resultado.detalhe = f"Tipo de Participante {inscricao.participanteTipo} inválido, utilize {' ou '.join(self.PARTICIPANTE_TIPOS)}"
+
+            elif inscricao.usuarioID not in usuarios_existentes:
+                resultado.status = self.INSCRICAO_USUARIO_NAO_ENCONTRADO
+                resultado.detalhe = f"Usuário {inscricao.usuarioID} não existe"
+
+            elif inscricao.usuarioID in inscricoes:
+                # Usuário repetido na requisição: vale a primeira inscrição
+                anterior = inscricoes[inscricao.usuarioID]
+                resultado.status = self.INSCRICAO_DUPLICADO if anterior.participanteTipo == inscricao.participanteTipo else self.INSCRICAO_CONFLITO
+                resultado.detalhe = f"Usuário {inscricao.usuarioID} já informado como {anterior.participanteTipo} nesta requisição"
+
+            else:
+                inscricoes[inscricao.usuarioID] = resultado
+
+        if inscricoes:
+
+            # Um único INSERT; Usuários que já participam do Pregão não são inseridos (constraint pregaoID, usuarioID)
+            inseridos: dict[int, int] = dict(self.db.execute(
+                pg_insert(models.PregaoParticipantesModel).values([{
+                    "pregaoID": pregao.id,
+                    "usuarioID": usuario_id,
+                    "participanteTipo": resultado.participanteTipo
+                } for usuario_id, resultado in inscricoes.items()])
+                .on_conflict_do_nothing(index_elements=["pregaoID", "usuarioID"])
+                .returning(models.PregaoParticipantesModel.usuarioID, models.PregaoParticipantesModel.id)
+            ).all())
+
+            for usuario_id, participante_id in inseridos.items():
+                inscricoes[usuario_id].participanteID = participante_id
+
+            ja_inscritos = [usuario_id for usuario_id in inscricoes if usuario_id not in inseridos]
+
+            if ja_inscritos:
+                participantes: List[models.PregaoParticipantesModel] = self.db.scalars(select(models.PregaoParticipantesModel).filter(
+                    models.PregaoParticipantesModel.pregaoID==pregao.id,
+                    models.PregaoParticipantesModel.usuarioID.in_(ja_inscritos)
+                )).all()
+
+                for participante in participantes:
+                    resultado = inscricoes[participante.usuarioID]
+                    resultado.participanteID = participante.id
+
+                    if participante.participanteTipo == resultado.participanteTipo:
+                        resultado.status = self.INSCRICAO_JA_INSCRITO
+                    else:
+                        resultado.status = self.INSCRICAO_CONFLITO
+                        resultado.detalhe = f"Não é possível definir Usuário {participante.usuarioID} como {resultado.participanteTipo}, Usuário já cadastrado como {participante.participanteTipo}"
+
+            self.db.commit()
+
+        for resultado in resultados:
+            if resultado.status == self.INSCRICAO_DUPLICADO:
+                resultado.participanteID = inscricoes[resultado.usuarioID].participanteID
+
+        return schemas.PregaoParticipantesLoteResponseSchema(
+            pregaoID=pregao.id,
+            inscritos=sum(1 for resultado in resultados if resultado.status == self.INSCRICAO_INSCRITO),
+            resultados=resultados
+        )
+
+
     def create_pregao_participante_comprador(self, pregao_id: int, body: schemas.PregaoParticipanteBodySchema) -> models.PregaoParticipantesModel | HTTPException:
         return self.create_pregao_participante(pregao_id=pregao_id, usuario_id=body.usuarioID, participante_tipo=self.PARTICIPANTE_COMPRADOR_TIPO)
 
@@ -293,9 +396,7 @@ class PregaoItensLogic:
     
     def get_pregao_item_by_id(self, pregao_item_id: int) -> models.PregaoItensModel | HTTPException:
 
-        pregao_item = self.db.query(models.PregaoItensModel).filter(
-            models.PregaoItensModel.id==pregao_item_id
-        ).first()
+        pregao_item = get_loader(self.db).get(models.PregaoItensModel, pregao_item_id)
 
         if pregao_item == None:
             raise ResourceNotFoundException()
@@ -304,10 +405,7 @@ class PregaoItensLogic:
     
     def get_pregao_item_using_pregao_item(self, pregao_id: int, item_id: int) -> models.PregaoItensModel | HTTPException:
 
-        pregao_item = self.db.query(models.PregaoItensModel).filter(
-            models.PregaoItensModel.pregaoID==pregao_id,
-            models.PregaoItensModel.itemID==item_id
-        ).first()
+        pregao_item = self.db.scalars(PREGAO_ITEM_BY_PREGAO_ITEM_STATEMENT, {"pregao_id": pregao_id, "item_id": item_id}).first()
 
         if pregao_item == None:
             raise ResourceNotFoundException()
@@ -316,20 +414,13 @@ class PregaoItensLogic:
     
     def get_item_demanda_atual(self, pregao_id: int, item_id: int) -> models.PregaoItensModel | None:
 
-        item_demanda_atual: models.PregaoItensModel = self.db.query(models.PregaoItensModel).filter(
-            models.PregaoItensModel.pregaoID==pregao_id,
-            models.PregaoItensModel.itemID==item_id,
-            models.PregaoItensModel.demandaAtual==True
-        ).first()
+        item_demanda_atual: models.PregaoItensModel = self.db.scalars(PREGAO_ITEM_DEMANDA_ATUAL_STATEMENT, {"pregao_id": pregao_id, "item_id": item_id}).first()
 
         return item_demanda_atual
 
     def pregao_item_already_setted(self, pregao_id: int, item_id: int) -> bool:
 
-        pregao_item = self.db.query(models.PregaoItensModel).filter(
-            models.PregaoItensModel.pregaoID==pregao_id,
-            models.PregaoItensModel.itemID==item_id
-        ).first()
+        pregao_item = self.db.scalars(PREGAO_ITEM_BY_PREGAO_ITEM_STATEMENT, {"pregao_id": pregao_id, "item_id": item_id}).first()
 
         return pregao_item != None 
 
@@ -435,9 +526,258 @@ class PregaoItensLogic:
         self.db.refresh(pregao_item)
 
         return pregao_item
-    
 
-class PregaoLancesLogic: 
+
+class PregaoLanceContexto(NamedTuple):
+
+    '''
+        Entidades referenciadas por um lance, carregadas em uma única consulta para a validação
+    '''
+
+    pregao: models.PregaoModel
+    regra: models.PregaoLancesRegrasModel
+    pregao_item: models.PregaoItensModel
+    pregao_participante: models.PregaoParticipantesModel
+    lance_vencedor: schemas.PregaoLancesResponseSchema | None
+    # lances do Fornecedor no intervalo da Regra, contados a partir de 'agora'
+    lances_recentes: int
+    agora: datetime
+
+
+class PregaoLancesBaseLogic:
+
+    '''
+        Consultas e regras de Lances compartilhadas entre PregaoLancesLogic (Session)
+        e PregaoLancesAsyncLogic (AsyncSession).
+        As subclasses definem lances_book, rate_limiter e lances_eventos.
+    '''
+
+    LANCES_PAGINA_LIMITE_PADRAO = 100
+    LANCES_PAGINA_LIMITE_MAXIMO = 1000
+    # Ids reconsultados abaixo do cursor: os ids são atribuídos na inserção, mas os lances ficam visíveis
+    # na ordem de commit, e um lance com id menor pode ser gravado depois de uma página já lida
+    LANCES_CURSOR_SOBREPOSICAO = 100
+
+    lances_book: PregaoLancesBook
+    rate_limiter: PregaoLancesRateLimiter
+    lances_eventos: PregaoLancesEventos
+
+
+    @staticmethod
+    def lance_vencedor_statement(pregao_id: int, item_id: int | None = None) -> Select:
+
+        statement = select(models.PregaoLancesModel).filter(
+            models.PregaoLancesModel.pregaoID==pregao_id
+        )
+
+        if item_id is not None:
+            statement = statement.filter(models.PregaoLancesModel.itemID==item_id)
+
+        return statement.order_by(
+            asc(models.PregaoLancesModel.valorLance), asc(models.PregaoLancesModel.dataHoraLance), asc(models.PregaoLancesModel.dataHoraRegistro), asc(models.PregaoLancesModel.id)
+        ).limit(1)
+
+
+    @staticmethod
+    def lances_vencedores_statement(pregao_id: int) -> Select:
+
+        # Lance vencedor de cada Item em uma única consulta (DISTINCT ON apoiado pelo índice pregaoID, itemID, valorLance, dataHoraLance)
+        vencedores_subquery = (
+            select(models.PregaoLancesModel).filter(
+                models.PregaoLancesModel.pregaoID==pregao_id
+            ).distinct(
+                models.PregaoLancesModel.itemID
+            ).order_by(
+                models.PregaoLancesModel.itemID, asc(models.PregaoLancesModel.valorLance), asc(models.PregaoLancesModel.dataHoraLance), asc(models.PregaoLancesModel.dataHoraRegistro), asc(models.PregaoLancesModel.id)
+            ).subquery()
+        )
+        lance_vencedor = aliased(models.PregaoLancesModel, vencedores_subquery)
+
+        return (
+            select(models.PregaoItensModel, lance_vencedor).outerjoin(
+                lance_vencedor, lance_vencedor.itemID==models.PregaoItensModel.id
+            ).filter(
+                models.PregaoItensModel.pregaoID==pregao_id,
+                models.PregaoItensModel.deleted==False,
+                models.PregaoItensModel.demandaAtual==True
+            ).order_by(
+                models.PregaoItensModel.id
+            )
+        )
+
+
+    @classmethod
+    def lances_page(cls, lances: List[models.PregaoLancesModel], after_id: int, limit: int) -> tuple[List[models.PregaoLancesModel], bool]:
+        # lances: consultados a partir de after_id - LANCES_CURSOR_SOBREPOSICAO com limit + LANCES_CURSOR_SOBREPOSICAO + 1
+        # Os lances da sobreposição (id <= after_id) são sempre retornados, os posteriores até limit
+
+        anteriores = [lance for lance in lances if lance.id <= after_id]
+        novos = [lance for lance in lances if lance.id > after_id]
+
+        return anteriores + novos[:limit], len(novos) > limit
+
+
+    @staticmethod
+    def lances_after_statement(pregao_id: int, after_id: int, limit: int) -> Select:
+
+        return select(models.PregaoLancesModel).filter(
+            models.PregaoLancesModel.pregaoID==pregao_id,
+            models.PregaoLancesModel.id > after_id
+        ).order_by(
+            models.PregaoLancesModel.id
+        ).limit(limit)
+
+
+    @staticmethod
+    def lance_contexto_statement(pregao_id: int, body: schemas.PregaoLancesBodySchema, agora: datetime, com_vencedor: bool = True) -> Select:
+        # Pregão, Regra de Lances, Item, Participante, lance vencedor do Item e lances recentes do Fornecedor
+        # (com_vencedor=False: vencedor já no livro de lances, a coluna do vencedor é NULL)
+
+        vencedor_subquery = (
+            select(models.PregaoLancesModel).filter(
+                models.PregaoLancesModel.pregaoID==pregao_id,
+                models.PregaoLancesModel.itemID==body.itemID
+            ).order_by(
+                asc(models.PregaoLancesModel.valorLance), asc(models.PregaoLancesModel.dataHoraLance), asc(models.PregaoLancesModel.dataHoraRegistro), asc(models.PregaoLancesModel.id)
+            ).limit(1).subquery()
+        )
+        lance_vencedor = aliased(models.PregaoLancesModel, vencedor_subquery)
+
+        # Correlacionada com a Regra do Pregão: lances do Fornecedor dentro do intervalo da regra
+        lances_recentes = (
+            select(func.count(models.PregaoLancesModel.id)).filter(
+                models.PregaoLancesModel.pregaoID==pregao_id,
+                models.PregaoLancesModel.participanteID==body.participanteID,
+                models.PregaoLancesModel.dataHoraRegistro > literal(agora) - func.make_interval(0, 0, 0, 0, 0, models.PregaoLancesRegrasModel.intervaloDeTempoEmMinutos)
+            ).scalar_subquery()
+        )
+
+        statement = (
+            select(
+                models.PregaoModel, models.PregaoLancesRegrasModel, models.PregaoItensModel, models.PregaoParticipantesModel, lance_vencedor if com_vencedor else null(), lances_recentes
+            ).select_from(
+                models.PregaoModel
+            ).outerjoin(
+                models.PregaoLancesRegrasModel, models.PregaoLancesRegrasModel.id==models.PregaoModel.regraLanceID
+            ).outerjoin(
+                models.PregaoItensModel, models.PregaoItensModel.id==body.itemID
+            ).outerjoin(
+                models.PregaoParticipantesModel, models.PregaoParticipantesModel.id==body.participanteID
+            ).filter(
+                models.PregaoModel.id==pregao_id
+            )
+        )
+
+        if com_vencedor:
+            statement = statement.outerjoin(lance_vencedor, true())
+
+        return statement
+
+
+    def check_lance_contexto(self, contexto: Row | None, agora: datetime, vencedor_loader: Callable[[], models.PregaoLancesModel | None] | None = None) -> PregaoLanceContexto | HTTPException:
+        # Valida as entidades carregadas por lance_contexto_statement; vencedor_loader: leitura do vencedor
+        # quando a consulta não o carregou e o livro de lances foi descartado desde então
+
+        if contexto is None:
+            raise ResourceNotFoundException()
+
+        pregao, regra, pregao_item, pregao_participante, vencedor, total_lances = contexto
+
+        if pregao_item is None or pregao_participante is None:
+            raise ResourceNotFoundException()
+
+        if pregao_participante.participanteTipo != PregaoParticipantesLogic.PARTICIPANTE_FORNECEDOR_TIPO:
+            raise ResourceExpectationFailedException()
+
+        if pregao_item.pregaoID != pregao.id:
+            raise ResourceExpectationFailedException()
+
+        # Aplicar aqui as restricoes de lance e verificoes de datas
+        # Verificar status do Pregao para aceite de lances, etc.
+
+        if regra is None:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"Não há Regra de Lance cadastrada com o ID: {pregao.regraLanceID}")
+
+        return PregaoLanceContexto(
+            pregao=pregao,
+            regra=regra,
+            pregao_item=pregao_item,
+            pregao_participante=pregao_participante,
+            # o livro de lances prevalece quando já carregado, caso contrário é aquecido com o vencedor lido
+            lance_vencedor=self.lances_book.get_vencedor(pregao_id=pregao.id, item_id=pregao_item.id, loader=vencedor_loader or (lambda: vencedor)),
+            lances_recentes=total_lances,
+            agora=agora
+        )
+
+
+    def build_itens_vencedores(self, pregao_id: int, itens_vencedores: List[Row]) -> List[schemas.PregaoItemVencedorResponseSchema] | HTTPException:
+
+        if itens_vencedores == []:
+            raise NoContentException()
+
+        # Aproveitando a consulta para aquecer o livro de lances de todos os Itens do Pregão
+        self.lances_book.warm_itens(pregao_id=pregao_id, vencedores={pregao_item.id: lance for pregao_item, lance in itens_vencedores})
+
+        return [
+            schemas.PregaoItemVencedorResponseSchema(
+                pregaoItemID=pregao_item.id,
+                itemID=pregao_item.itemID,
+                lanceVencedor=self.lances_book.get_vencedor(pregao_id=pregao_id, item_id=pregao_item.id, loader=lambda: lance)
+            )
+            for pregao_item, lance in itens_vencedores
+        ]
+
+
+    def validate_lance(self, contexto: PregaoLanceContexto, lance_vencedor: schemas.PregaoLancesResponseSchema | None, body: schemas.PregaoLancesBodySchema, lances_pendentes: int = 0) -> None | HTTPException:
+        # lances_pendentes: lances do Fornecedor aceitos mas ainda não commitados (ingestão em lote)
+
+        regra = contexto.regra
+
+        if lance_vencedor is not None:
+
+            # Verificando se o valor do lance é menor que o lance vencedor atual
+            if body.valorLance >= lance_vencedor.valorLance:
+                raise ResourceExpectationFailedException()
+            
+            # Verificando se a diferença mínima do valor do lance foi antendida
+            diferenca_valor = abs(lance_vencedor.valorLance - body.valorLance)
+            if diferenca_valor < regra.diferencaDeValorMinima:
+                raise ResourceExpectationFailedException()
+            
+            # Verificando se o numero máximo de lances por minuto não foi excedido
+            # (com a janela em memória fria, decide pela contagem já carregada no contexto)
+            lance_permitido = self.rate_limiter.allow(
+                pregao_id=contexto.pregao.id,
+                participante_id=contexto.pregao_participante.id,
+                regra=regra,
+                counter=lambda data_hora_limite: contexto.lances_recentes + lances_pendentes,
+                agora=contexto.agora
+            )
+            if not lance_permitido:
+                raise ResourceExpectationFailedException()
+
+
+    def new_pregao_lance(self, pregao: models.PregaoModel, pregao_item: models.PregaoItensModel, pregao_participante: models.PregaoParticipantesModel, body: schemas.PregaoLancesBodySchema) -> models.PregaoLancesModel:
+
+        return models.PregaoLancesModel(
+            pregaoID=pregao.id,
+            participanteID=pregao_participante.id,
+            itemID=pregao_item.id,
+            valorLance=body.valorLance,
+            dataHoraLance=body.dataHoraLance
+        )
+
+
+    def publish_pregao_lance(self, lance: models.PregaoLancesModel | schemas.PregaoLancesResponseSchema) -> None:
+        # Executado apenas após o commit do lance
+
+        vencedor_alterado = self.lances_book.register(lance)
+
+        # Publicando aos demais workers e aos assinantes do feed ao vivo do Pregão
+        self.lances_eventos.publish_lance(lance=lance, vencedor_alterado=vencedor_alterado)
+
+
+class PregaoLancesLogic(PregaoLancesBaseLogic): 
 
     '''
         Realiza as operações de Lances do Pregao
@@ -449,6 +789,10 @@ class PregaoLancesLogic:
                 pregao_itens_logic: PregaoItensLogic = Depends(PregaoItensLogic),
                 pregao_participantes_logic: PregaoParticipantesLogic = Depends(PregaoParticipantesLogic),
                 pregao_regras_lances_logic: PregaoRegrasLancesLogic = Depends(PregaoRegrasLancesLogic),
+                lances_book: PregaoLancesBook = Depends(get_lances_book),
+                rate_limiter: PregaoLancesRateLimiter = Depends(get_rate_limiter),
+                lances_eventos: PregaoLancesEventos = Depends(get_lances_eventos),
+                group_commit: PregaoLancesGroupCommit = Depends(get_lances_group_commit),
             ) -> None:
         
         self.db: Session = db
@@ -456,19 +800,17 @@ class PregaoLancesLogic:
         self.pregao_itens_logic: PregaoItensLogic = pregao_itens_logic
         self.pregao_participantes_logic: PregaoParticipantesLogic = pregao_participantes_logic
         self.pregao_regras_lances_logic: PregaoRegrasLancesLogic = pregao_regras_lances_logic
+        self.lances_book: PregaoLancesBook = lances_book
+        self.rate_limiter: PregaoLancesRateLimiter = rate_limiter
+        self.lances_eventos: PregaoLancesEventos = lances_eventos
+        self.group_commit: PregaoLancesGroupCommit = group_commit
 
 
-    def get_pregao_lance_vencedor(self, pregao_id: int) -> models.PregaoLancesModel | HTTPException:
+    def get_pregao_lance_vencedor(self, pregao_id: int) -> schemas.PregaoLancesResponseSchema | HTTPException:
 
         pregao = self.pregao_logic.get_pregao_by_id(pregao_id=pregao_id)
 
-        lance_vencedor = (
-            self.db.query(models.PregaoLancesModel).filter(
-                models.PregaoLancesModel.pregaoID==pregao.id
-            ).order_by(
-                asc(models.PregaoLancesModel.valorLance), asc(models.PregaoLancesModel.dataHoraLance), asc(models.PregaoLancesModel.dataHoraRegistro)
-            ).first()
-        )
+        lance_vencedor = self.get_lance_vencedor(pregao_id=pregao.id)
 
         if lance_vencedor == None:
             raise ResourceNotFoundException()
@@ -476,6 +818,15 @@ class PregaoLancesLogic:
         return lance_vencedor
 
 
+    def get_pregao_lances_vencedores(self, pregao_id: int) -> List[schemas.PregaoItemVencedorResponseSchema] | HTTPException:
+
+        pregao = self.pregao_logic.get_pregao_by_id(pregao_id=pregao_id)
+
+        itens_vencedores = self.db.execute(self.lances_vencedores_statement(pregao_id=pregao.id)).all()
+
+        return self.build_itens_vencedores(pregao_id=pregao.id, itens_vencedores=itens_vencedores)
+
+
     def get_pregao_lances(self, pregao_id: int) -> List[models.PregaoLancesModel] | HTTPException:
         
         pregao = self.pregao_logic.get_pregao_by_id(pregao_id=pregao_id)
@@ -492,75 +843,88 @@ class PregaoLancesLogic:
         return lances
     
 
-    def get_lance_vencedor(self, pregao_id: int) -> models.PregaoLancesModel:
-        # internal classs use
+    def get_pregao_lances_page(self, pregao_id: int, after_id: int | None = None, limit: int | None = None) -> tuple[List[models.PregaoLancesModel], bool] | HTTPException:
+        '''
+            Paginação por cursor: retorna até limit lances com id maior que after_id e se há mais lances após a página.
+            Com after_id, a página inclui também os lances com id até LANCES_CURSOR_SOBREPOSICAO abaixo do cursor,
+            já entregues ou gravados fora da ordem dos ids: o cliente deve descartar os ids repetidos.
+            Um lance gravado após mais de LANCES_CURSOR_SOBREPOSICAO ids posteriores ao seu ainda pode ser perdido.
+        '''
 
-        lance_vencedor = (
-            self.db.query(models.PregaoLancesModel).filter(
-                models.PregaoLancesModel.pregaoID==pregao_id
-            ).order_by(
-                asc(models.PregaoLancesModel.valorLance), asc(models.PregaoLancesModel.dataHoraLance), asc(models.PregaoLancesModel.dataHoraRegistro)
-            ).first()
-        )
+        pregao = self.pregao_logic.get_pregao_by_id(pregao_id=pregao_id)
 
-        return lance_vencedor
+        limit = min(limit or self.LANCES_PAGINA_LIMITE_PADRAO, self.LANCES_PAGINA_LIMITE_MAXIMO)
+        after_id = after_id or 0
+        lances = self.get_pregao_lances_after(pregao_id=pregao.id, after_id=max(after_id - self.LANCES_CURSOR_SOBREPOSICAO, 0), limit=limit + self.LANCES_CURSOR_SOBREPOSICAO + 1)
 
-    def get_fornecedor_recent_lances(self, pregao_id: int, participante_id: int, intervalo_minutos: int) -> List[models.PregaoLancesModel]:
+        return self.lances_page(lances=lances, after_id=after_id, limit=limit)
 
-        data_hora_limite = datetime.now() - timedelta(minutes=intervalo_minutos)
 
-        lances = (
-            self.db.query(models.PregaoLancesModel).filter(
-                models.PregaoLancesModel.pregaoID==pregao_id,
-                models.PregaoLancesModel.participanteID==participante_id,
-                models.PregaoLancesModel.dataHoraRegistro > data_hora_limite
-            ).all()
-        )
+    def get_pregao_lances_after(self, pregao_id: int, after_id: int, limit: int) -> List[models.PregaoLancesModel]:
+
+        lances: List[models.PregaoLancesModel] = self.db.scalars(self.lances_after_statement(pregao_id=pregao_id, after_id=after_id, limit=limit)).all()
 
         return lances
+    
 
-    def create_pregao_lance(self, pregao_id: int, body: schemas.PregaoLancesBodySchema) -> models.PregaoLancesModel | HTTPException:
+    def get_lance_vencedor(self, pregao_id: int, item_id: int | None = None) -> schemas.PregaoLancesResponseSchema | None:
+        # internal classs use - servido pelo livro de lances, o banco é consultado apenas no primeiro acesso
 
-        pregao = self.pregao_logic.get_pregao_by_id(pregao_id=pregao_id)
-        pregao_item = self.pregao_itens_logic.get_pregao_item_by_id(pregao_item_id=body.itemID)
-        pregao_participante = self.pregao_participantes_logic.get_pregao_participante_by_id(pregao_participante_id=body.participanteID)
+        return self.lances_book.get_vencedor(
+            pregao_id=pregao_id,
+            item_id=item_id,
+            loader=lambda: self.query_lance_vencedor(pregao_id=pregao_id, item_id=item_id)
+        )
 
-        if pregao_participante.participanteTipo != self.pregao_participantes_logic.PARTICIPANTE_FORNECEDOR_TIPO:
-            raise ResourceExpectationFailedException()
+    def query_lance_vencedor(self, pregao_id: int, item_id: int | None = None) -> models.PregaoLancesModel | None:
 
-        # Aplicar aqui as restricoes de lance e verificoes de datas
-        # Verificar status do Pregao para aceite de lances, etc.
+        lance_vencedor = self.db.scalars(self.lance_vencedor_statement(pregao_id=pregao_id, item_id=item_id)).first()
 
-        regra = self.pregao_regras_lances_logic.get_regra_lances_by_id(regra_id=pregao.regraLanceID)
-        lance_vencedor = self.get_lance_vencedor(pregao_id=pregao_id)
-        
-        if lance_vencedor is not None:
+        return lance_vencedor
 
-            # Verificando se o valor do lance é menor que o lance vencedor atual
-            if body.valorLance >= lance_vencedor.valorLance:
-                raise ResourceExpectationFailedException()
-            
-            # Verificando se a diferença mínima do valor do lance foi antendida
-            diferenca_valor = abs(lance_vencedor.valorLance - body.valorLance)
-            if diferenca_valor < regra.diferencaDeValorMinima:
-                raise ResourceExpectationFailedException()
-            
-            # Verificando se o numero máximo de lances por minuto não foi excedido
-            fornecedor_lances = self.get_fornecedor_recent_lances(pregao_id=pregao_id, participante_id=body.participanteID, intervalo_minutos=regra.intervaloDeTempoEmMinutos)
-            if len(fornecedor_lances) >= regra.lancesPorIntervaloDeTempo:
-                raise ResourceExpectationFailedException()
-        
-        new_pregao_lance = models.PregaoLancesModel(
-            pregaoID=pregao.id,
-            participanteID=pregao_participante.id,
-            itemID=pregao_item.id,
-            valorLance=body.valorLance,
-            dataHoraLance=body.dataHoraLance
+    def get_lance_contexto(self, pregao_id: int, body: schemas.PregaoLancesBodySchema) -> PregaoLanceContexto | HTTPException:
+        # Carrega e valida as entidades referenciadas pelo lance em uma única consulta
+
+        agora = datetime.now()
+
+        # Com o vencedor do Item já no livro de lances, a consulta dispensa a subconsulta do vencedor
+        if self.lances_book.peek(pregao_id=pregao_id, item_id=body.itemID) is PregaoLancesVencedores.NAO_CARREGADO:
+            contexto = self.db.execute(self.lance_contexto_statement(pregao_id=pregao_id, body=body, agora=agora)).first()
+            return self.check_lance_contexto(contexto=contexto, agora=agora)
+
+        contexto = self.db.execute(self.lance_contexto_statement(pregao_id=pregao_id, body=body, agora=agora, com_vencedor=False)).first()
+
+        return self.check_lance_contexto(
+            contexto=contexto,
+            agora=agora,
+            vencedor_loader=lambda: self.query_lance_vencedor(pregao_id=pregao_id, item_id=body.itemID)
         )
 
-        self.db.add(new_pregao_lance)
-        self.db.commit()
-        self.db.refresh(new_pregao_lance)
+
+    def create_pregao_lance(self, pregao_id: int, body: schemas.PregaoLancesBodySchema) -> models.PregaoLancesModel | schemas.PregaoLancesResponseSchema | HTTPException:
+
+        contexto = self.get_lance_contexto(pregao_id=pregao_id, body=body)
+
+        # O lance concorre apenas com os lances do mesmo Item do Pregão
+        self.validate_lance(contexto=contexto, lance_vencedor=contexto.lance_vencedor, body=body)
+        
+        new_pregao_lance = self.new_pregao_lance(pregao=contexto.pregao, pregao_item=contexto.pregao_item, pregao_participante=contexto.pregao_participante, body=body)
+
+        if self.group_commit.habilitado:
+            # gravado junto com os demais lances da janela de group commit; a conexão da requisição volta ao pool
+            # antes da espera, pois o lote é gravado com outra conexão do mesmo pool
+            diferenca_minima = contexto.regra.diferencaDeValorMinima
+            self.db.rollback()
+            new_pregao_lance = self.group_commit.submit(lance=new_pregao_lance, diferenca_minima=diferenca_minima)
+        else:
+            # INSERT ... RETURNING dispensa o refresh após o commit
+            new_pregao_lance = insert_lances(db=self.db, lances=[new_pregao_lance])[0]
+            self.db.commit()
+
+        # Atualizando o livro de lances vencedores, a janela do limitador e o feed apenas após o commit
+        # (ids do snapshot do lance: as entidades do contexto estão expiradas após o commit)
+        self.rate_limiter.record(pregao_id=new_pregao_lance.pregaoID, participante_id=new_pregao_lance.participanteID)
+        self.publish_pregao_lance(lance=new_pregao_lance)
 
         return new_pregao_lance
 
@@ -592,15 +956,41 @@ class PregaoConversoesLogic:
         self.solicitacao_itens_logic: SolicitacaoItensLogic = solicitacao_itens_logic
 
     def save_conversion(self, pregao_id: int, solicitacoes: List[int]) -> None:
+        # Sem commit: a conversão é gravada na mesma transação do Pregão
 
-        for solicitacao_id in solicitacoes:
-            new_conversao = models.PregaoConversoesModel(
-                pregaoID=pregao_id,
-                solicitacaoID=solicitacao_id
-            )  
+        self.db.execute(insert(models.PregaoConversoesModel), [
+            {"pregaoID": pregao_id, "solicitacaoID": solicitacao_id} for solicitacao_id in solicitacoes
+        ])
 
-            self.db.add(new_conversao)
-            self.db.commit()
+
+    def insert_pregao_itens(self, pregao_id: int, pregao_itens: List[models.PregaoItensModel]) -> None:
+
+        if pregao_itens:
+            self.db.execute(insert(models.PregaoItensModel), [{
+                "pregaoID": pregao_id,
+                "itemID": pregao_item.itemID,
+                "criadoPor": pregao_item.criadoPor,
+                "projecaoQuantidade": pregao_item.projecaoQuantidade,
+                "unidadeID": pregao_item.unidadeID,
+                "demandaAtual": True
+            } for pregao_item in pregao_itens])
+
+
+    def insert_pregao_participantes(self, pregao_id: int, pregao_participantes: List[models.PregaoParticipantesModel]) -> None:
+
+        if pregao_participantes:
+            self.db.execute(insert(models.PregaoParticipantesModel), [{
+                "pregaoID": pregao_id,
+                "usuarioID": pregao_participante.usuarioID,
+                "participanteTipo": pregao_participante.participanteTipo
+            } for pregao_participante in pregao_participantes])
+
+
+    def set_solicitacoes_convertidas(self, solicitacoes: List[int]) -> None:
+
+        self.db.execute(
+            update(SolicitacoesModel).where(SolicitacoesModel.id.in_(solicitacoes)).values(status=self.solicitacao_logic.STATUS_CONVERTIDO)
+        )
 
 
     def create_pregao_using_solicitacoes(self, body: schemas.PregaoCreateSchema) -> models.PregaoModel | HTTPException:
@@ -608,6 +998,9 @@ class PregaoConversoesLogic:
         if body.solicitacoes == []:
             raise ResourceExpectationFailedException()
         
+        # Carregando todas as Solicitacoes em uma única consulta; as buscas por id seguintes são atendidas em memória
+        get_loader(self.db).load_many(SolicitacoesModel, body.solicitacoes)
+
         solicitacoes:list[SolicitacoesModel] = list(map(lambda solicitacao_id: self.solicitacao_logic.get_solicitacao_by_id(solicitacao_id=solicitacao_id), body.solicitacoes))
         for solicitacao in solicitacoes:
             if solicitacao.status == self.solicitacao_logic.STATUS_CONVERTIDO:
@@ -632,35 +1025,23 @@ class PregaoConversoesLogic:
             abertoADemandasAte=body.abertoADemandasAte
         )
 
+        # Toda a conversão ocorre em uma única transação: uma falha não deixa um Pregão incompleto
         self.db.add(new_pregao)
-        self.db.commit()
-        self.db.refresh(new_pregao)
-
-        # Adicionando Criador como Participante do Pregao
-        criador_participante = self.pregao_participantes_logic.create_pregao_participante(pregao_id=new_pregao.id, usuario_id=usuario.id, participante_tipo=self.pregao_participantes_logic.PARTICIPANTE_COMPRADOR_TIPO)
+        self.db.flush()
 
-        # Salvando Itens do Pregao importados das Solicitacoes
-        for pregao_item in pregao_itens:
-            pregao_item.pregaoID = new_pregao.id
-            self.db.add(pregao_item)
-            self.db.commit()
+        # Criador como Participante Comprador do Pregao, seguido dos Participantes importados das Solicitacoes
+        criador_participante = models.PregaoParticipantesModel(usuarioID=usuario.id, participanteTipo=self.pregao_participantes_logic.PARTICIPANTE_COMPRADOR_TIPO)
+        pregao_participantes = [criador_participante] + [p for p in pregao_participantes if p.usuarioID != criador_participante.usuarioID]
 
-        # Salvando Participantes do Pregao importados das Solicitacoes
-        for pregao_participante in pregao_participantes:
-            if pregao_participante.usuarioID != criador_participante.usuarioID:
-                pregao_participante.pregaoID = new_pregao.id
-                self.db.add(pregao_participante)
-                self.db.commit()
+        self.insert_pregao_itens(pregao_id=new_pregao.id, pregao_itens=pregao_itens)
+        self.insert_pregao_participantes(pregao_id=new_pregao.id, pregao_participantes=pregao_participantes)
 
-        # Atualizando Status das Solicitacoes
-        for solicitacao in solicitacoes:
-            solicitacao.status = self.solicitacao_logic.STATUS_CONVERTIDO
-            self.db.add(solicitacao)
-            self.db.commit()
-
-        # Registrando Conversoes
+        # Atualizando Status das Solicitacoes e registrando as Conversoes
+        self.set_solicitacoes_convertidas(solicitacoes=body.solicitacoes)
         self.save_conversion(pregao_id=new_pregao.id, solicitacoes=body.solicitacoes)
 
+        self.db.commit()
+
         return new_pregao
 
 
@@ -671,6 +1052,8 @@ class PregaoConversoesLogic:
         if solicitacoes == []:
             raise ResourceExpectationFailedException()
         
+        get_loader(self.db).load_many(SolicitacoesModel, solicitacoes)
+
         solicitacoes: list[SolicitacoesModel] = list(map(lambda solicitacao_id: self.solicitacao_logic.get_solicitacao_by_id(solicitacao_id=solicitacao_id), solicitacoes))
         for solicitacao in solicitacoes:
             if solicitacao.status == self.solicitacao_logic.STATUS_CONVERTIDO:
@@ -691,32 +1074,27 @@ class PregaoConversoesLogic:
         pregao_participantes_dict = {participante.usuarioID: participante for participante in pregao_participantes}
 
         # unifying pregao itens
+        itens_substituidos: List[int] = []
+
         for new_item in new_pregao_itens:
-            # add pregao reference
-            new_item.pregaoID = pregao.id
 
             if new_item.itemID in pregao_itens_dict:                
-                # get current pregao item and setting False in demandaAtual
+                # get current pregao item, it will be set demandaAtual False
                 current_item = pregao_itens_dict[new_item.itemID]
 
                 # raising error if unidade are differents
                 if new_item.unidadeID != current_item.unidadeID:
                     raise ResourceExpectationFailedException()
 
-                current_item.demandaAtual = False
-                self.db.add(current_item)
+                itens_substituidos.append(current_item.id)
 
                 # updating quantidade in new item
                 new_item.projecaoQuantidade += current_item.projecaoQuantidade            
-                
-            # save changes
-            new_item.demandaAtual = True
-            self.db.add(new_item)
 
-        # unifying pregao itens 
+        # unifying pregao participantes
+        participantes_novos: List[models.PregaoParticipantesModel] = []
+
         for new_participante in new_pregao_participantes:
-            # add pregao reference
-            new_participante.pregaoID = pregao.id
 
             # if user exists as participante
             if new_participante.usuarioID in pregao_participantes_dict:        
@@ -728,9 +1106,20 @@ class PregaoConversoesLogic:
             
             # if not, create
             else:
-                self.db.add(new_participante)                                                    
+                participantes_novos.append(new_participante)
+
+        # saving all changes in a single transaction
+        if itens_substituidos:
+            self.db.execute(
+                update(models.PregaoItensModel).where(models.PregaoItensModel.id.in_(itens_substituidos)).values(demandaAtual=False)
+            )
+
+        self.insert_pregao_itens(pregao_id=pregao.id, pregao_itens=new_pregao_itens)
+        self.insert_pregao_participantes(pregao_id=pregao.id, pregao_participantes=participantes_novos)
+
+        self.set_solicitacoes_convertidas(solicitacoes=[solicitacao.id for solicitacao in solicitacoes])
+        self.save_conversion(pregao_id=pregao.id, solicitacoes=[solicitacao.id for solicitacao in solicitacoes])
 
-        # commiting all changes
         self.db.commit()
         
         return pregao
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Double, Boolean, func
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Double, Boolean, Index, UniqueConstraint, func
 from database.instance import Base
 
 
@@ -23,6 +23,10 @@ class PregaoModel(Base):
 class PregaoItensModel(Base):
 
     __tablename__ = "PREGAO_PREGOES_ITENS"
+    __table_args__ = (
+        # Itens do Pregão e busca do Item no Pregão: WHERE pregaoID = ? [AND itemID = ?]
+        Index("ix_pregao_itens_pregao_item", "pregaoID", "itemID"),
+    )
     
     id = Column(BigInteger, primary_key=True, index=True)
     pregaoID = Column(BigInteger)
@@ -39,6 +43,11 @@ class PregaoItensModel(Base):
 class PregaoParticipantesModel(Base):
 
     __tablename__ = "PREGAO_PREGOES_PARTICIPANTES"
+    __table_args__ = (
+        # Um Usuário participa uma única vez de cada Pregão (INSERT ... ON CONFLICT na inscrição em lote);
+        # o índice da constraint atende WHERE pregaoID = ? [AND usuarioID = ?]
+        UniqueConstraint("pregaoID", "usuarioID", name="uq_pregao_participantes_pregao_usuario"),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     pregaoID = Column(BigInteger)
@@ -49,6 +58,10 @@ class PregaoParticipantesModel(Base):
 class PregaoConversoesModel(Base):
 
     __tablename__ = "PREGAO_CONVERSOES"
+    __table_args__ = (
+        Index("ix_pregao_conversoes_pregao", "pregaoID"),
+        Index("ix_pregao_conversoes_solicitacao", "solicitacaoID"),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     pregaoID = Column(BigInteger)
@@ -58,6 +71,16 @@ class PregaoConversoesModel(Base):
 class PregaoLancesModel(Base):
 
     __tablename__ = "PREGAO_PREGOES_LANCES"
+    __table_args__ = (
+        # Lance vencedor por Item: DISTINCT ON (itemID) ordenado por valor e horário do lance
+        Index("ix_pregao_lances_pregao_item_valor", "pregaoID", "itemID", "valorLance", "dataHoraLance"),
+        # Paginação por cursor (keyset) dos lances do Pregão: WHERE pregaoID = ? AND id > ? ORDER BY id
+        Index("ix_pregao_lances_pregao_id", "pregaoID", "id"),
+        # Limite de lances por intervalo: WHERE pregaoID = ? AND participanteID = ? AND dataHoraRegistro >= ?
+        Index("ix_pregao_lances_pregao_participante_registro", "pregaoID", "participanteID", "dataHoraRegistro"),
+        # Histórico de lances do Pregão: WHERE pregaoID = ? ORDER BY dataHoraRegistro
+        Index("ix_pregao_lances_pregao_registro", "pregaoID", "dataHoraRegistro"),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     pregaoID = Column(BigInteger)
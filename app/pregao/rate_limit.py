@@ -0,0 +1,109 @@
+from threading import Lock
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Callable, Deque, Dict, Tuple
+from utils.metrics import MetricsRegistry, get_metrics
+from . import models
+
+
+class JanelaLances:
+
+    '''
+        Janela deslizante com os horários dos últimos lances de um Fornecedor em um Pregão.
+        O buffer circular guarda no máximo 'lancesPorIntervaloDeTempo' horários, o suficiente para decidir o limite.
+    '''
+
+    def __init__(self, limite: int, intervalo: timedelta, aquecida_em: datetime) -> None:
+        self.limite: int = limite
+        self.intervalo: timedelta = intervalo
+        self.lances: Deque[datetime] = deque(maxlen=limite)
+        # A partir deste momento todos os lances do intervalo passaram por este processo
+        self.aquecida_em: datetime = aquecida_em
+
+    def is_warm(self, agora: datetime) -> bool:
+        return agora >= self.aquecida_em
+
+    def allows(self, agora: datetime) -> bool:
+        # O lance mais antigo do buffer saiu do intervalo ou o buffer ainda não atingiu o limite
+        return len(self.lances) < self.limite or self.lances[0] <= agora - self.intervalo
+
+
+class PregaoLancesRateLimiter:
+
+    '''
+        Limita o número de lances de cada Fornecedor por intervalo de tempo, conforme a Regra de Lances do Pregão.
+
+        - Mantém uma janela deslizante em memória por (Pregão, Participante)
+        - Sem estado aquecido, decide através de um COUNT(*) no banco (counter) até que o intervalo
+          da regra tenha sido inteiramente observado pelo processo
+        - Expõe contadores de lances permitidos, limitados e de consultas ao banco
+    '''
+
+    def __init__(self, metrics: MetricsRegistry) -> None:
+        self._lock: Lock = Lock()
+        self._janelas: Dict[Tuple[int, int], JanelaLances] = {}
+
+        self.permitidos = metrics.counter("pregao_lances_limite_permitidos_total", "Lances aceitos pelo limitador")
+        self.limitados = metrics.counter("pregao_lances_limite_bloqueados_total", "Lances bloqueados pelo limitador")
+        self.consultas_banco = metrics.counter("pregao_lances_limite_consultas_banco_total", "Decisões do limitador feitas com COUNT(*) no banco")
+
+
+    def _get_janela(self, pregao_id: int, participante_id: int, limite: int, intervalo: timedelta, agora: datetime) -> JanelaLances:
+
+        janela = self._janelas.get((pregao_id, participante_id))
+
+        # Janela nova ou Regra alterada: a janela começa fria
+        if janela is None or janela.limite != limite or janela.intervalo != intervalo:
+            janela = JanelaLances(limite=limite, intervalo=intervalo, aquecida_em=agora + intervalo)
+            self._janelas[(pregao_id, participante_id)] = janela
+
+        return janela
+
+
+    def allow(self, pregao_id: int, participante_id: int, regra: models.PregaoLancesRegrasModel, counter: Callable[[datetime], int], agora: datetime | None = None) -> bool:
+
+        agora = agora or datetime.now()
+        limite: int = regra.lancesPorIntervaloDeTempo
+        intervalo = timedelta(minutes=regra.intervaloDeTempoEmMinutos)
+
+        with self._lock:
+            janela = self._get_janela(pregao_id=pregao_id, participante_id=participante_id, limite=limite, intervalo=intervalo, agora=agora)
+            permitido = janela.allows(agora) if janela.is_warm(agora) else None
+
+        if permitido is None:
+            self.consultas_banco.inc()
+            total_lances = counter(agora - intervalo)
+            permitido = total_lances < limite
+
+            # Nenhum lance no intervalo: a janela em memória já está completa
+            if total_lances == 0:
+                with self._lock:
+                    janela.aquecida_em = min(janela.aquecida_em, agora)
+
+        (self.permitidos if permitido else self.limitados).inc()
+
+        return permitido
+
+
+    def record(self, pregao_id: int, participante_id: int, quando: datetime | None = None) -> None:
+
+        with self._lock:
+            janela = self._janelas.get((pregao_id, participante_id))
+            if janela is not None:
+                janela.lances.append(quando or datetime.now())
+
+
+    def invalidate(self, pregao_id: int | None = None) -> None:
+
+        with self._lock:
+            if pregao_id is None:
+                self._janelas.clear()
+            else:
+                for chave in [chave for chave in self._janelas if chave[0] == pregao_id]:
+                    del self._janelas[chave]
+
+
+rate_limiter = PregaoLancesRateLimiter(metrics=get_metrics())
+
+def get_rate_limiter() -> PregaoLancesRateLimiter:
+    return rate_limiter
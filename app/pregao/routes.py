@@ -1,6 +1,10 @@
-from fastapi import APIRouter, Depends, Response
+from fastapi import APIRouter, Depends, Query, Response, HTTPException, WebSocket, WebSocketException, status
+from starlette.concurrency import run_in_threadpool
 from typing import List
+from dependences import provide
 from http import HTTPStatus
+from .feed import PregaoLancesFeed, get_lances_feed
+from .ingestion import PregaoLancesIngestor, get_lances_ingestor
 from . import logic
 from . import schemas
 
@@ -10,104 +14,150 @@ router = APIRouter(
 )
 
 @router.get("/{pregao_id}", response_model=schemas.PregaoSchema)
-def get_pregao(pregao_id: int, logic: logic.PregaoLogic = Depends()):
+def get_pregao(pregao_id: int, logic: logic.PregaoLogic = Depends(provide(logic.PregaoLogic, leitura=True))):
     pregao = logic.get_pregao_by_id(pregao_id=pregao_id)
     return schemas.PregaoSchema.model_validate(pregao)    
 
 
 @router.post("/novo", response_model=schemas.PregaoSchema)
-def create_pregao(body: schemas.PregaoCreateSchema, logic: logic.PregaoLogic = Depends()):
+def create_pregao(body: schemas.PregaoCreateSchema, logic: logic.PregaoLogic = Depends(provide(logic.PregaoLogic))):
     pregao = logic.create_pregao(body=body)
     return schemas.PregaoSchema.model_validate(pregao)
 
 @router.post("/converter", response_model=schemas.PregaoSchema)
-def create_pregao_por_conversao(body: schemas.PregaoCreateSchema, logic: logic.PregaoConversoesLogic = Depends()):
+def create_pregao_por_conversao(body: schemas.PregaoCreateSchema, logic: logic.PregaoConversoesLogic = Depends(provide(logic.PregaoConversoesLogic))):
     pregao = logic.create_pregao_using_solicitacoes(body=body)
     return schemas.PregaoSchema.model_validate(pregao)
 
 @router.post("/{pregao_id}/estender", response_model=schemas.PregaoSchema)
-def extend_pregao_with_solicitacao(pregao_id: int, body: schemas.PregaoExtendBodySchema, logic: logic.PregaoConversoesLogic = Depends()):
+def extend_pregao_with_solicitacao(pregao_id: int, body: schemas.PregaoExtendBodySchema, logic: logic.PregaoConversoesLogic = Depends(provide(logic.PregaoConversoesLogic))):
     pregao = logic.extend_pregao_using_solicitacoes(pregao_id=pregao_id, body=body)
     return schemas.PregaoSchema.model_validate(pregao)
 
 @router.patch("/{pregao_id}/cancelar", response_model=schemas.PregaoSchema)
-def cancel_pregao(pregao_id: int, logic: logic.PregaoLogic = Depends()):
+def cancel_pregao(pregao_id: int, logic: logic.PregaoLogic = Depends(provide(logic.PregaoLogic))):
     pregao = logic.cancel_pregao(pregao_id=pregao_id)
     return schemas.PregaoSchema.model_validate(pregao)
 
 
 @router.patch("/{pregao_id}/autorizar", response_model=schemas.PregaoSchema)
-def authorize_pregao(pregao_id: int, logic: logic.PregaoLogic = Depends()):
+def authorize_pregao(pregao_id: int, logic: logic.PregaoLogic = Depends(provide(logic.PregaoLogic))):
     pregao = logic.authorize_pregao(pregao_id=pregao_id)
     return schemas.PregaoSchema.model_validate(pregao)   
 
 
 @router.patch("/{pregao_id}/rejeitar", response_model=schemas.PregaoSchema)
-def reject_pregao(pregao_id: int,  logic: logic.PregaoLogic = Depends()):
+def reject_pregao(pregao_id: int,  logic: logic.PregaoLogic = Depends(provide(logic.PregaoLogic))):
     pregao = logic.reject_pregao(pregao_id=pregao_id)
     return schemas.PregaoSchema.model_validate(pregao)
 
 @router.get("/{pregao_id}/participantes", response_model=List[schemas.PregaoParticipanteResponseSchema])
-def get_pregao_participantes(pregao_id: int, logic: logic.PregaoParticipantesLogic = Depends()):
+def get_pregao_participantes(pregao_id: int, logic: logic.PregaoParticipantesLogic = Depends(provide(logic.PregaoParticipantesLogic, leitura=True))):
     participantes = logic.get_pregao_participantes(pregao_id=pregao_id)
     return map(lambda p: schemas.PregaoParticipanteResponseSchema.model_validate(p), participantes)
 
 @router.post("/{pregao_id}/comprador/novo", response_model=schemas.PregaoParticipanteResponseSchema)
-def create_pregao_comprador(pregao_id: int, body: schemas.PregaoParticipanteBodySchema, logic: logic.PregaoParticipantesLogic = Depends()):
+def create_pregao_comprador(pregao_id: int, body: schemas.PregaoParticipanteBodySchema, logic: logic.PregaoParticipantesLogic = Depends(provide(logic.PregaoParticipantesLogic))):
     comprador = logic.create_pregao_participante_comprador(pregao_id=pregao_id, body=body)
     return schemas.PregaoParticipanteResponseSchema.model_validate(comprador)
 
 @router.post("/{pregao_id}/fornecedor/novo", response_model=schemas.PregaoParticipanteResponseSchema)
-def create_pregao_fornecedor(pregao_id: int, body: schemas.PregaoParticipanteBodySchema, logic: logic.PregaoParticipantesLogic = Depends()):
+def create_pregao_fornecedor(pregao_id: int, body: schemas.PregaoParticipanteBodySchema, logic: logic.PregaoParticipantesLogic = Depends(provide(logic.PregaoParticipantesLogic))):
     fornecedor = logic.create_pregao_participante_fornecedor(pregao_id=pregao_id, body=body)
     return schemas.PregaoParticipanteResponseSchema.model_validate(fornecedor)
 
+@router.post("/{pregao_id}/participantes/lote", response_model=schemas.PregaoParticipantesLoteResponseSchema)
+def create_pregao_participantes_lote(pregao_id: int, body: schemas.PregaoParticipantesLoteBodySchema, logic: logic.PregaoParticipantesLogic = Depends(provide(logic.PregaoParticipantesLogic))):
+    return logic.create_pregao_participantes_lote(pregao_id=pregao_id, body=body)
+
 @router.post("/{pregao_id}/itens/adicionar", response_model=schemas.PregaoItensResponseSchema)
-def create_pregao_item(pregao_id: int, body: schemas.PregaoItensBodySchema, logic: logic.PregaoItensLogic = Depends()):
+def create_pregao_item(pregao_id: int, body: schemas.PregaoItensBodySchema, logic: logic.PregaoItensLogic = Depends(provide(logic.PregaoItensLogic))):
     pregao_item = logic.create_pregao_item(pregao_id=pregao_id, body=body)
     return schemas.PregaoItensResponseSchema.model_validate(pregao_item)
 
 @router.patch("/itens/{pregao_item_id}/alterar", response_model=schemas.PregaoItensResponseSchema)
-def update_pregao_item(pregao_item_id: int, body: schemas.PregaoItensBodyUpdateSchema, logic: logic.PregaoItensLogic = Depends()):
+def update_pregao_item(pregao_item_id: int, body: schemas.PregaoItensBodyUpdateSchema, logic: logic.PregaoItensLogic = Depends(provide(logic.PregaoItensLogic))):
     pregao_item = logic.update_pregao_item(pregao_item_id=pregao_item_id, body=body)
     return schemas.PregaoItensResponseSchema.model_validate(pregao_item)
 
 @router.delete("/itens/{pregao_item_id}/", response_model=schemas.PregaoItensResponseSchema)
-def delete_pregao_item(pregao_item_id: int, logic: logic.PregaoItensLogic = Depends()):
+def delete_pregao_item(pregao_item_id: int, logic: logic.PregaoItensLogic = Depends(provide(logic.PregaoItensLogic))):
     pregao_item = logic.delete_pregao_item(pregao_item_id=pregao_item_id)
     return schemas.PregaoItensResponseSchema.model_validate(pregao_item)
 
 @router.get("/{pregao_id}/itens", response_model=List[schemas.PregaoItensResponseSchema])
-def get_pregao_itens(pregao_id: int, logic: logic.PregaoItensLogic = Depends()):
+def get_pregao_itens(pregao_id: int, logic: logic.PregaoItensLogic = Depends(provide(logic.PregaoItensLogic, leitura=True))):
     itens = logic.get_pregao_itens(pregao_id=pregao_id)
     return map(lambda i: schemas.PregaoItensResponseSchema.model_validate(i), itens)
 
 @router.post("/{pregao_id}/lances/registrar", response_model=schemas.PregaoLancesResponseSchema)
-def create_pregao_lance(pregao_id: int, body: schemas.PregaoLancesBodySchema, logic: logic.PregaoLancesLogic = Depends()):
-    pregao_lance = logic.create_pregao_lance(pregao_id=pregao_id, body=body)
+async def create_pregao_lance(pregao_id: int, body: schemas.PregaoLancesBodySchema, logic: logic.PregaoLancesLogic = Depends(provide(logic.PregaoLancesLogic)), ingestor: PregaoLancesIngestor = Depends(get_lances_ingestor)):
+
+    # Com a ingestão por fila habilitada, o lance é validado e gravado pelo escritor único do Pregão
+    if ingestor.habilitado:
+        pregao_lance = await ingestor.submit(pregao_id=pregao_id, body=body)
+    else:
+        pregao_lance = await run_in_threadpool(logic.create_pregao_lance, pregao_id=pregao_id, body=body)
+
     return schemas.PregaoLancesResponseSchema.model_validate(pregao_lance)
 
 @router.get("/{pregao_id}/lances", response_model=List[schemas.PregaoLancesResponseSchema])
-def get_pregao_lances(pregao_id: int, logic: logic.PregaoLancesLogic = Depends()):
-    pregao_lances = logic.get_pregao_lances(pregao_id=pregao_id)
+def get_pregao_lances(pregao_id: int, response: Response, after_id: int | None = Query(default=None, ge=0), limit: int | None = Query(default=None, ge=1), logic: logic.PregaoLancesLogic = Depends(provide(logic.PregaoLancesLogic, leitura=True))):
+
+    # Sem cursor: histórico completo ordenado por dataHoraRegistro
+    if after_id is None and limit is None:
+        pregao_lances = logic.get_pregao_lances(pregao_id=pregao_id)
+        return map(lambda l: schemas.PregaoLancesResponseSchema.model_validate(l), pregao_lances)
+
+    # Com cursor: lances com id maior que after_id, ordenados por id, precedidos pela sobreposição abaixo do cursor
+    # (lances gravados fora da ordem dos ids); o cliente descarta os ids já recebidos
+    pregao_lances, possui_mais = logic.get_pregao_lances_page(pregao_id=pregao_id, after_id=after_id, limit=limit)
+
+    response.headers["X-Proximo-Cursor"] = str(max(after_id or 0, pregao_lances[-1].id if pregao_lances else 0))
+    response.headers["X-Possui-Mais"] = str(possui_mais).lower()
+
     return map(lambda l: schemas.PregaoLancesResponseSchema.model_validate(l), pregao_lances)
 
 @router.get("/{pregao_id}/lances/vencedor", response_model=schemas.PregaoLancesResponseSchema)
-def get_pregao_lance_vencedor(pregao_id: int, logic: logic.PregaoLancesLogic = Depends()):
+def get_pregao_lance_vencedor(pregao_id: int, logic: logic.PregaoLancesLogic = Depends(provide(logic.PregaoLancesLogic))):
     pregao_lance_vencedor = logic.get_pregao_lance_vencedor(pregao_id=pregao_id)
     return schemas.PregaoLancesResponseSchema.model_validate(pregao_lance_vencedor)
 
+@router.get("/{pregao_id}/lances/vencedores", response_model=List[schemas.PregaoItemVencedorResponseSchema])
+def get_pregao_lances_vencedores(pregao_id: int, logic: logic.PregaoLancesLogic = Depends(provide(logic.PregaoLancesLogic))):
+    vencedores = logic.get_pregao_lances_vencedores(pregao_id=pregao_id)
+    return vencedores
+
+@router.websocket("/{pregao_id}/lances/ws")
+async def pregao_lances_feed(websocket: WebSocket, pregao_id: int, ultimo_id: int | None = None, logic: logic.PregaoLancesLogic = Depends(provide(logic.PregaoLancesLogic)), feed: PregaoLancesFeed = Depends(get_lances_feed)):
+
+    try:
+        await run_in_threadpool(logic.pregao_logic.get_pregao_by_id, pregao_id)
+    except HTTPException:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION)
+
+    def replay(after_id: int, limit: int):
+        # a sessão é fechada a cada lote para não manter uma conexão do pool durante toda a conexão WebSocket
+        try:
+            return logic.get_pregao_lances_after(pregao_id=pregao_id, after_id=after_id, limit=limit)
+        finally:
+            logic.db.close()
+
+    await run_in_threadpool(logic.db.close)
+    await websocket.accept()
+    await feed.serve(websocket=websocket, pregao_id=pregao_id, ultimo_id=ultimo_id, replay=replay)
+
 @router.post("/lances/regras/nova", response_model=schemas.PregaoRegrasLancesResponseSchema)
-def create_regra_lances(body: schemas.PregaoRegrasLanceBodySchema, logic: logic.PregaoRegrasLancesLogic = Depends()):
+def create_regra_lances(body: schemas.PregaoRegrasLanceBodySchema, logic: logic.PregaoRegrasLancesLogic = Depends(provide(logic.PregaoRegrasLancesLogic))):
     regra = logic.create_regra_lances(body=body)
     return schemas.PregaoRegrasLancesResponseSchema.model_validate(regra)
 
 @router.get("/lances/regras", response_model=List[schemas.PregaoRegrasLancesResponseSchema])
-def get_all_regras_lances(logic: logic.PregaoRegrasLancesLogic = Depends()):
+def get_all_regras_lances(logic: logic.PregaoRegrasLancesLogic = Depends(provide(logic.PregaoRegrasLancesLogic, leitura=True))):
     regras = logic.get_all_regras_lances()
     return map(lambda r : schemas.PregaoRegrasLancesResponseSchema.model_validate(r), regras)
 
 @router.get("/lances/regras/{regra_id}", response_model=schemas.PregaoRegrasLancesResponseSchema)
-def get_regra_lance(regra_id: int, logic: logic.PregaoRegrasLancesLogic = Depends()):
+def get_regra_lance(regra_id: int, logic: logic.PregaoRegrasLancesLogic = Depends(provide(logic.PregaoRegrasLancesLogic, leitura=True))):
     regra = logic.get_regra_lances_by_id(regra_id=regra_id)
     return schemas.PregaoRegrasLancesResponseSchema.model_validate(regra)
\ No newline at end of file
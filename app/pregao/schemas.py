@@ -79,6 +79,50 @@ class PregaoParticipanteResponseSchema(BaseModel):
         from_attributes = True
 
 
+class PregaoParticipanteInscricaoSchema(BaseModel):
+
+    usuarioID: int
+    participanteTipo: str
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+
+class PregaoParticipantesLoteBodySchema(BaseModel):
+
+    participantes: List[PregaoParticipanteInscricaoSchema] = Field(min_length=1)
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+
+class PregaoParticipanteInscricaoResultadoSchema(BaseModel):
+
+    # INSCRITO, JA_INSCRITO, CONFLITO, USUARIO_NAO_ENCONTRADO, TIPO_INVALIDO ou DUPLICADO
+    usuarioID: int
+    participanteTipo: str
+    status: str
+    participanteID: Optional[int] = Field(default=None)
+    detalhe: Optional[str] = Field(default=None)
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+
+class PregaoParticipantesLoteResponseSchema(BaseModel):
+
+    pregaoID: int
+    inscritos: int
+    resultados: List[PregaoParticipanteInscricaoResultadoSchema]
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+
 class PregaoItensBodySchema(BaseModel):
 
     itemID: int
@@ -144,6 +188,17 @@ class PregaoLancesResponseSchema(BaseModel):
         from_attributes = True
 
 
+class PregaoItemVencedorResponseSchema(BaseModel):
+
+    pregaoItemID: int
+    itemID: int
+    lanceVencedor: Optional[PregaoLancesResponseSchema] = None
+
+    class Config:
+        orm_mode = True
+        from_attributes = True
+
+
 class PregaoRegrasLanceBodySchema(BaseModel):
     
     diferencaDeValorMinima: float
@@ -1,6 +1,8 @@
 from fastapi import Depends, HTTPException
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from database.instance import get_db
+from database.loader import get_loader
 from usuarios.logic import UserLogic
 from itens.logic import ItensLogic, ItensUnidadesLogic, ItensCategoriaLogic, ItensSubCategoriaLogic, ItensMarcasLogic
 from typing import List
@@ -9,6 +11,12 @@ from utils.http_exceptions import NoContentException, ResourceNotFoundException,
 from . import models
 from . import schemas
 
+PARTICIPANTE_BY_SOLICITACAO_USUARIO_STATEMENT = select(models.SolicitacoesParticipantesModel).filter(
+    models.SolicitacoesParticipantesModel.solicitacaoID==bindparam("solicitacao_id"),
+    models.SolicitacoesParticipantesModel.usuarioID==bindparam("usuario_id")
+).limit(1)
+
+
 class SolicitacaoLogic:
     '''
         Realiza ações que tem como contexto a tabela PREGAO_SOLICITACOES
@@ -31,9 +39,7 @@ class SolicitacaoLogic:
 
     def get_solicitacao_by_id(self, solicitacao_id: int) -> models.SolicitacoesModel | HTTPException:
 
-        solicitacao = self.db.query(models.SolicitacoesModel).filter(
-            models.SolicitacoesModel.id == solicitacao_id
-        ).first()
+        solicitacao = get_loader(self.db).get(models.SolicitacoesModel, solicitacao_id)
 
         if solicitacao is None:
             raise HTTPException(status_code=404, detail=f"Não foi encontrada Solicitação de Pregão com ID: {solicitacao_id}")
@@ -119,9 +125,7 @@ class SolicitacaoParticipantesLogic:
 
     def get_solicitacao_participante_by_id(self, solicitacao_participante_id: int) -> models.SolicitacoesParticipantesModel | HTTPException:
 
-        participante = self.db.query(models.SolicitacoesParticipantesModel).filter(
-            models.SolicitacoesParticipantesModel.id==solicitacao_participante_id
-        ).first()
+        participante = get_loader(self.db).get(models.SolicitacoesParticipantesModel, solicitacao_participante_id)
 
         if participante == None:
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"Participante de Solicitação com ID {solicitacao_participante_id} não encontrado")
@@ -145,10 +149,7 @@ class SolicitacaoParticipantesLogic:
 
     def get_participante_using_solicitacao_usuario(self, solicitacao_id: int, usuario_id: int) -> models.SolicitacoesParticipantesModel | HTTPException:
 
-        participante = self.db.query(models.SolicitacoesParticipantesModel).filter(
-            models.SolicitacoesParticipantesModel.solicitacaoID==solicitacao_id,
-            models.SolicitacoesParticipantesModel.usuarioID==usuario_id
-        ).first()
+        participante = self.db.scalars(PARTICIPANTE_BY_SOLICITACAO_USUARIO_STATEMENT, {"solicitacao_id": solicitacao_id, "usuario_id": usuario_id}).first()
 
         if participante == None:
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"Usuário {usuario_id} não é Participante da Solicitação de Pregão {solicitacao_id}")
@@ -158,10 +159,7 @@ class SolicitacaoParticipantesLogic:
 
     def participante_already_setted(self, solicitacao_id: int, usuario_id: int) -> bool:
 
-        participante = self.db.query(models.SolicitacoesParticipantesModel).filter(
-            models.SolicitacoesParticipantesModel.solicitacaoID==solicitacao_id,
-            models.SolicitacoesParticipantesModel.usuarioID==usuario_id
-        ).first()
+        participante = self.db.scalars(PARTICIPANTE_BY_SOLICITACAO_USUARIO_STATEMENT, {"solicitacao_id": solicitacao_id, "usuario_id": usuario_id}).first()
 
 
         return participante != None
@@ -251,9 +249,7 @@ class SolicitacaoItensLogic:
 
     def get_solicitacao_item_by_id(self, solicitacao_item_id: int) -> models.SolicitacoesItensModel | HTTPException:
 
-        solicitacao_item = self.db.query(models.SolicitacoesItensModel).filter(
-            models.SolicitacoesItensModel.id==solicitacao_item_id
-        ).first()
+        solicitacao_item = get_loader(self.db).get(models.SolicitacoesItensModel, solicitacao_item_id)
 
         if solicitacao_item == None:
             raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=f"Não existem Item de Solicitação com o ID {solicitacao_item_id}")
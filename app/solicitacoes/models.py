@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String, DateTime, Double, Boolean, func
+from sqlalchemy import Column, BigInteger, String, DateTime, Double, Boolean, Index, func
 from database.instance import Base
 
 class SolicitacoesModel(Base):
@@ -19,6 +19,9 @@ class SolicitacoesModel(Base):
 class SolicitacoesItensModel(Base):
 
     __tablename__ = "PREGAO_SOLICITACOES_ITENS"
+    __table_args__ = (
+        Index("ix_solicitacoes_itens_solicitacao", "solicitacaoID"),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     solicitacaoID = Column(BigInteger)
@@ -43,6 +46,10 @@ class SolicitacoesItensModel(Base):
 class SolicitacoesParticipantesModel(Base):
 
     __tablename__ = "PREGAO_SOLICITACOES_PARTICIPANTES"
+    __table_args__ = (
+        # Participantes da Solicitação e participação do Usuário: WHERE solicitacaoID = ? [AND usuarioID = ?]
+        Index("ix_solicitacoes_participantes_solicitacao_usuario", "solicitacaoID", "usuarioID"),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     solicitacaoID = Column(BigInteger)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, Response
 from typing import List
+from dependences import provide
 from http import HTTPStatus
 from . import logic
 from . import schemas
@@ -10,55 +11,55 @@ router = APIRouter(
 )
 
 @router.get("/{solicitacao_id}", response_model=schemas.SolicitacoesResponseSchema)
-def get_solicitacao_by_id(solicitacao_id: int, logic: logic.SolicitacaoLogic = Depends()):
+def get_solicitacao_by_id(solicitacao_id: int, logic: logic.SolicitacaoLogic = Depends(provide(logic.SolicitacaoLogic, leitura=True))):
     solicitacao = logic.get_solicitacao_by_id(solicitacao_id=solicitacao_id)
     return schemas.SolicitacoesResponseSchema.model_validate(solicitacao)
 
 
 @router.post("/nova", response_model=schemas.SolicitacoesResponseSchema)
-def create_solicitacao(body: schemas.SolicitacoesBodySchema, logic: logic.SolicitacaoLogic = Depends()):
+def create_solicitacao(body: schemas.SolicitacoesBodySchema, logic: logic.SolicitacaoLogic = Depends(provide(logic.SolicitacaoLogic))):
     solicitacao = logic.create_solicitacao(body=body)
     return schemas.SolicitacoesResponseSchema.model_validate(solicitacao)
 
 
 @router.post("/{solicitacao_id}/aprovar", response_model=schemas.SolicitacoesResponseSchema)
-def approve_solicitacao(solicitacao_id: int, logic: logic.SolicitacaoLogic = Depends()):
+def approve_solicitacao(solicitacao_id: int, logic: logic.SolicitacaoLogic = Depends(provide(logic.SolicitacaoLogic))):
     solicitacao = logic.approve_solicitacao(solicitacao_id=solicitacao_id)
     return schemas.SolicitacoesResponseSchema.model_validate(solicitacao)
 
 
 @router.post("/{solicitacao_id}/rejeitar", response_model=schemas.SolicitacoesResponseSchema)
-def approve_solicitacao(solicitacao_id: int, body: schemas.SolicitacoesRejeicaoBodySchema, logic: logic.SolicitacaoLogic = Depends()):
+def approve_solicitacao(solicitacao_id: int, body: schemas.SolicitacoesRejeicaoBodySchema, logic: logic.SolicitacaoLogic = Depends(provide(logic.SolicitacaoLogic))):
     solicitacao = logic.reject_solicitacao(solicitacao_id=solicitacao_id, body=body)
     return schemas.SolicitacoesResponseSchema.model_validate(solicitacao)
 
 
 @router.post("/{solicitacao_id}/itens/adicionar", response_model=schemas.SolicitacoesItensResponseSchema)
-def create_solicitacao_item(solicitacao_id: int, body: schemas.SolicitacoesItensBodySchema, logic: logic.SolicitacaoItensLogic = Depends()):
+def create_solicitacao_item(solicitacao_id: int, body: schemas.SolicitacoesItensBodySchema, logic: logic.SolicitacaoItensLogic = Depends(provide(logic.SolicitacaoItensLogic))):
     item = logic.create_solicitacao_item(solicitacao_id=solicitacao_id, body=body)
     return schemas.SolicitacoesItensResponseSchema.model_validate(item)
 
 
 @router.post("/itens/{solicitacao_item_id}/alterar/referencias", response_model=schemas.SolicitacoesItensResponseSchema)
-def update_item_referencia(solicitacao_item_id: int, body: schemas.SolicitacoesItensReferenciasSchema, logic: logic.SolicitacaoItensLogic = Depends()):
+def update_item_referencia(solicitacao_item_id: int, body: schemas.SolicitacoesItensReferenciasSchema, logic: logic.SolicitacaoItensLogic = Depends(provide(logic.SolicitacaoItensLogic))):
     item = logic.update_solicitacao_referencia_if_exists(solicitacao_item_id=solicitacao_item_id, body=body)
     return schemas.SolicitacoesItensResponseSchema.model_validate(item)
 
 
 @router.get("/itens/{solicitacao_item_id}/referencias/diagnostico", response_model=schemas.SolicitacaoItemOverviewResponse)
-def get_solicitacao_item_overview(solicitacao_item_id: int, logic: logic.SolicitacaoItensLogic = Depends()):
+def get_solicitacao_item_overview(solicitacao_item_id: int, logic: logic.SolicitacaoItensLogic = Depends(provide(logic.SolicitacaoItensLogic, leitura=True))):
     overview: dict = logic.get_item_referencia_overview(solicitacao_item_id=solicitacao_item_id)
     return overview
 
 
 @router.delete("/itens/{solicitacao_item_id}", response_model=schemas.SolicitacoesItensResponseSchema)
-def delete_solicitacao_item(solicitacao_item_id: int, logic: logic.SolicitacaoItensLogic = Depends()):
+def delete_solicitacao_item(solicitacao_item_id: int, logic: logic.SolicitacaoItensLogic = Depends(provide(logic.SolicitacaoItensLogic))):
     item_deleted = logic.delete_solicitacao_itens(solicitacao_item_id=solicitacao_item_id)
     return schemas.SolicitacoesItensResponseSchema.model_validate(item_deleted)
 
 
 @router.get("/{solicitacao_id}/itens", response_model=List[schemas.SolicitacoesItensResponseSchema])
-def get_solicitacao_itens(solicitacao_id: int, logic: logic.SolicitacaoItensLogic = Depends()):
+def get_solicitacao_itens(solicitacao_id: int, logic: logic.SolicitacaoItensLogic = Depends(provide(logic.SolicitacaoItensLogic, leitura=True))):
     itens = logic.get_solicitacao_itens(solicitacao_id=solicitacao_id)
     return list(map(lambda i: schemas.SolicitacoesItensResponseSchema.model_validate(i), itens))
 
@@ -81,21 +82,21 @@ def get_solicitacao_itens(solicitacao_id: int, logic: logic.SolicitacaoItensLogi
 
 
 @router.get("/{solicitacao_id}/participantes", response_model=List[schemas.SolicitacoesParticipantesResponseSchema])
-def get_solicitacao_participantes(solicitacao_id: int, logic: logic.SolicitacaoParticipantesLogic = Depends()):
+def get_solicitacao_participantes(solicitacao_id: int, logic: logic.SolicitacaoParticipantesLogic = Depends(provide(logic.SolicitacaoParticipantesLogic, leitura=True))):
     participantes = logic.get_solicitacao_participantes(solicitacao_id=solicitacao_id)
     return map(lambda p: schemas.SolicitacoesParticipantesResponseSchema.model_validate(p), participantes)
 
 @router.post("/{solicitacao_id}/comprador/novo", response_model=schemas.SolicitacoesParticipantesResponseSchema)
-def create_solicitacao_comprador(solicitacao_id: int, body: schemas.SolicitacoesParticipantesBodySchema, logic: logic.SolicitacaoParticipantesLogic = Depends()):
+def create_solicitacao_comprador(solicitacao_id: int, body: schemas.SolicitacoesParticipantesBodySchema, logic: logic.SolicitacaoParticipantesLogic = Depends(provide(logic.SolicitacaoParticipantesLogic))):
     comprador = logic.create_solicitacao_comprador(solicitacao_id=solicitacao_id, body=body)
     return schemas.SolicitacoesParticipantesResponseSchema.model_validate(comprador)
 
 @router.post("/{solicitacao_id}/fornecedor/novo", response_model=schemas.SolicitacoesParticipantesResponseSchema)
-def create_solicitacao_fornecedor(solicitacao_id: int, body: schemas.SolicitacoesParticipantesBodySchema, logic: logic.SolicitacaoParticipantesLogic = Depends()):
+def create_solicitacao_fornecedor(solicitacao_id: int, body: schemas.SolicitacoesParticipantesBodySchema, logic: logic.SolicitacaoParticipantesLogic = Depends(provide(logic.SolicitacaoParticipantesLogic))):
     fornecedor = logic.create_solicitacao_fornecedor(solicitacao_id=solicitacao_id, body=body)
     return schemas.SolicitacoesParticipantesResponseSchema.model_validate(fornecedor)
 
 @router.delete("/{solicitacao_id}/participante/{participante_id}")
-def remove_solicitacao_participante(solicitacao_id: int, participante_id: int, logic: logic.SolicitacaoParticipantesLogic = Depends()):
+def remove_solicitacao_participante(solicitacao_id: int, participante_id: int, logic: logic.SolicitacaoParticipantesLogic = Depends(provide(logic.SolicitacaoParticipantesLogic))):
     logic.remove_solicitacao_participante(solicitacao_id=solicitacao_id, solicitacao_participante_id=participante_id)
     return HTTPStatus.NO_CONTENT
@@ -1,12 +1,21 @@
 from fastapi import Depends, HTTPException
+from sqlalchemy import bindparam, select
 from sqlalchemy.orm import Session
 from typing import List
 from database.instance import get_db
+from database.loader import get_loader
 from itens.logic import ItensCategoriaLogic
 from utils.http_exceptions import ResourceNotFoundException, NoContentException
 from . import models
 from . import schemas
 
+INTERESSE_BY_USUARIO_CATEGORIA_STATEMENT = select(models.UsuarioInteressesModel).filter(
+    models.UsuarioInteressesModel.usuarioID==bindparam("usuario_id"),
+    models.UsuarioInteressesModel.categoriaID==bindparam("categoria_id"),
+    models.UsuarioInteressesModel.interesseTipo==bindparam("interesse_tipo")
+).limit(1)
+
+
 
 class UserLogic:
     '''
@@ -18,12 +27,18 @@ class UserLogic:
 
 
     def get_user_by_id(self, user_id: int) -> models.UserModel | HTTPException:
-        user = self.db.query(models.UserModel).filter(models.UserModel.id == user_id).first()
+        user = get_loader(self.db).get(models.UserModel, user_id)
 
         if user is None:
             raise ResourceNotFoundException()
         
         return user
+
+
+    def get_existing_user_ids(self, user_ids: List[int]) -> set[int]:
+        # Usuários existentes entre os ids informados, em uma única consulta (IN)
+
+        return set(self.db.scalars(select(models.UserModel.id).filter(models.UserModel.id.in_(user_ids))))
     
 
 class UsuarioInteresses: 
@@ -54,11 +69,7 @@ class UsuarioInteresses:
 
     def get_interesse_compra_using_usuario_categoria(self, usuario_id: int, categoria_id: int) -> models.UsuarioInteressesModel | HTTPException:
 
-        interesse_compra = self.db.query(models.UsuarioInteressesModel).filter(
-            models.UsuarioInteressesModel.usuarioID==usuario_id,
-            models.UsuarioInteressesModel.categoriaID==categoria_id,
-            models.UsuarioInteressesModel.interesseTipo==self.INTERESSE_TIPO_COMPRA
-        ).first()
+        interesse_compra = self.db.scalars(INTERESSE_BY_USUARIO_CATEGORIA_STATEMENT, {"usuario_id": usuario_id, "categoria_id": categoria_id, "interesse_tipo": self.INTERESSE_TIPO_COMPRA}).first()
 
         if interesse_compra == None:
             raise ResourceNotFoundException()
@@ -68,11 +79,7 @@ class UsuarioInteresses:
 
     def get_interesse_venda_using_usuario_categoria(self, usuario_id: int, categoria_id: int) -> models.UsuarioInteressesModel | HTTPException:
 
-        interesse_compra = self.db.query(models.UsuarioInteressesModel).filter(
-            models.UsuarioInteressesModel.usuarioID==usuario_id,
-            models.UsuarioInteressesModel.categoriaID==categoria_id,
-            models.UsuarioInteressesModel.interesseTipo==self.INTERESSE_TIPO_VENDA
-        ).first()
+        interesse_compra = self.db.scalars(INTERESSE_BY_USUARIO_CATEGORIA_STATEMENT, {"usuario_id": usuario_id, "categoria_id": categoria_id, "interesse_tipo": self.INTERESSE_TIPO_VENDA}).first()
 
         if interesse_compra == None:
             raise ResourceNotFoundException()
@@ -82,22 +89,14 @@ class UsuarioInteresses:
 
     def interesse_compra_already_setted(self, usuario_id: int, categoria_id: int) -> bool:
 
-        interesse_compra = self.db.query(models.UsuarioInteressesModel).filter(
-            models.UsuarioInteressesModel.usuarioID==usuario_id,
-            models.UsuarioInteressesModel.categoriaID==categoria_id,
-            models.UsuarioInteressesModel.interesseTipo==self.INTERESSE_TIPO_COMPRA
-        ).first()
+        interesse_compra = self.db.scalars(INTERESSE_BY_USUARIO_CATEGORIA_STATEMENT, {"usuario_id": usuario_id, "categoria_id": categoria_id, "interesse_tipo": self.INTERESSE_TIPO_COMPRA}).first()
 
         return interesse_compra != None
     
     
     def interesse_venda_already_setted(self, usuario_id: int, categoria_id: int) -> bool:
 
-        interesse_compra = self.db.query(models.UsuarioInteressesModel).filter(
-            models.UsuarioInteressesModel.usuarioID==usuario_id,
-            models.UsuarioInteressesModel.categoriaID==categoria_id,
-            models.UsuarioInteressesModel.interesseTipo==self.INTERESSE_TIPO_VENDA
-        ).first()
+        interesse_compra = self.db.scalars(INTERESSE_BY_USUARIO_CATEGORIA_STATEMENT, {"usuario_id": usuario_id, "categoria_id": categoria_id, "interesse_tipo": self.INTERESSE_TIPO_VENDA}).first()
 
         return interesse_compra != None
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BigInteger, String
+from sqlalchemy import Column, BigInteger, String, Index
 from database.instance import Base
 
 class UserModel(Base):
@@ -12,6 +12,10 @@ class UserModel(Base):
 class UsuarioInteressesModel(Base):
 
     __tablename__ = "USUARIOS_INTERESSES"
+    __table_args__ = (
+        # Interesses do Usuário por Categoria e tipo: WHERE usuarioID = ? [AND categoriaID = ? AND interesseTipo = ?]
+        Index("ix_usuarios_interesses_usuario_categoria_tipo", "usuarioID", "categoriaID", "interesseTipo"),
+    )
 
     id = Column(BigInteger, primary_key=True, index=True)
     usuarioID = Column(BigInteger)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends
 from typing import List
+from dependences import provide
 from . import logic
 from . import schemas
 
@@ -10,16 +11,16 @@ router = APIRouter(
 
 
 @router.post("/{usuario_id}/interesses/compra", response_model=schemas.UsuarioInteresseResponseSchema)
-def create_interesse_compra(usuario_id: int, body: schemas.UsuarioInteresseBodySchema, logic: logic.UsuarioInteresses = Depends()):
+def create_interesse_compra(usuario_id: int, body: schemas.UsuarioInteresseBodySchema, logic: logic.UsuarioInteresses = Depends(provide(logic.UsuarioInteresses))):
     interesse_compra = logic.create_interesse_compra(usuario_id=usuario_id, body=body)
     return schemas.UsuarioInteresseResponseSchema.model_validate(interesse_compra)
 
 @router.post("/{usuario_id}/interesses/venda", response_model=schemas.UsuarioInteresseResponseSchema)
-def create_interesse_compra(usuario_id: int, body: schemas.UsuarioInteresseBodySchema, logic: logic.UsuarioInteresses = Depends()):
+def create_interesse_compra(usuario_id: int, body: schemas.UsuarioInteresseBodySchema, logic: logic.UsuarioInteresses = Depends(provide(logic.UsuarioInteresses))):
     interesse_venda = logic.create_interesse_venda(usuario_id=usuario_id, body=body)
     return schemas.UsuarioInteresseResponseSchema.model_validate(interesse_venda)
 
 @router.get("/{usuario_id}/interesses", response_model=List[schemas.UsuarioInteresseResponseSchema])
-def get_interesses_compra(usuario_id: int, logic: logic.UsuarioInteresses = Depends()):
+def get_interesses_compra(usuario_id: int, logic: logic.UsuarioInteresses = Depends(provide(logic.UsuarioInteresses, leitura=True))):
     interesses = logic.get_usuario_interesses(usuario_id=usuario_id)
     return map(lambda i: schemas.UsuarioInteresseResponseSchema.model_validate(i), interesses)
@@ -0,0 +1,33 @@
+from http import HTTPStatus
+from fastapi import Request, Response
+
+
+def weak_etag(*partes) -> str:
+    # ETag fraco: identifica a versão dos dados, não os bytes da resposta
+    return 'W/"' + "-".join(str(parte) for parte in partes) + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # Comparação fraca (RFC 9110): W/"x" e "x" são equivalentes
+
+    if not if_none_match:
+        return False
+
+    valores = [valor.strip() for valor in if_none_match.split(",")]
+
+    return "*" in valores or etag.removeprefix("W/") in {valor.removeprefix("W/") for valor in valores}
+
+
+def conditional_get(request: Request, response: Response, etag: str, max_age: int = 0) -> Response | None:
+    '''
+        Define ETag e Cache-Control na resposta da rota e, quando o cliente já possui a versão atual
+        (If-None-Match), retorna a resposta 304 que a rota deve devolver sem consultar os registros
+    '''
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = f"public, max-age={max_age}, must-revalidate"
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=dict(response.headers))
+
+    return None
@@ -0,0 +1,106 @@
+from threading import Lock
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+
+
+class Counter:
+
+    def __init__(self, nome: str, descricao: str = "") -> None:
+        self.nome: str = nome
+        self.descricao: str = descricao
+        self._lock: Lock = Lock()
+        self._valor: int = 0
+
+    def inc(self, quantidade: int = 1) -> None:
+        with self._lock:
+            self._valor += quantidade
+
+    @property
+    def value(self) -> int:
+        return self._valor
+
+    def snapshot(self) -> int:
+        return self._valor
+
+
+class Histogram:
+
+    DEFAULT_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, nome: str, descricao: str = "", buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.nome: str = nome
+        self.descricao: str = descricao
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        self._lock: Lock = Lock()
+        self._contagens: List[int] = [0] * (len(self.buckets) + 1)
+        self._total: int = 0
+        self._soma: float = 0.0
+
+    def observe(self, valor: float) -> None:
+        with self._lock:
+            self._contagens[bisect_left(self.buckets, valor)] += 1
+            self._total += 1
+            self._soma += valor
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            acumulado, buckets = 0, {}
+            for limite, contagem in zip(self.buckets, self._contagens):
+                acumulado += contagem
+                buckets[str(limite)] = acumulado
+            buckets["+Inf"] = self._total
+
+            return {"count": self._total, "sum": self._soma, "buckets": buckets}
+
+
+class Gauge:
+
+    def __init__(self, nome: str, descricao: str, funcao: Callable[[], float]) -> None:
+        self.nome: str = nome
+        self.descricao: str = descricao
+        self.funcao: Callable[[], float] = funcao
+
+    def snapshot(self) -> float:
+        return self.funcao()
+
+
+class MetricsRegistry:
+
+    '''
+        Registro de métricas do processo (contadores, histogramas e gauges).
+        As métricas são criadas sob demanda e expostas pela rota /metricas.
+    '''
+
+    def __init__(self) -> None:
+        self._lock: Lock = Lock()
+        self._metricas: Dict[str, Counter | Histogram | Gauge] = {}
+
+    def _get_or_create(self, nome: str, factory: Callable[[], Counter | Histogram | Gauge]) -> Counter | Histogram | Gauge:
+        with self._lock:
+            if nome not in self._metricas:
+                self._metricas[nome] = factory()
+            return self._metricas[nome]
+
+    def counter(self, nome: str, descricao: str = "") -> Counter:
+        return self._get_or_create(nome, lambda: Counter(nome, descricao))
+
+    def histogram(self, nome: str, descricao: str = "", buckets: Tuple[float, ...] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(nome, lambda: Histogram(nome, descricao, buckets))
+
+    def gauge(self, nome: str, descricao: str, funcao: Callable[[], float]) -> Gauge:
+        # gauges são recriados para permitir trocar a função de leitura (ex: novo engine)
+        with self._lock:
+            self._metricas[nome] = Gauge(nome, descricao, funcao)
+            return self._metricas[nome]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metricas = dict(self._metricas)
+
+        return {nome: metrica.snapshot() for nome, metrica in sorted(metricas.items())}
+
+
+metrics = MetricsRegistry()
+
+def get_metrics() -> MetricsRegistry:
+    return metrics
@@ -0,0 +1,268 @@
+import json
+import logging
+import select
+from uuid import uuid4
+from threading import Event, Lock, Thread
+from typing import Callable, Dict, List
+from sqlalchemy import Engine, text
+from database.instance import engine
+from environment.variables import get_settings
+
+
+logger = logging.getLogger(__name__)
+
+# handler(dados, local): local indica que a mensagem foi publicada por este processo
+Handler = Callable[[dict, bool], None]
+
+
+class PubSub:
+
+    '''
+        Publicação e assinatura de mensagens por canal, entregues a todos os processos (workers) da aplicação.
+
+        - Cada processo possui uma origem própria; a mensagem é entregue aos assinantes locais no momento
+          da publicação (local=True) e aos demais processos pelo backend (local=False)
+        - Mensagens recebidas do backend com a própria origem são descartadas
+        - on_perda(): callbacks chamados quando mensagens de outros processos podem ter sido perdidas
+          (reconexão do backend), para que o estado em memória seja descartado
+        - Os canais devem ser assinados antes de start()
+    '''
+
+    # publish() executa I/O bloqueante (não deve ser chamado diretamente no event loop)
+    BLOQUEANTE = False
+
+    def __init__(self) -> None:
+        self.origem: str = uuid4().hex
+        self._lock: Lock = Lock()
+        self._handlers: Dict[str, List[Handler]] = {}
+        self._perda: List[Callable[[], None]] = []
+
+
+    def subscribe(self, canal: str, handler: Handler) -> None:
+
+        with self._lock:
+            self._handlers.setdefault(canal, []).append(handler)
+
+
+    def on_perda(self, callback: Callable[[], None]) -> None:
+        self._perda.append(callback)
+
+
+    def publish(self, canal: str, dados: dict) -> None:
+
+        self._dispatch(canal=canal, dados=dados, local=True)
+        self._send(canal=canal, payload=json.dumps({"origem": self.origem, "dados": dados}))
+
+
+    def start(self) -> None:
+        pass
+
+
+    def stop(self) -> None:
+        pass
+
+
+    def _send(self, canal: str, payload: str) -> None:
+        pass
+
+
+    def _receive(self, canal: str, payload: str) -> None:
+
+        mensagem = json.loads(payload)
+
+        # já entregue aos assinantes locais na publicação
+        if mensagem["origem"] == self.origem:
+            return
+
+        self._dispatch(canal=canal, dados=mensagem["dados"], local=False)
+
+
+    def _dispatch(self, canal: str, dados: dict, local: bool) -> None:
+
+        with self._lock:
+            handlers = list(self._handlers.get(canal, ()))
+
+        for handler in handlers:
+            try:
+                handler(dados, local)
+            except Exception:
+                # um assinante com erro não impede a entrega aos demais
+                logger.exception("Erro ao entregar mensagem do canal %s", canal)
+
+
+    def _notify_perda(self) -> None:
+
+        for callback in self._perda:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Erro ao descartar estado após perda de mensagens")
+
+
+class InProcessPubSub(PubSub):
+
+    '''
+        Backend em processo: entrega apenas aos assinantes locais, para um único worker
+    '''
+
+
+class PostgresPubSub(PubSub):
+
+    '''
+        Backend com LISTEN/NOTIFY do Postgres.
+
+        - publish() executa pg_notify() em uma transação curta, após o commit do dado publicado
+        - Uma thread por processo mantém uma conexão dedicada (fora do pool) escutando os canais assinados
+        - Na queda da conexão, reconecta e sinaliza a possível perda de mensagens (on_perda)
+        - O payload do NOTIFY é limitado a 8000 bytes pelo Postgres
+    '''
+
+    BLOQUEANTE = True
+
+    POLL_SEGUNDOS = 1.0
+    RECONEXAO_SEGUNDOS = 1.0
+
+    def __init__(self, engine: Engine) -> None:
+        super().__init__()
+        self.engine: Engine = engine
+        self._parar: Event = Event()
+        self._thread: Thread | None = None
+
+
+    def start(self) -> None:
+
+        if self._thread is not None:
+            return
+
+        self._parar.clear()
+        self._thread = Thread(target=self._run, name="pubsub-postgres-listen", daemon=True)
+        self._thread.start()
+
+
+    def stop(self) -> None:
+
+        self._parar.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=self.POLL_SEGUNDOS * 2)
+            self._thread = None
+
+
+    def _send(self, canal: str, payload: str) -> None:
+
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:canal, :payload)"), {"canal": canal, "payload": payload})
+            conn.commit()
+
+
+    def _listen(self):
+        # Conexão retirada do pool: permanece aberta enquanto a thread escuta
+
+        conexao = self.engine.raw_connection()
+        dbapi = conexao.driver_connection
+        conexao.detach()
+
+        dbapi.autocommit = True
+
+        with self._lock:
+            canais = list(self._handlers)
+
+        with dbapi.cursor() as cursor:
+            for canal in canais:
+                cursor.execute(f'LISTEN "{canal}"')
+
+        return conexao, dbapi
+
+
+    def _run(self) -> None:
+
+        primeira_conexao = True
+
+        while not self._parar.is_set():
+            conexao = None
+
+            try:
+                conexao, dbapi = self._listen()
+
+                # mensagens publicadas enquanto não havia conexão foram perdidas
+                if not primeira_conexao:
+                    self._notify_perda()
+                primeira_conexao = False
+
+                while not self._parar.is_set():
+                    if select.select([dbapi], [], [], self.POLL_SEGUNDOS) == ([], [], []):
+                        continue
+
+                    dbapi.poll()
+
+                    while dbapi.notifies:
+                        notificacao = dbapi.notifies.pop(0)
+                        self._receive(canal=notificacao.channel, payload=notificacao.payload)
+
+            except Exception:
+                logger.exception("Conexão LISTEN perdida, reconectando")
+                self._parar.wait(self.RECONEXAO_SEGUNDOS)
+
+            finally:
+                if conexao is not None:
+                    try:
+                        conexao.close()
+                    except Exception:
+                        pass
+
+
+class LocalPubSubRede:
+
+    '''
+        Rede local que simula vários processos dentro de um mesmo processo (testes).
+        Entrega as mensagens de forma síncrona a todos os nós, inclusive à origem, como o NOTIFY do Postgres.
+    '''
+
+    def __init__(self) -> None:
+        self._lock: Lock = Lock()
+        self.nos: List["LocalPubSub"] = []
+
+    def node(self) -> "LocalPubSub":
+
+        no = LocalPubSub(rede=self)
+
+        with self._lock:
+            self.nos.append(no)
+
+        return no
+
+    def send(self, canal: str, payload: str) -> None:
+
+        with self._lock:
+            nos = list(self.nos)
+
+        for no in nos:
+            no._receive(canal=canal, payload=payload)
+
+
+class LocalPubSub(PubSub):
+
+    '''
+        Nó de uma LocalPubSubRede, equivalente a um worker da aplicação
+    '''
+
+    def __init__(self, rede: LocalPubSubRede) -> None:
+        super().__init__()
+        self.rede: LocalPubSubRede = rede
+
+    def _send(self, canal: str, payload: str) -> None:
+        self.rede.send(canal=canal, payload=payload)
+
+
+def build_pubsub(backend: str) -> PubSub:
+
+    if backend == "postgres":
+        return PostgresPubSub(engine=engine)
+
+    return InProcessPubSub()
+
+
+pubsub = build_pubsub(backend=get_settings().pubsub_backend)
+
+def get_pubsub() -> PubSub:
+    return pubsub
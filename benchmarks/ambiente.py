@@ -0,0 +1,58 @@
+'''
+    Preparação do banco utilizado pelos benchmarks.
+
+    - Postgres local: DATABASE_URL / variáveis POSTGRES_* (ou --database-url)
+    - Postgres embutido: --embutido, através do pacote opcional pgserver
+
+    Os benchmarks utilizam um schema próprio (pregao_bench por padrão), criado com as tabelas da aplicação.
+'''
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+
+APP_DIR = Path(__file__).resolve().parent.parent / "app"
+
+# Mantém o servidor embutido vivo até o fim do processo
+_servidor_embutido = None
+
+
+def configurar(database_url: str | None, embutido: bool, schema: str) -> None:
+    # Deve ser executado antes de importar os módulos da aplicação: o engine é criado na importação
+
+    global _servidor_embutido
+
+    if embutido:
+        try:
+            import pgserver
+        except ImportError:
+            raise SystemExit("O modo --embutido requer o pacote pgserver: pip install pgserver")
+
+        _servidor_embutido = pgserver.get_server(Path(tempfile.gettempdir()) / "pregao-bench-pgdata")
+        database_url = _servidor_embutido.get_uri()
+
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+
+    os.environ["POSTGRES_SCHEMA"] = schema
+
+    if str(APP_DIR) not in sys.path:
+        sys.path.insert(0, str(APP_DIR))
+
+
+def preparar_schema(schema: str, recriar: bool) -> None:
+
+    from sqlalchemy import text
+    from database.instance import engine, Base
+
+    # registrando todas as tabelas no metadata
+    import pregao.models, itens.models, solicitacoes.models, usuarios.models  # noqa: F401
+
+    with engine.begin() as conn:
+        if recriar:
+            conn.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+
+    Base.metadata.create_all(engine)
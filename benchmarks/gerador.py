@@ -0,0 +1,90 @@
+'''
+    Gera um Pregão com N Itens e M Fornecedores através das classes de lógica da aplicação
+'''
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy.orm import Session
+
+
+@dataclass
+class CenarioPregao:
+
+    pregao_id: int
+    # ids dos Itens do Pregão
+    itens: List[int] = field(default_factory=list)
+    # ids dos Participantes Fornecedores
+    fornecedores: List[int] = field(default_factory=list)
+    diferenca_minima: float = 1
+    valor_inicial: float = 100000
+
+
+def gerar_pregao(db: Session, n_itens: int, n_fornecedores: int, diferenca_minima: float, intervalo_minutos: int, lances_por_intervalo: int, valor_inicial: float) -> CenarioPregao:
+
+    from usuarios.models import UserModel
+    from itens import schemas as itens_schemas
+    from pregao import schemas
+    from pregao.ingestion import build_lances_logic
+
+    lances_logic = build_lances_logic(db=db)
+    pregao_logic = lances_logic.pregao_logic
+    participantes_logic = lances_logic.pregao_participantes_logic
+    pregao_itens_logic = lances_logic.pregao_itens_logic
+    itens_logic = pregao_itens_logic.itens_logic
+
+    # Não há lógica de criação de Usuários na API: são gravados diretamente
+    usuarios = [UserModel(email=f"bench{i}@pregao.local", nome=f"Usuario Bench {i}") for i in range(n_fornecedores + 1)]
+    db.add_all(usuarios)
+    db.commit()
+    comprador_usuario, *fornecedores_usuarios = usuarios
+
+    # Catálogo
+    categoria = itens_logic.categorias_logic.create_categoria(body=itens_schemas.ItensCategoriasBodySchema(nome="Bench"))
+    subcategoria = itens_logic.subcategorias_logic.create_subcategoria(body=itens_schemas.ItensSubCategoriasBodySchema(categoriaID=categoria.id, nome="Bench"))
+    marca = itens_logic.marcas_logic.create_marca(body=itens_schemas.ItensMarcasBodySchema(nome="Bench"))
+    unidade = pregao_itens_logic.unidades_logic.create_unidade(body=itens_schemas.ItensUnidadesBodySchema(unidade="UN", descricao="Unidade"))
+
+    itens = [
+        itens_logic.create_item(body=itens_schemas.ItensBodySchema(nome=f"Item Bench {i}", descricao="Item gerado para benchmark", categoriaID=categoria.id, subcategoriaID=subcategoria.id, marcaID=marca.id))
+        for i in range(n_itens)
+    ]
+
+    # Pregão
+    regra = lances_logic.pregao_regras_lances_logic.create_regra_lances(body=schemas.PregaoRegrasLanceBodySchema(
+        diferencaDeValorMinima=diferenca_minima,
+        intervaloDeTempoEmMinutos=intervalo_minutos,
+        lancesPorIntervaloDeTempo=lances_por_intervalo
+    ))
+
+    agora = datetime.now()
+    pregao = pregao_logic.create_pregao(body=schemas.PregaoCreateSchema(
+        descricao="Pregão Bench",
+        informacoes="Pregão gerado para benchmark",
+        usuarioID=comprador_usuario.id,
+        dataHoraInicio=agora.isoformat(),
+        dataHoraFim=(agora + timedelta(days=1)).isoformat(),
+        abertoADemandasEm=agora.isoformat(),
+        abertoADemandasAte=(agora + timedelta(days=1)).isoformat(),
+        regraLanceID=regra.id
+    ))
+
+    comprador = participantes_logic.create_pregao_participante(pregao_id=pregao.id, usuario_id=comprador_usuario.id, participante_tipo=participantes_logic.PARTICIPANTE_COMPRADOR_TIPO)
+
+    fornecedores = [
+        participantes_logic.create_pregao_participante(pregao_id=pregao.id, usuario_id=usuario.id, participante_tipo=participantes_logic.PARTICIPANTE_FORNECEDOR_TIPO)
+        for usuario in fornecedores_usuarios
+    ]
+
+    pregao_itens = [
+        pregao_itens_logic.create_pregao_item(pregao_id=pregao.id, body=schemas.PregaoItensBodySchema(itemID=item.id, unidadeID=unidade.id, projecaoQuantidade=100, participanteID=comprador.id))
+        for item in itens
+    ]
+
+    return CenarioPregao(
+        pregao_id=pregao.id,
+        itens=[pregao_item.id for pregao_item in pregao_itens],
+        fornecedores=[fornecedor.id for fornecedor in fornecedores],
+        diferenca_minima=diferenca_minima,
+        valor_inicial=valor_inicial
+    )
@@ -0,0 +1,92 @@
+'''
+    Métricas do replay: latências (p50/p99), lances aceitos e rejeitados por segundo e SQL por lance
+'''
+
+import json
+import math
+from threading import Lock
+from typing import List
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from replay import Resultado
+
+
+class ContadorSQL:
+
+    '''
+        Conta os statements executados pelos engines da aplicação (apenas no modo em processo).
+        Com DB_ASYNC=1 as rotas utilizam o async_engine, cujos eventos são emitidos pelo sync_engine
+    '''
+
+    def __init__(self, engine: Engine, async_engine: AsyncEngine | None = None) -> None:
+        self.engines: List[Engine] = [engine] + ([async_engine.sync_engine] if async_engine is not None else [])
+        self._lock: Lock = Lock()
+        self.total: int = 0
+
+    def _contar(self, *args) -> None:
+        with self._lock:
+            self.total += 1
+
+    def __enter__(self) -> "ContadorSQL":
+        for engine in self.engines:
+            event.listen(engine, "before_cursor_execute", self._contar)
+        return self
+
+    def __exit__(self, *args) -> None:
+        for engine in self.engines:
+            event.remove(engine, "before_cursor_execute", self._contar)
+
+
+def percentil(valores: List[float], p: float) -> float | None:
+    # nearest-rank
+
+    if not valores:
+        return None
+
+    ordenados = sorted(valores)
+    posicao = max(0, math.ceil(p / 100 * len(ordenados)) - 1)
+
+    return ordenados[posicao]
+
+
+def resumir(resultados: List[Resultado], duracao: float, statements: int | None) -> dict:
+
+    def latencias(filtrados: List[Resultado]) -> dict:
+        valores = [resultado.latencia * 1000 for resultado in filtrados]
+        return {"p50_ms": percentil(valores, 50), "p99_ms": percentil(valores, 99), "max_ms": max(valores, default=None)}
+
+    aceitos = [resultado for resultado in resultados if 200 <= resultado.status < 300]
+    rejeitados = [resultado for resultado in resultados if 400 <= resultado.status < 500]
+    erros = [resultado for resultado in resultados if resultado.status == 0 or resultado.status >= 500]
+
+    return {
+        "lances": len(resultados),
+        "aceitos": len(aceitos),
+        "rejeitados": len(rejeitados),
+        "erros": len(erros),
+        "duracao_s": duracao,
+        "aceitos_por_s": len(aceitos) / duracao if duracao else None,
+        "rejeitados_por_s": len(rejeitados) / duracao if duracao else None,
+        "latencia": latencias(resultados),
+        "latencia_rajada": latencias([resultado for resultado in resultados if resultado.rajada]),
+        "sql_por_lance": statements / len(resultados) if statements is not None and resultados else None
+    }
+
+
+def imprimir(resumo: dict, formato: str) -> None:
+
+    if formato == "json":
+        print(json.dumps(resumo, indent=2))
+        return
+
+    def numero(valor, casas: int = 2) -> str:
+        return "n/d" if valor is None else f"{valor:.{casas}f}"
+
+    print(f"lances enviados     {resumo['lances']}")
+    print(f"aceitos/rejeitados  {resumo['aceitos']} / {resumo['rejeitados']} (erros: {resumo['erros']})")
+    print(f"duração             {numero(resumo['duracao_s'])} s")
+    print(f"aceitos por s       {numero(resumo['aceitos_por_s'])}")
+    print(f"rejeitados por s    {numero(resumo['rejeitados_por_s'])}")
+    print(f"latência p50/p99    {numero(resumo['latencia']['p50_ms'])} / {numero(resumo['latencia']['p99_ms'])} ms (máx. {numero(resumo['latencia']['max_ms'])})")
+    print(f"rajada p50/p99      {numero(resumo['latencia_rajada']['p50_ms'])} / {numero(resumo['latencia_rajada']['p99_ms'])} ms")
+    print(f"SQL por lance       {numero(resumo['sql_por_lance'])}")
@@ -0,0 +1,138 @@
+'''
+    Replay de padrões de lances contra a API: em processo (ASGI) ou por HTTP.
+
+    A agenda distribui os lances ao longo da duração do pregão simulado, concentrando uma parte
+    deles nos instantes finais (rajada de último minuto). Os Itens seguem uma distribuição de
+    popularidade (poucos Itens concentram a maior parte da disputa).
+'''
+
+import asyncio
+import random
+from dataclasses import dataclass
+from datetime import datetime
+from time import perf_counter
+from typing import Dict, List
+import httpx
+from gerador import CenarioPregao
+
+
+@dataclass
+class LanceAgendado:
+
+    # segundos a partir do início do replay
+    instante: float
+    fornecedor: int
+    item: int
+    rajada: bool
+
+
+@dataclass
+class Resultado:
+
+    instante: float
+    latencia: float
+    status: int
+    rajada: bool
+
+
+def gerar_agenda(cenario: CenarioPregao, total_lances: int, duracao: float, fracao_rajada: float, peso_rajada: float, seed: int) -> List[LanceAgendado]:
+    '''
+        - fracao_rajada: fração final da duração em que ocorre a rajada (0.1 = últimos 10%)
+        - peso_rajada: fração dos lances enviados durante a rajada
+    '''
+
+    rng = random.Random(seed)
+
+    inicio_rajada = duracao * (1 - fracao_rajada)
+    total_rajada = int(total_lances * peso_rajada)
+
+    # Popularidade dos Itens: pesos 1, 1/2, 1/3, ...
+    pesos_itens = [1 / (posicao + 1) for posicao in range(len(cenario.itens))]
+
+    agenda: List[LanceAgendado] = []
+
+    for indice in range(total_lances):
+        rajada = indice < total_rajada
+
+        if rajada:
+            # concentrada no final da rajada
+            instante = inicio_rajada + (duracao - inicio_rajada) * rng.betavariate(3, 1)
+        else:
+            instante = rng.uniform(0, inicio_rajada)
+
+        agenda.append(LanceAgendado(
+            instante=instante,
+            fornecedor=rng.choice(cenario.fornecedores),
+            item=rng.choices(cenario.itens, weights=pesos_itens)[0],
+            rajada=rajada
+        ))
+
+    return sorted(agenda, key=lambda lance: lance.instante)
+
+
+class Replay:
+
+    '''
+        Envia os lances da agenda nos instantes previstos (carga em malha aberta: o envio não
+        aguarda as respostas anteriores). Cada Fornecedor oferta abaixo do menor lance que conhece,
+        a partir das respostas já recebidas; uma fração dos lances é propositalmente inválida.
+    '''
+
+    def __init__(self, cliente: httpx.AsyncClient, cenario: CenarioPregao, fracao_invalidos: float, seed: int) -> None:
+        self.cliente: httpx.AsyncClient = cliente
+        self.cenario: CenarioPregao = cenario
+        self.fracao_invalidos: float = fracao_invalidos
+        self.rng: random.Random = random.Random(seed)
+        self.melhor: Dict[int, float] = {item: cenario.valor_inicial for item in cenario.itens}
+
+
+    def valor_lance(self, item: int) -> float:
+
+        diferenca = self.cenario.diferenca_minima
+
+        if self.rng.random() < self.fracao_invalidos:
+            # acima do lance vencedor conhecido: deve ser rejeitado
+            return self.melhor[item] + diferenca
+
+        return round(self.melhor[item] - diferenca * self.rng.choice((1, 1, 1.5, 2, 3)), 2)
+
+
+    async def enviar(self, inicio: float, lance: LanceAgendado) -> Resultado:
+
+        atraso = lance.instante - (perf_counter() - inicio)
+        if atraso > 0:
+            await asyncio.sleep(atraso)
+
+        body = {
+            "participanteID": lance.fornecedor,
+            "itemID": lance.item,
+            "valorLance": self.valor_lance(lance.item),
+            "dataHoraLance": datetime.now().isoformat()
+        }
+
+        envio = perf_counter()
+        try:
+            resposta = await self.cliente.post(f"/pregoes/{self.cenario.pregao_id}/lances/registrar", json=body)
+            status = resposta.status_code
+        except httpx.HTTPError:
+            status = 0
+        latencia = perf_counter() - envio
+
+        if 200 <= status < 300:
+            self.melhor[lance.item] = min(self.melhor[lance.item], body["valorLance"])
+
+        return Resultado(instante=envio - inicio, latencia=latencia, status=status, rajada=lance.rajada)
+
+
+    async def executar(self, agenda: List[LanceAgendado]) -> List[Resultado]:
+
+        inicio = perf_counter()
+        return list(await asyncio.gather(*(self.enviar(inicio=inicio, lance=lance) for lance in agenda)))
+
+
+def cliente_em_processo(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://pregao-bench", timeout=None)
+
+
+def cliente_http(url: str, conexoes: int) -> httpx.AsyncClient:
+    return httpx.AsyncClient(base_url=url, timeout=60, limits=httpx.Limits(max_connections=conexoes, max_keepalive_connections=conexoes))